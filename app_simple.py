@@ -19,9 +19,15 @@ st.set_page_config(
 
 # Core imports
 from core.content_generation import transcribe_audio, generate_wisdom, generate_outline, generate_article, generate_social_content
+from core.content_generation import generate_social_posts, generate_with_structure
+from core.structured_output import SocialContent
 from core.styling import apply_aurora_theme, create_aurora_header, create_aurora_progress_card, create_aurora_step_card, create_aurora_content_card, AuroraComponents
+from core.config import get_config
 from core.supabase_integration import get_supabase_client
 from core.file_upload import EnhancedLargeFileProcessor
+from core.metrics_exporter import timed_request, timed_step, track_pipeline
+from core.article_sections import compose_article
+from core.transcript_digest import build_transcript_digest, transcript_for_step, uses_digest
 
 # Apply beautiful theme
 apply_aurora_theme()
@@ -140,6 +146,17 @@ def create_notion_page(title: str, content_data: Dict[str, str]) -> Optional[str
         
         for section_title, section_content in sections:
             if section_content:
+                # Validated social posts render as per-platform blocks
+                if section_title == "📱 Social Content" and content_data.get('social_posts'):
+                    children.append({
+                        "type": "toggle",
+                        "toggle": {
+                            "rich_text": [{"type": "text", "text": {"content": section_title}}],
+                            "children": SocialContent.from_dict(content_data['social_posts']).notion_blocks()[:90]
+                        }
+                    })
+                    continue
+                
                 # Handle research data specially
                 if section_title == "🔍 Research Links" and isinstance(section_content, dict):
                     research_children = []
@@ -424,6 +441,53 @@ def show_processing_pipeline(current_step=0, step_progress=0, total_progress=0,
     st.markdown(pipeline_html, unsafe_allow_html=True)
 
 def process_audio_pipeline(audio_file):
+    """Run the audio pipeline and record per-step token/cost usage"""
+    from core.cost_accounting import JobUsage, usage_scope
+    
+    job_usage = JobUsage()
+    start_time = time.time()
+    with usage_scope(job_usage):
+        results = _run_audio_pipeline(audio_file)
+    
+    duration = time.time() - start_time
+    log_pipeline_usage(job_usage, duration, success=results is not None,
+                       digest_report=(results or {}).get('transcript_digest'))
+    track_pipeline("inline", duration, success=results is not None)
+    return results
+
+def build_job_digest(transcript: str, results: dict):
+    """Build the shared transcript digest once and record its token savings"""
+    if not get_config().transcript_digest_enabled:
+        return None
+    digest = build_transcript_digest(transcript)
+    steps_using = sum(uses_digest(step) for step in ("wisdom_extraction", "outline_creation", "article_writing"))
+    results['transcript_digest'] = digest.report(steps_using=steps_using)
+    return digest
+
+def log_pipeline_usage(job_usage, duration: float, success: bool, digest_report: dict = None,
+                       resource_usage: dict = None):
+    """Store the job's per-step usage (and large-file resource peaks) in pipeline_logs metadata"""
+    try:
+        db = get_supabase_client()
+        if db and st.session_state.get("user_id"):
+            metadata = {"usage": job_usage.summary(), "transcript_digest": digest_report or {}}
+            if resource_usage:
+                metadata["resource_usage"] = resource_usage
+            entry = {
+                "type": "full",
+                "duration": duration,
+                "success": success,
+                "metadata": metadata,
+            }
+            # Failover and tiered routing pick the model per call; log the one used most
+            provider, model = job_usage.primary_model()
+            if provider:
+                entry.update({"ai_provider": provider, "model": model})
+            db.log_pipeline_execution(st.session_state.user_id, entry)
+    except Exception as e:
+        st.warning(f"Usage logging failed: {e}")
+
+def _run_audio_pipeline(audio_file):
     """Core audio to content pipeline with beautiful Aurora visualization"""
     import time
     from datetime import datetime
@@ -482,12 +546,14 @@ def process_audio_pipeline(audio_file):
                     processing_time=f"{time.time() - start_time:.1f}s"
                 )
             
-            transcript = transcribe_audio(tmp_file_path)
+            with timed_step("transcription"):
+                transcript = transcribe_audio(tmp_file_path)
             if not transcript or "Error" in transcript:
                 st.error(f"Transcription failed: {transcript}")
                 return None
             
             results['transcript'] = transcript
+            digest = build_job_digest(transcript, results)
             
             # Stream transcript to UI immediately
             with transcript_container:
@@ -525,7 +591,9 @@ def process_audio_pipeline(audio_file):
                     processing_time=f"{time.time() - start_time:.1f}s"
                 )
             
-            wisdom = generate_wisdom(transcript, custom_prompt=wisdom_prompt, knowledge_base={})
+            with timed_step("wisdom_extraction"):
+                wisdom = generate_wisdom(transcript_for_step("wisdom_extraction", transcript, digest),
+                                         custom_prompt=wisdom_prompt, knowledge_base={})
             results['wisdom'] = wisdom
             
             # Stream wisdom to UI immediately
@@ -564,7 +632,9 @@ def process_audio_pipeline(audio_file):
                     processing_time=f"{time.time() - start_time:.1f}s"
                 )
             
-            outline = generate_outline(transcript, wisdom, custom_prompt=outline_prompt, knowledge_base={})
+            with timed_step("outline_creation"):
+                outline = generate_outline(transcript_for_step("outline_creation", transcript, digest), wisdom,
+                                           custom_prompt=outline_prompt, knowledge_base={})
             results['outline'] = outline
             
             # Stream outline to UI immediately
@@ -608,7 +678,9 @@ def process_audio_pipeline(audio_file):
                     processing_time=f"{time.time() - start_time:.1f}s"
                 )
             
-            article = generate_article(transcript, wisdom, outline, custom_prompt=article_prompt, knowledge_base={})
+            with timed_step("article_creation"):
+                article = compose_article(transcript_for_step("article_writing", transcript, digest), wisdom, outline,
+                                          custom_prompt=article_prompt, knowledge_base={})
             results['article'] = article
             
             # Stream article to UI immediately
@@ -647,7 +719,11 @@ def process_audio_pipeline(audio_file):
                     processing_time=f"{time.time() - start_time:.1f}s"
                 )
             
-            social = generate_social_content(wisdom, outline, article, custom_prompt=social_prompt, knowledge_base={})
+            with timed_step("social_content"):
+                social, results['social_posts'] = generate_with_structure(
+                    generate_social_posts, generate_social_content,
+                    wisdom, outline, article, custom_prompt=social_prompt, knowledge_base={}
+                )
             results['social_content'] = social
             
             # Stream social content to UI immediately
@@ -783,12 +859,34 @@ def process_audio_pipeline_live(audio_file):
         pass
     return controller.get_results()
 
-def process_audio_pipeline_with_transcript(transcript: str):
+def process_audio_pipeline_with_transcript(transcript: str, wisdom: str = None, resource_usage: dict = None):
+    """Run the pipeline on pre-transcribed content and record per-step token/cost usage
+
+    ``wisdom`` may carry the result of incremental extraction during chunked
+    transcription, in which case the wisdom step is not repeated.
+    ``resource_usage`` (``process_large_file``'s per-stage peaks) is kept in
+    the pipeline log.
+    """
+    from core.cost_accounting import JobUsage, usage_scope
+    
+    job_usage = JobUsage()
+    start_time = time.time()
+    with usage_scope(job_usage):
+        results = _run_transcript_pipeline(transcript, wisdom)
+    
+    duration = time.time() - start_time
+    log_pipeline_usage(job_usage, duration, success=results is not None,
+                       digest_report=(results or {}).get('transcript_digest'), resource_usage=resource_usage)
+    track_pipeline("inline", duration, success=results is not None)
+    return results
+
+def _run_transcript_pipeline(transcript: str, wisdom: str = None):
     """Process audio pipeline with pre-transcribed content using beautiful Aurora visualization"""
     import time
     from datetime import datetime
     
     results = {'transcript': transcript}
+    digest = build_job_digest(transcript, results)
     start_time = time.time()
     
     # Load custom prompts
@@ -842,7 +940,10 @@ def process_audio_pipeline_with_transcript(transcript: str):
                 processing_time=f"{time.time() - start_time:.1f}s"
             )
         
-        wisdom = generate_wisdom(transcript, custom_prompt=wisdom_prompt, knowledge_base={})
+        if not wisdom or wisdom.startswith("Error"):
+            with timed_step("wisdom_extraction"):
+                wisdom = generate_wisdom(transcript_for_step("wisdom_extraction", transcript, digest),
+                                         custom_prompt=wisdom_prompt, knowledge_base={})
         results['wisdom'] = wisdom
         
         # Stream wisdom to UI immediately
@@ -881,7 +982,9 @@ def process_audio_pipeline_with_transcript(transcript: str):
                 processing_time=f"{time.time() - start_time:.1f}s"
             )
         
-        outline = generate_outline(transcript, wisdom, custom_prompt=outline_prompt, knowledge_base={})
+        with timed_step("outline_creation"):
+            outline = generate_outline(transcript_for_step("outline_creation", transcript, digest), wisdom,
+                                       custom_prompt=outline_prompt, knowledge_base={})
         results['outline'] = outline
         
         # Stream outline to UI immediately
@@ -925,7 +1028,9 @@ def process_audio_pipeline_with_transcript(transcript: str):
                 processing_time=f"{time.time() - start_time:.1f}s"
             )
         
-        article = generate_article(transcript, wisdom, outline, custom_prompt=article_prompt, knowledge_base={})
+        with timed_step("article_creation"):
+            article = compose_article(transcript_for_step("article_writing", transcript, digest), wisdom, outline,
+                                      custom_prompt=article_prompt, knowledge_base={})
         results['article'] = article
         
         # Stream article to UI immediately
@@ -964,7 +1069,11 @@ def process_audio_pipeline_with_transcript(transcript: str):
                 processing_time=f"{time.time() - start_time:.1f}s"
             )
         
-        social = generate_social_content(wisdom, outline, article, custom_prompt=social_prompt, knowledge_base={})
+        with timed_step("social_content"):
+            social, results['social_posts'] = generate_with_structure(
+                generate_social_posts, generate_social_content,
+                wisdom, outline, article, custom_prompt=social_prompt, knowledge_base={}
+            )
         results['social_content'] = social
         
         # Stream social content to UI immediately
@@ -1707,22 +1816,22 @@ def show_transform_page():
                 file_size = len(uploaded_file.getvalue()) / (1024 * 1024)
                 file_extension = uploaded_file.name.split('.')[-1].upper()
             
-            st.markdown(f"""
-            <div class="aurora-file-preview">
-                <div class="aurora-file-preview-header">
-                    <div class="aurora-file-info">
-                        <div class="aurora-file-icon">🎵</div>
-                        <div class="aurora-file-details">
-                            <h4>{uploaded_file.name}</h4>
-                            <p>{file_size:.1f} MB • {file_extension} Format</p>
+                st.markdown(f"""
+                <div class="aurora-file-preview">
+                    <div class="aurora-file-preview-header">
+                        <div class="aurora-file-info">
+                            <div class="aurora-file-icon">🎵</div>
+                            <div class="aurora-file-details">
+                                <h4>{uploaded_file.name}</h4>
+                                <p>{file_size:.1f} MB • {file_extension} Format</p>
+                            </div>
+                        </div>
+                        <div class="aurora-file-actions">
+                            <div class="aurora-file-action-btn">Ready to process</div>
                         </div>
-                    </div>
-                    <div class="aurora-file-actions">
-                        <div class="aurora-file-action-btn">Ready to process</div>
                     </div>
                 </div>
-            </div>
-            """, unsafe_allow_html=True)
+                """, unsafe_allow_html=True)
             
                 # Enhanced audio player
                 if file_size < 50:  # Only show player for files under 50MB
@@ -1737,14 +1846,7 @@ def show_transform_page():
                     if not os.getenv("OPENAI_API_KEY"):
                         st.error("Please enter your OpenAI API key in the sidebar")
                         return
-
-                    with st.container():
-                        if st.session_state.get('live_stream', False):
-                            results = process_audio_pipeline_live(uploaded_file)
-                        else:
-                            results = process_audio_pipeline(uploaded_file)
-                        if results:
-                            st.session_state.current_results = results
+                    start_upload_job(uploaded_file)
     
     else:
         # Enhanced large file upload
@@ -1798,66 +1900,72 @@ def show_transform_page():
                 if not os.getenv("OPENAI_API_KEY"):
                     st.error("Please enter your OpenAI API key in the sidebar")
                     return
-                
-                with st.container():
-                    # Process with enhanced large file processor
-                    processing_result = processor.process_large_file(uploaded_file)
-                    
-                    if processing_result["success"]:
-                        transcript = processing_result["transcript"]
-                        
-                        # Show processing summary
-                        st.success(f"Large file processing complete!")
-                        
-                        # Beautiful success metrics
-                        st.markdown(f"""
-                        <div class="aurora-processing-metrics">
-                            <div class="aurora-metric-card">
-                                <div class="aurora-metric-value">{len(transcript):,}</div>
-                                <div class="aurora-metric-label">Characters</div>
-                            </div>
-                            <div class="aurora-metric-card">
-                                <div class="aurora-metric-value">{processing_result["method"]}</div>
-                                <div class="aurora-metric-label">Method Used</div>
-                            </div>
-                            <div class="aurora-metric-card">
-                                <div class="aurora-metric-value">{processing_result.get("chunks_processed", 1)}</div>
-                                <div class="aurora-metric-label">Chunks Processed</div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Continue with pipeline using pre-transcribed content
-                        st.markdown("---")
-                        results = process_audio_pipeline_with_transcript(transcript)
-                        
-                        if results:
-                            # Store results in session state
-                            st.session_state.current_results = results
-                    else:
-                        st.error(f"Large file processing failed: {processing_result['error']}")
-                        
-                        # Fallback to standard processing for smaller files
-                        if file_size_mb < 100:
-                            st.info("Attempting fallback to standard processing...")
-                            try:
-                                if st.session_state.get('live_stream', False):
-                                    results = process_audio_pipeline_live(uploaded_file)
-                                else:
-                                    results = process_audio_pipeline(uploaded_file)
-                                if results:
-                                    st.session_state.current_results = results
-                            except Exception as e:
-                                st.error(f"Fallback processing also failed: {str(e)}")
-    
-    # Show results if available
-    if 'current_results' in st.session_state:
+                # The engine chunks files over Whisper's limit and extracts wisdom
+                # while the remaining chunks transcribe
+                start_upload_job(uploaded_file)
+    
+    # Progress and results of the upload's background job (polls until it finishes)
+    if st.session_state.get('upload_job_id') and \
+            st.session_state.get('upload_job_id') == st.session_state.get('pipeline_job_id'):
+        from core.streaming_results import show_background_job_results
+        show_background_job_results()
+    elif 'current_results' in st.session_state:
         show_results(st.session_state.current_results)
 
+def custom_step_prompts() -> Dict[str, Optional[str]]:
+    """Custom prompts keyed by pipeline step, as background jobs expect them"""
+    custom_prompts = load_custom_prompts()
+    return {
+        'wisdom_extraction': get_prompt_for_step('wisdom', custom_prompts),
+        'outline_creation': get_prompt_for_step('outline', custom_prompts),
+        'article_creation': get_prompt_for_step('article', custom_prompts),
+        'social_media': get_prompt_for_step('social', custom_prompts),
+    }
+
+def start_upload_job(uploaded_file):
+    """Process an upload on the headless engine; the page polls its progress.
+
+    The job keeps running if the tab closes, and is admitted against the
+    user's quota and scheduled fairly like every other job.
+    """
+    from core.streaming_pipeline import get_pipeline_controller
+
+    st.session_state.pop('current_results', None)
+    st.session_state.pop('reprocess_content_id', None)
+    st.session_state.upload_job_id = get_pipeline_controller().start_background(
+        uploaded_file, prompts=custom_step_prompts()
+    )
+    st.rerun()
+
+def reprocess_content_item(item: Dict):
+    """Regenerate a library item in the background, resuming from its checkpoints"""
+    from core.pipeline_engine import content_reprocess_job
+    from core.streaming_pipeline import get_pipeline_controller
+
+    if not item.get('transcript'):
+        st.warning("This item has no transcript to reprocess.")
+        return
+
+    job = content_reprocess_job(
+        item,
+        prompts=custom_step_prompts(),
+        ai_provider=st.session_state.get('ai_provider'),
+        ai_model=st.session_state.get('ai_model'),
+    )
+    get_pipeline_controller().submit_background(job)
+    st.session_state.reprocess_content_id = item.get('id')
+    st.rerun()
+
 def show_content_library():
     """Content library/history page"""
     st.markdown("### 📚 Content Library")
     
+    # Progress of a running reprocess (polls until the background job finishes)
+    if st.session_state.get('reprocess_content_id'):
+        from core.streaming_results import show_background_job_results
+        with st.expander(f"🔄 Reprocessing item {st.session_state.reprocess_content_id}", expanded=True):
+            show_background_job_results()
+    
     # Get content from database
     try:
         db = get_supabase_client()
@@ -1892,7 +2000,7 @@ def show_content_library():
                         
                         with col2:
                             if st.button(f"🔄 Reprocess", key=f"reprocess_{item.get('id')}"):
-                                st.info("Reprocessing feature coming soon!")
+                                reprocess_content_item(item)
                             
                             if st.button(f"📤 Export", key=f"export_{item.get('id')}"):
                                 st.info("Export feature coming soon!")
@@ -1970,13 +2078,6 @@ def show_settings_page():
                                      value=st.session_state.get('auto_notion', True))
             st.session_state.auto_notion = auto_notion
 
-            live_stream = st.checkbox(
-                "Live Streaming",
-                value=st.session_state.get('live_stream', False),
-                help="Show step-by-step streaming results"
-            )
-            st.session_state.live_stream = live_stream
-            
             large_file_mode = st.checkbox("Enhanced Large File Processing", 
                                         value=st.session_state.get('large_file_mode', True),
                                         help="Use FFmpeg for files larger than 25MB")
@@ -2361,12 +2462,19 @@ def show_main_app():
 # === ENTRY POINT ===
 def main():
     """Application entry point"""
-    init_session()
+    from core.streaming_results import rerun_if_polling
+
+    # Each script run is one request for the response-time and error-rate SLOs
+    with timed_request("GET", "/"):
+        init_session()
+        
+        if st.session_state.authenticated:
+            show_main_app()
+        else:
+            show_login()
     
-    if st.session_state.authenticated:
-        show_main_app()
-    else:
-        show_login()
+    # Waiting to refresh a running job's progress is not request time
+    rerun_if_polling()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
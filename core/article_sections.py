@@ -0,0 +1,158 @@
+"""
+Section-Parallel Article Generation for WhisperForge
+====================================================
+
+Alternative to the single long ``generate_article`` completion: the outline
+is parsed into sections, each section is written concurrently (all calls
+share the cached KB + transcript prefix), and a short transition pass adds a
+bridging sentence at each section boundary. Wall time approaches that of the
+slowest section, and long articles are no longer capped by one call's
+``max_tokens``.
+
+Select with ``ARTICLE_MODE=sections``; outlines with fewer than two sections
+and any failed section fall back to the single-call article.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .config import get_config
+from .content_generation import generate_article, generate_article_section, generate_section_transitions
+
+logger = logging.getLogger(__name__)
+
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+TOP_LEVEL_ITEM = re.compile(r"^(?:\d+|[IVXLC]+)[.)]\s+(.+)$")
+BOLD_LINE = re.compile(r"^\*\*(.+?)\*\*:?\s*$")
+TRANSITION_LINE = re.compile(r"^\s*(\d+)\s*[:.)]\s*(.+)$")
+BOUNDARY_EXCERPT_CHARS = 300
+
+
+@dataclass
+class OutlineSection:
+    """One top-level section of the outline"""
+
+    title: str
+    points: str = ""
+
+
+def _split(lines: List[str], is_section) -> List[OutlineSection]:
+    sections: List[OutlineSection] = []
+    for line in lines:
+        title = is_section(line)
+        if title:
+            sections.append(OutlineSection(title=title.strip("* ")))
+        elif sections and line.strip():
+            sections[-1].points += line.rstrip() + "\n"
+    return sections
+
+
+def parse_outline_sections(outline: str) -> List[OutlineSection]:
+    """Parse the outline's top-level sections from headings, numbering or bold lines"""
+    lines = (outline or "").splitlines()
+
+    headings = [(len(m.group(1)), m.group(2)) for m in map(HEADING.match, lines) if m]
+    if headings:
+        levels = sorted({level for level, _ in headings})
+        level = levels[0]
+        # A lone top-level heading is the article title, not a section
+        if sum(1 for l, _ in headings if l == level) == 1 and len(levels) > 1:
+            level = levels[1]
+
+        def heading_title(line: str) -> Optional[str]:
+            match = HEADING.match(line)
+            return match.group(2) if match and len(match.group(1)) == level else None
+
+        def is_shallower(line: str) -> bool:
+            match = HEADING.match(line)
+            return bool(match and len(match.group(1)) < level)
+
+        sections = _split([l for l in lines if not is_shallower(l)], heading_title)
+        if len(sections) >= 2:
+            return sections
+
+    for pattern in (TOP_LEVEL_ITEM, BOLD_LINE):
+        sections = _split(lines, lambda line: (pattern.match(line) or [None, None])[1])
+        if len(sections) >= 2:
+            return sections
+    return []
+
+
+def stitch_sections(sections: List[str], transitions: Dict[int, str]) -> str:
+    """Join sections, appending the bridging sentence for boundary N to section N"""
+    parts = []
+    for number, text in enumerate(sections, 1):
+        parts.append(text.strip())
+        if number in transitions:
+            parts.append(transitions[number])
+    return "\n\n".join(parts)
+
+
+def _boundaries(sections: List[str]) -> List[str]:
+    return [
+        f"BOUNDARY {n}:\nEND OF SECTION {n}: ...{sections[n - 1].strip()[-BOUNDARY_EXCERPT_CHARS:]}\n"
+        f"START OF SECTION {n + 1}: {sections[n].strip()[:BOUNDARY_EXCERPT_CHARS]}..."
+        for n in range(1, len(sections))
+    ]
+
+
+def parse_transitions(response: str, count: int) -> Dict[int, str]:
+    """Parse ``N: sentence`` lines, ignoring anything out of range"""
+    if not response or response.startswith("Error"):
+        return {}
+    transitions = {}
+    for line in response.splitlines():
+        match = TRANSITION_LINE.match(line)
+        if match and 1 <= int(match.group(1)) <= count:
+            transitions[int(match.group(1))] = match.group(2).strip()
+    return transitions
+
+
+def generate_article_by_sections(transcript: str, wisdom: str, outline: str, custom_prompt: str = None,
+                                 knowledge_base: Dict[str, str] = None, ai_provider: str = None,
+                                 ai_model: str = None, max_workers: int = 4) -> str:
+    """Write each outline section concurrently, then stitch with transitions"""
+    sections = parse_outline_sections(outline)
+    if len(sections) < 2:
+        logger.info("Outline has fewer than two sections; using single-call article generation")
+        return generate_article(transcript, wisdom, outline, custom_prompt=custom_prompt,
+                                knowledge_base=knowledge_base, ai_provider=ai_provider, ai_model=ai_model)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="article") as executor:
+        # copy_context keeps usage accounting attributed to the current job
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run, generate_article_section,
+                transcript, wisdom, outline, section.title, section.points, position, len(sections),
+                custom_prompt=custom_prompt, knowledge_base=knowledge_base,
+                ai_provider=ai_provider, ai_model=ai_model
+            )
+            for position, section in enumerate(sections, 1)
+        ]
+        texts = [future.result() for future in futures]
+
+    failed = [s.title for s, text in zip(sections, texts) if not text or text.startswith("Error")]
+    if failed:
+        logger.warning(f"Article sections failed ({', '.join(failed)}); using single-call article generation")
+        return generate_article(transcript, wisdom, outline, custom_prompt=custom_prompt,
+                                knowledge_base=knowledge_base, ai_provider=ai_provider, ai_model=ai_model)
+
+    response = generate_section_transitions(_boundaries(texts), knowledge_base=knowledge_base,
+                                            ai_provider=ai_provider, ai_model=ai_model)
+    return stitch_sections(texts, parse_transitions(response, len(texts) - 1))
+
+
+def compose_article(transcript: str, wisdom: str, outline: str, custom_prompt: str = None,
+                    knowledge_base: Dict[str, str] = None, ai_provider: str = None,
+                    ai_model: str = None, mode: Optional[str] = None) -> str:
+    """Generate the article using the configured ``article_mode``"""
+    mode = mode or get_config().article_mode
+    generate = generate_article_by_sections if mode == "sections" else generate_article
+    return generate(transcript, wisdom, outline, custom_prompt=custom_prompt, knowledge_base=knowledge_base,
+                    ai_provider=ai_provider, ai_model=ai_model)
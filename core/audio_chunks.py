@@ -0,0 +1,162 @@
+"""
+Headless Audio Chunking for WhisperForge
+========================================
+
+FFmpeg chunking and parallel chunk transcription without any Streamlit
+calls, for the background pipeline engine and queue workers. The upload
+page keeps using ``EnhancedLargeFileProcessor``, which renders progress
+while it works; both split audio the same way (10-minute 16 kHz mono WAV
+chunks under Whisper's 25 MB limit).
+
+Both stages honour the job's ``CancellationToken``: FFmpeg is killed,
+queued chunks are dropped and in-flight uploads are aborted on cancel.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import math
+import os
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from .cancellation import check_cancelled, current_token
+from .content_generation import is_failed_output, transcribe_audio
+from .fair_scheduler import get_scheduler
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+CHUNK_SECONDS = 600
+MIN_CHUNK_SUCCESS = 0.7  # fraction of chunks that must transcribe
+CANCEL_POLL_SECONDS = 0.5
+AUDIO_BYTES_PER_SECOND = 16000  # rough size of compressed speech, for scheduling uploads of unknown length
+
+
+class ChunkingError(RuntimeError):
+    """FFmpeg could not probe or split the audio"""
+
+
+def probe_duration(path: str) -> float:
+    """Audio duration in seconds, via ffprobe"""
+    cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ChunkingError(f"ffprobe failed: {e}") from e
+    if result.returncode != 0:
+        raise ChunkingError(f"ffprobe failed: {result.stderr.strip()}")
+    return float(json.loads(result.stdout)["format"]["duration"])
+
+
+def _run_ffmpeg(cmd: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """``subprocess.run`` that kills FFmpeg when the job is cancelled"""
+    with span("ffmpeg", kind="subprocess", output=os.path.basename(cmd[-1])):
+        return _run_cancellable(cmd, timeout)
+
+
+def _run_cancellable(cmd: List[str], timeout: float) -> subprocess.CompletedProcess:
+    token = current_token()
+    if token is None:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    token.raise_if_cancelled()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    unregister = token.on_cancel(process.kill)
+    try:
+        stdout, stderr = process.communicate(timeout=token.bound_timeout(timeout))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        token.raise_if_cancelled()
+        raise
+    finally:
+        unregister()
+    token.raise_if_cancelled()
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def create_chunks(path: str, out_dir: str, chunk_seconds: int = CHUNK_SECONDS) -> List[Dict[str, Any]]:
+    """Split ``path`` into WAV chunks in ``out_dir``"""
+    duration = probe_duration(path)
+    chunks = []
+    for index in range(math.ceil(duration / chunk_seconds)):
+        start = index * chunk_seconds
+        chunk_path = os.path.join(out_dir, f"chunk_{index:03d}.wav")
+        cmd = [
+            "ffmpeg", "-i", path, "-ss", str(start), "-t", str(chunk_seconds),
+            "-ar", "16000", "-ac", "1", "-acodec", "pcm_s16le", "-y", chunk_path,
+        ]
+        result = _run_ffmpeg(cmd, timeout=300)
+        if result.returncode != 0:
+            raise ChunkingError(f"FFmpeg chunk creation failed: {result.stderr.strip()[-500:]}")
+        if os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 0:
+            chunks.append({
+                "index": index,
+                "file_path": chunk_path,
+                "start_time": start,
+                "duration": min(chunk_seconds, duration - start),
+            })
+    return chunks
+
+
+def transcribe_scheduled(path: str, audio_seconds: Optional[float] = None) -> str:
+    """``transcribe_audio`` once the current user's fair turn for a Whisper slot comes up"""
+    if audio_seconds is None:
+        audio_seconds = os.path.getsize(path) / AUDIO_BYTES_PER_SECOND
+    with span("chunk", kind="chunk", file=os.path.basename(path), audio_seconds=round(audio_seconds, 1)):
+        with get_scheduler("transcription").slot(cost=max(1.0, audio_seconds)):
+            return transcribe_audio(path)
+
+
+def transcribe_chunks(chunks: List[Dict[str, Any]], max_workers: int = 4,
+                      on_chunk: Optional[Callable[[int, Optional[str]], None]] = None) -> str:
+    """Transcribe chunks concurrently and join them in order.
+
+    ``on_chunk(index, transcript_or_None)`` is called as each chunk finishes,
+    e.g. to feed ``IncrementalWisdomExtractor.add_chunk``. Raises
+    ``JobCancelled`` as soon as the current job is cancelled.
+    """
+    transcripts: Dict[int, str] = {}
+    futures: Dict[Future, int] = {}
+    # Queued chunks are dropped the moment the job is cancelled
+    token = current_token()
+    unregister = token.on_cancel(lambda: [future.cancel() for future in list(futures)]) if token else None
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chunk")
+    try:
+        for chunk in chunks:
+            check_cancelled()
+            future = executor.submit(contextvars.copy_context().run, transcribe_scheduled, chunk["file_path"],
+                                     chunk.get("duration"))
+            futures[future] = chunk["index"]
+        pending = set(futures)
+        while pending:
+            # Poll so a cancel is noticed while long uploads are in flight
+            done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            check_cancelled()
+            for future in done:
+                index = futures[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to transcribe chunk {index}: {e}")
+                    text = None
+                if text and is_failed_output(text):
+                    logger.error(f"Failed to transcribe chunk {index}: {text}")
+                    text = None
+                if text is not None:
+                    transcripts[index] = text
+                if on_chunk is not None:
+                    on_chunk(index, text)
+    finally:
+        if unregister is not None:
+            unregister()
+        # Running uploads abort via the token's HTTP client
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if len(transcripts) < len(chunks) * MIN_CHUNK_SUCCESS:
+        raise ChunkingError(f"Too many failed chunks: {len(transcripts)}/{len(chunks)} successful")
+    return " ".join(text for _, text in sorted(transcripts.items())).strip()
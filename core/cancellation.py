@@ -0,0 +1,230 @@
+"""
+Cooperative Cancellation for WhisperForge
+=========================================
+
+A ``CancellationToken`` flows through a pipeline job the same way
+``JobUsage`` does: the engine activates it with ``cancellation_scope`` and
+everything underneath (chunk workers, provider calls, ffmpeg) finds it with
+``current_token()``. Thread pools that submit through
+``contextvars.copy_context().run`` carry it into their workers.
+
+A token is cancelled explicitly (the user clicked stop) or by its deadline.
+Step tokens are children of the job token, so a step deadline never
+outlives the job deadline and cancelling the job cancels the running step:
+
+    token = CancellationToken(deadline_seconds=3600)
+    with cancellation_scope(token.child(deadline_seconds=900)):
+        run_step()          # provider calls raise JobCancelled once stopped
+
+``abortable_client`` routes an SDK client through one HTTP connection pool
+per job, kept on the job's root token. Calls of the same job reuse its
+connections. The pool is closed when the job is cancelled, so in-flight
+requests are aborted rather than left to run to completion and burn quota.
+It is also closed when the root token is released at the end of the job.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised when the running job was cancelled"""
+
+
+class DeadlineExceeded(JobCancelled):
+    """Raised when a job or step ran past its deadline"""
+
+
+class CancellationToken:
+    """Thread-safe cancel flag with an optional deadline and cancel callbacks"""
+
+    def __init__(self, deadline_seconds: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        self.parent = parent
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason: Optional[str] = None
+        self._cancelled = False
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._http_pool: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._detach_parent = parent.on_cancel(lambda: self.cancel(parent.reason)) if parent else None
+
+    def cancel(self, reason: str = "cancelled by user") -> None:
+        """Request cancellation and run the cancel callbacks once"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self.reason = reason
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        logger.info(f"Cancellation requested: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback failed: {e}")
+        self._close_http_pool()
+        # Wake waiters last, once queued work has been dropped
+        self._event.set()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call ``callback`` on cancel (now, if already cancelled); returns an unregister function"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def release(self) -> None:
+        """Detach a finished child token from its parent and close its HTTP pool"""
+        if self._detach_parent is not None:
+            self._detach_parent()
+        self._close_http_pool()
+
+    def root(self) -> "CancellationToken":
+        """The job-level token at the top of this token's lineage"""
+        token = self
+        while token.parent is not None:
+            token = token.parent
+        return token
+
+    def http_pool(self, factory: Callable[[], Any]) -> Any:
+        """The HTTP pool shared by all calls under this token's root, created with ``factory`` on first use"""
+        root = self.root()
+        with root._lock:
+            if root._cancelled:
+                raise root.exception()
+            if root._http_pool is None:
+                root._http_pool = factory()
+            return root._http_pool
+
+    def _close_http_pool(self) -> None:
+        with self._lock:
+            pool, self._http_pool = self._http_pool, None
+        if pool is not None:
+            try:
+                pool.close()
+            except Exception as e:
+                logger.warning(f"Closing HTTP pool failed: {e}")
+
+    def child(self, deadline_seconds: Optional[float] = None) -> "CancellationToken":
+        """Token cancelled with this one, with its own (tighter) deadline"""
+        return CancellationToken(deadline_seconds=deadline_seconds, parent=self)
+
+    @property
+    def cancelled(self) -> bool:
+        """True once ``cancel`` was called on this token or an ancestor"""
+        return self._cancelled
+
+    @property
+    def expired(self) -> bool:
+        """True once this token's or an ancestor's deadline has passed"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancelled or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the nearest deadline, or None without one"""
+        deadlines = [token.deadline for token in self._lineage() if token.deadline is not None]
+        return min(deadlines) - time.monotonic() if deadlines else None
+
+    def _lineage(self) -> Iterator["CancellationToken"]:
+        token: Optional[CancellationToken] = self
+        while token is not None:
+            yield token
+            token = token.parent
+
+    def bound_timeout(self, timeout: float) -> float:
+        """``timeout`` capped by the time left before the deadline"""
+        remaining = self.remaining()
+        return timeout if remaining is None else max(0.001, min(timeout, remaining))
+
+    def exception(self) -> JobCancelled:
+        if self.cancelled:
+            return JobCancelled(self.reason or "cancelled")
+        return DeadlineExceeded("deadline exceeded")
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise self.exception()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to ``seconds``, waking early on cancel; True if cancelled"""
+        self._event.wait(self.bound_timeout(seconds))
+        return self.is_cancelled
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "whisperforge_cancellation", default=None
+)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """The token of the running job step, if any"""
+    return _current_token.get()
+
+
+def check_cancelled() -> None:
+    """Raise ``JobCancelled`` if the running job was cancelled or timed out"""
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make ``token`` the current token for the block (and threads copying its context)"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+@contextmanager
+def abortable_client(client: Any, timeout: Optional[float] = None) -> Iterator[Any]:
+    """An SDK client whose in-flight requests are aborted when the current token is cancelled.
+
+    Outside a cancellation scope (or without httpx) the shared client is
+    returned unchanged. Inside one, the OpenAI/Anthropic client is copied
+    onto the job's HTTP connection pool (see ``CancellationToken.http_pool``),
+    which is closed on cancel.
+    """
+    token = current_token()
+    if token is None or not hasattr(client, "with_options"):
+        yield client
+        return
+    token.raise_if_cancelled()
+    try:
+        import httpx
+    except ImportError:
+        yield client
+        return
+
+    request_timeout = token.bound_timeout(timeout or 600.0)
+    http_client = token.http_pool(lambda: httpx.Client(timeout=600.0))
+    try:
+        yield client.with_options(http_client=http_client, timeout=request_timeout)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        if token.is_cancelled:
+            raise token.exception() from e
+        raise
@@ -0,0 +1,228 @@
+"""
+Pipeline Checkpoints for WhisperForge
+=====================================
+
+Persists each step's output keyed by job id and an input-content hash, so a
+job that fails part-way (or is reprocessed from the Content Library) resumes
+from the first step whose checkpoint is missing or invalidated instead of
+re-uploading and re-transcribing.
+
+A step's input hash covers only what that step reads (see
+``pipeline_engine.STEP_INPUTS``): its prompts, the knowledge base, the model,
+the relevant settings and the output hashes of the steps it consumes. The
+hashed components are stored alongside the outputs, so when a checkpoint is
+invalidated the engine can say which input changed.
+
+Checkpoints do not accumulate: the engine marks a job completed when it
+succeeds, and ``expire`` deletes jobs completed more than
+``CHECKPOINT_RETENTION_SECONDS`` ago (long enough to reprocess them cheaply)
+and unfinished jobs not started again within ``CHECKPOINT_STALE_SECONDS``.
+An expired job's uploaded audio (kept for resuming) is deleted with it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .config import get_config
+from .instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint_jobs (
+    job_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    components TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, step)
+);
+"""
+
+
+@instrumented()
+def content_hash(value: Any) -> str:
+    """Stable SHA-256 of a JSON-serialisable value"""
+    encoded = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@instrumented()
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in blocks (uploads can be 2GB)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    """A stored step result and the inputs it was computed from"""
+    step: str
+    input_hash: str
+    outputs: Dict[str, Any]
+    components: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = 0.0
+
+
+class CheckpointStore:
+    """SQLite store of per-step outputs, shared by the engine and queue workers"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or get_config().checkpoint_path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(checkpoints)")}
+            if "components" not in columns:  # stores created before per-step input tracking
+                conn.execute("ALTER TABLE checkpoints ADD COLUMN components TEXT")
+            job_columns = {row["name"] for row in conn.execute("PRAGMA table_info(checkpoint_jobs)")}
+            if "completed_at" not in job_columns:  # stores created before checkpoint retention
+                conn.execute("ALTER TABLE checkpoint_jobs ADD COLUMN completed_at REAL")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def save_job(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Remember the job definition so it can be resumed by id (and mark it unfinished)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_jobs (job_id, payload, updated_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(payload, default=str), time.time()),
+            )
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM checkpoint_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def save(self, job_id: str, step: str, input_hash: str, outputs: Dict[str, Any],
+             components: Optional[Dict[str, Any]] = None) -> None:
+        """Checkpoint the result keys a step wrote and the input components they came from"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, step, input_hash, outputs, components, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, step, input_hash, json.dumps(outputs, default=str),
+                 json.dumps(components or {}, default=str), time.time()),
+            )
+
+    def get(self, job_id: str, step: str) -> Optional[Checkpoint]:
+        """A step's checkpoint whatever its inputs, or None if there is none"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT input_hash, outputs, components, created_at FROM checkpoints WHERE job_id = ? AND step = ?",
+                (job_id, step),
+            ).fetchone()
+        if row is None:
+            return None
+        return Checkpoint(step=step, input_hash=row["input_hash"], outputs=json.loads(row["outputs"]),
+                          components=json.loads(row["components"] or "{}"), created_at=row["created_at"])
+
+    def load(self, job_id: str, step: str, input_hash: str) -> Optional[Dict[str, Any]]:
+        """A step's outputs, or None if missing or computed from different inputs"""
+        checkpoint = self.get(job_id, step)
+        if checkpoint is None:
+            return None
+        if checkpoint.input_hash != input_hash:
+            logger.info(f"Checkpoint for {job_id}/{step} invalidated by changed inputs")
+            return None
+        return checkpoint.outputs
+
+    def steps(self, job_id: str) -> Dict[str, float]:
+        """Checkpointed steps of a job and when they were saved"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT step, created_at FROM checkpoints WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["step"]: row["created_at"] for row in rows}
+
+    def clear(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM checkpoint_jobs WHERE job_id = ?", (job_id,))
+
+    def complete_job(self, job_id: str) -> None:
+        """Start the job's retention window"""
+        with self._connect() as conn:
+            conn.execute("UPDATE checkpoint_jobs SET completed_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def expire(self, retention_seconds: Optional[float] = None, stale_seconds: Optional[float] = None) -> int:
+        """Delete completed jobs past their retention and stale unfinished jobs; returns the jobs removed.
+
+        Uploaded audio the engine kept so a failed job could resume
+        (``cleanup_audio`` jobs) is deleted along with the job.
+        """
+        config = get_config()
+        retention_seconds = config.checkpoint_retention_seconds if retention_seconds is None else retention_seconds
+        stale_seconds = config.checkpoint_stale_seconds if stale_seconds is None else stale_seconds
+        now = time.time()
+        expired = (
+            "SELECT job_id FROM checkpoint_jobs WHERE completed_at < ? "
+            "OR (completed_at IS NULL AND updated_at < ?)"
+        )
+        bounds = (now - retention_seconds, now - stale_seconds)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                payloads = [json.loads(row["payload"]) for row in conn.execute(
+                    f"SELECT payload FROM checkpoint_jobs WHERE job_id IN ({expired})", bounds)]
+                conn.execute(f"DELETE FROM checkpoints WHERE job_id IN ({expired})", bounds)
+                removed = conn.execute(f"DELETE FROM checkpoint_jobs WHERE job_id IN ({expired})", bounds).rowcount
+                # Steps checkpointed without a job row (e.g. saved directly) age out on their own
+                conn.execute("DELETE FROM checkpoints WHERE created_at < ? AND job_id NOT IN "
+                             "(SELECT job_id FROM checkpoint_jobs)", (now - stale_seconds,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        for payload in payloads:
+            audio_path = payload.get("audio_path")
+            if payload.get("cleanup_audio") and audio_path:
+                try:
+                    os.unlink(audio_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not delete abandoned upload {audio_path}: {e}")
+        if removed:
+            logger.info(f"Expired checkpoints of {removed} jobs")
+        return removed
+
+
+# Global checkpoint store instance
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """The checkpoint store, or None when checkpoints are disabled"""
+    global _checkpoint_store
+    if not get_config().checkpoints_enabled:
+        return None
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
@@ -6,7 +6,7 @@ Centralized configuration for WhisperForge v2.0
 """
 
 import os
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from pathlib import Path
 import logging
@@ -45,11 +45,28 @@ class Config:
     temp_dir: Path = field(default_factory=lambda: Path.cwd() / "temp")
 
     # AI Providers
-    openai: AIProviderConfig = field(default_factory=lambda: AIProviderConfig("openai"))
+    openai: AIProviderConfig = field(
+        default_factory=lambda: AIProviderConfig(
+            "openai",
+            models={"default": "gpt-4o", "fast": "gpt-4o-mini"},
+            rate_limits={"requests_per_minute": 500},
+        )
+    )
     anthropic: AIProviderConfig = field(
-        default_factory=lambda: AIProviderConfig("anthropic")
+        default_factory=lambda: AIProviderConfig(
+            "anthropic",
+            models={"default": "claude-3-5-sonnet-20241022", "fast": "claude-3-5-haiku-20241022"},
+            rate_limits={"requests_per_minute": 50},
+        )
+    )
+    grok: AIProviderConfig = field(
+        default_factory=lambda: AIProviderConfig(
+            "grok",
+            base_url="https://api.x.ai/v1",
+            models={"default": "grok-beta"},
+            rate_limits={"requests_per_minute": 60},
+        )
     )
-    grok: AIProviderConfig = field(default_factory=lambda: AIProviderConfig("grok"))
 
     # Integrations
     notion: NotionConfig = field(default_factory=NotionConfig)
@@ -59,11 +76,108 @@ class Config:
     max_tokens: int = 4000
     stream_responses: bool = True
 
+    # Transcript digest shared by downstream steps; steps listed in
+    # full_transcript_steps read the full transcript instead
+    transcript_digest_enabled: bool = True
+    transcript_digest_max_tokens: int = 6000
+    full_transcript_steps: List[str] = field(default_factory=list)
+
+    # Schema-validated JSON for social posts and image prompts
+    structured_output: bool = True
+
+    # Output length: per-step max_tokens from input size, template and
+    # target length; truncated output is continued up to max_continuations
+    adaptive_max_tokens: bool = True
+    max_continuations: int = 2
+    article_template: Optional[str] = None
+    article_target_words: Optional[int] = None
+
+    # Generate social posts and image prompts in one fused call
+    fused_artifacts: bool = False
+
+    # Article generation: "single" call or "sections" written in parallel
+    article_mode: str = "single"
+
+    # Model tier per step, one of core.llm_router.MODEL_POLICIES
+    model_policy: str = "quality"
+
+    # Headless pipeline engine: concurrent jobs and "thread" or "process" pool
+    pipeline_workers: int = 4
+    pipeline_executor: str = "thread"
+    # Seconds before a job / a single step is cancelled (0 = no deadline)
+    job_deadline_seconds: float = 3600.0
+    step_deadline_seconds: float = 1200.0
+
+    # Durable SQLite job queue processed by worker processes
+    job_queue_enabled: bool = False
+    job_queue_path: str = "data/jobs.db"
+    job_visibility_timeout: float = 300.0
+    job_max_attempts: int = 3
+
+    # Fair-share scheduling of transcription/LLM slots and quota admission
+    scheduler_transcription_slots: int = 8
+    scheduler_llm_slots: int = 16
+    scheduler_user_concurrency: int = 4
+    tier_weights: Dict[str, float] = field(
+        default_factory=lambda: {"free": 1.0, "pro": 3.0, "enterprise": 6.0}
+    )
+    quota_enforced: bool = True
+
+    # Span tracing of jobs, steps, chunks and external calls
+    tracing_enabled: bool = True
+    trace_path: str = "logs/traces.jsonl"
+    trace_otel: bool = False
+
+    # Opt-in per-job profiling (stack samples or cProfile, plus tracemalloc per step)
+    profile_jobs: bool = False
+    profile_dir: str = "logs/profiles"
+    profile_mode: str = "sample"
+    profile_interval_ms: float = 5.0
+
+    # Hot-path call statistics for functions in these modules ("*" for all), see core.instrumentation
+    instrument_modules: List[str] = field(default_factory=list)
+    instrument_flush_seconds: float = 10.0
+
+    # Prometheus /metrics endpoint (0 disables it; queue workers use the following ports)
+    metrics_port: int = 0
+    metrics_addr: str = "0.0.0.0"
+
+    # Rolling-window SLOs (docs/monitoring.md) and alerting on violations
+    slo_error_rate_percent: float = 1.0
+    slo_median_response_seconds: float = 30.0
+    slo_pipeline_success_percent: float = 95.0
+    slo_step_p95_seconds: Dict[str, float] = field(
+        default_factory=lambda: {"transcription": 900.0, "wisdom_extraction": 120.0, "outline_creation": 120.0,
+                                 "article_creation": 300.0, "social_content": 120.0}
+    )
+    slo_alert_cooldown_seconds: float = 900.0
+    slo_alert_webhook: Optional[str] = None
+
+    # Per-step checkpoints so failed or reprocessed jobs resume
+    checkpoints_enabled: bool = True
+    checkpoint_path: str = "data/checkpoints.db"
+    # Kept this long after a job completes (for reprocessing), and for
+    # unfinished jobs this long after they last started
+    checkpoint_retention_seconds: float = 7 * 86400
+    checkpoint_stale_seconds: float = 30 * 86400
+
+    # Editorial review budget (per job)
+    editor_max_rounds: int = 1
+    editor_budget_seconds: float = 90.0
+    editor_budget_tokens: int = 24000
+
     # Environment & UI settings
     environment: str = "development"
     debug_mode: bool = False
     log_level: str = "INFO"
 
+    # Log files in log_dir, written in batches off the calling thread and rotated by size and age
+    log_dir: str = "logs"
+    log_max_bytes: int = 50 * 1024 * 1024
+    log_rotate_seconds: int = 86400
+    log_backup_count: int = 14
+    log_queue_size: int = 10000
+
     @property
     def is_development(self) -> bool:
         """Check if running in development mode"""
@@ -86,12 +200,105 @@ class Config:
         config.notion.api_key = os.getenv("NOTION_API_KEY")
         config.notion.database_id = os.getenv("NOTION_DATABASE_ID")
 
+        # Per-provider request limits, e.g. OPENAI_REQUESTS_PER_MINUTE=200
+        for provider in (config.openai, config.anthropic, config.grok):
+            rpm = os.getenv(f"{provider.name.upper()}_REQUESTS_PER_MINUTE")
+            if rpm:
+                provider.rate_limits["requests_per_minute"] = int(rpm)
+
+        config.model_policy = os.getenv("MODEL_POLICY", config.model_policy)
+        config.article_mode = os.getenv("ARTICLE_MODE", config.article_mode)
+        config.structured_output = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
+        config.fused_artifacts = os.getenv("FUSED_ARTIFACTS", "false").lower() == "true"
+        config.adaptive_max_tokens = os.getenv("ADAPTIVE_MAX_TOKENS", "true").lower() == "true"
+        config.max_continuations = int(os.getenv("MAX_CONTINUATIONS", config.max_continuations))
+        config.article_template = os.getenv("ARTICLE_TEMPLATE") or None
+        target_words = os.getenv("ARTICLE_TARGET_WORDS")
+        config.article_target_words = int(target_words) if target_words else None
+        config.transcript_digest_enabled = os.getenv("TRANSCRIPT_DIGEST", "true").lower() == "true"
+        config.transcript_digest_max_tokens = int(
+            os.getenv("TRANSCRIPT_DIGEST_MAX_TOKENS", config.transcript_digest_max_tokens)
+        )
+        full_steps = os.getenv("FULL_TRANSCRIPT_STEPS")
+        if full_steps:
+            config.full_transcript_steps = [s.strip() for s in full_steps.split(",") if s.strip()]
+        config.pipeline_workers = int(os.getenv("PIPELINE_WORKERS", config.pipeline_workers))
+        config.pipeline_executor = os.getenv("PIPELINE_EXECUTOR", config.pipeline_executor)
+        config.job_deadline_seconds = float(os.getenv("JOB_DEADLINE_SECONDS", config.job_deadline_seconds))
+        config.step_deadline_seconds = float(os.getenv("STEP_DEADLINE_SECONDS", config.step_deadline_seconds))
+        config.job_queue_enabled = os.getenv("JOB_QUEUE", "false").lower() == "true"
+        config.job_queue_path = os.getenv("JOB_QUEUE_PATH", config.job_queue_path)
+        config.job_visibility_timeout = float(os.getenv("JOB_VISIBILITY_TIMEOUT", config.job_visibility_timeout))
+        config.job_max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", config.job_max_attempts))
+        config.scheduler_transcription_slots = int(
+            os.getenv("SCHEDULER_TRANSCRIPTION_SLOTS", config.scheduler_transcription_slots)
+        )
+        config.scheduler_llm_slots = int(os.getenv("SCHEDULER_LLM_SLOTS", config.scheduler_llm_slots))
+        config.scheduler_user_concurrency = int(
+            os.getenv("SCHEDULER_USER_CONCURRENCY", config.scheduler_user_concurrency)
+        )
+        tier_weights = os.getenv("TIER_WEIGHTS")
+        if tier_weights:
+            # e.g. "free:1,pro:3,enterprise:6"
+            for entry in tier_weights.split(","):
+                tier, _, weight = entry.partition(":")
+                if tier.strip() and weight.strip():
+                    config.tier_weights[tier.strip()] = float(weight)
+        config.quota_enforced = os.getenv("QUOTA_ENFORCED", "true").lower() == "true"
+        config.tracing_enabled = os.getenv("TRACING", "true").lower() == "true"
+        config.trace_path = os.getenv("TRACE_PATH", config.trace_path)
+        config.trace_otel = os.getenv("TRACE_OTEL", "false").lower() == "true"
+        config.profile_jobs = os.getenv("PROFILE_JOBS", "false").lower() == "true"
+        config.profile_dir = os.getenv("PROFILE_DIR", config.profile_dir)
+        config.profile_mode = os.getenv("PROFILE_MODE", config.profile_mode)
+        config.profile_interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", config.profile_interval_ms))
+        instrument_modules = os.getenv("INSTRUMENT_MODULES")
+        if instrument_modules:
+            config.instrument_modules = [m.strip() for m in instrument_modules.split(",") if m.strip()]
+        config.instrument_flush_seconds = float(
+            os.getenv("INSTRUMENT_FLUSH_SECONDS", config.instrument_flush_seconds)
+        )
+        config.metrics_port = int(os.getenv("METRICS_PORT", config.metrics_port))
+        config.metrics_addr = os.getenv("METRICS_ADDR", config.metrics_addr)
+        config.slo_error_rate_percent = float(os.getenv("SLO_ERROR_RATE_PERCENT", config.slo_error_rate_percent))
+        config.slo_median_response_seconds = float(
+            os.getenv("SLO_MEDIAN_RESPONSE_SECONDS", config.slo_median_response_seconds)
+        )
+        config.slo_pipeline_success_percent = float(
+            os.getenv("SLO_PIPELINE_SUCCESS_PERCENT", config.slo_pipeline_success_percent)
+        )
+        step_slos = os.getenv("SLO_STEP_P95_SECONDS")
+        if step_slos:
+            # e.g. "transcription:900,article_creation:300"
+            for entry in step_slos.split(","):
+                step, _, seconds = entry.partition(":")
+                if step.strip() and seconds.strip():
+                    config.slo_step_p95_seconds[step.strip()] = float(seconds)
+        config.slo_alert_cooldown_seconds = float(
+            os.getenv("SLO_ALERT_COOLDOWN_SECONDS", config.slo_alert_cooldown_seconds)
+        )
+        config.slo_alert_webhook = os.getenv("SLO_ALERT_WEBHOOK") or None
+        config.checkpoints_enabled = os.getenv("CHECKPOINTS", "true").lower() == "true"
+        config.checkpoint_path = os.getenv("CHECKPOINT_PATH", config.checkpoint_path)
+        config.checkpoint_retention_seconds = float(
+            os.getenv("CHECKPOINT_RETENTION_SECONDS", config.checkpoint_retention_seconds)
+        )
+        config.checkpoint_stale_seconds = float(os.getenv("CHECKPOINT_STALE_SECONDS", config.checkpoint_stale_seconds))
+        config.editor_max_rounds = int(os.getenv("EDITOR_MAX_ROUNDS", config.editor_max_rounds))
+        config.editor_budget_seconds = float(os.getenv("EDITOR_BUDGET_SECONDS", config.editor_budget_seconds))
+        config.editor_budget_tokens = int(os.getenv("EDITOR_BUDGET_TOKENS", config.editor_budget_tokens))
+
         # Load other settings
         config.environment = os.getenv("ENVIRONMENT", "development")
         config.debug_mode = os.getenv("DEBUG", "false").lower() == "true"
         # Default log level varies by environment if not explicitly set
         default_level = "DEBUG" if config.environment == "development" else "INFO"
         config.log_level = os.getenv("LOG_LEVEL", default_level)
+        config.log_dir = os.getenv("LOG_DIR", config.log_dir)
+        config.log_max_bytes = int(os.getenv("LOG_MAX_BYTES", config.log_max_bytes))
+        config.log_rotate_seconds = int(os.getenv("LOG_ROTATE_SECONDS", config.log_rotate_seconds))
+        config.log_backup_count = int(os.getenv("LOG_BACKUP_COUNT", config.log_backup_count))
+        config.log_queue_size = int(os.getenv("LOG_QUEUE_SIZE", config.log_queue_size))
 
         return config
 
@@ -5,147 +5,433 @@ Handles AI-powered content creation including transcription, wisdom extraction,
 
 import logging
 import os
-from typing import Dict, Optional
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .utils import get_openai_client, get_prompt, DEFAULT_PROMPTS, get_enhanced_prompt
+from .cancellation import JobCancelled, abortable_client
+from .config import get_config
+from .cost_accounting import record_transcription
+from .llm_router import LLMRouterError, get_llm_router
+from .output_budget import (
+    END_MARKER, END_MARKER_INSTRUCTIONS, TRUNCATED_FINISH_REASONS, load_template, max_tokens_for,
+)
+from .prompt_layout import PromptLayout
+from .structured_output import (
+    COMBINED_ARTIFACTS_SCHEMA, IMAGE_PROMPTS_SCHEMA, SOCIAL_POSTS_SCHEMA, ImagePrompts,
+    SocialContent, StructuredOutputError, schema_instructions, split_combined_artifacts,
+)
+from .tracing import span
+from .utils import get_openai_client, get_prompt, DEFAULT_PROMPTS, get_enhanced_prompt, load_prompt_from_file
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def generate_wisdom(transcript: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None) -> str:
+EDITOR_VERDICT_INSTRUCTIONS = """
+
+Start your response with a single line reading either "VERDICT: APPROVE" if the
+content needs no material changes, or "VERDICT: REVISE" followed by your feedback."""
+
+WISDOM_MERGE_INSTRUCTIONS = """The transcript was analyzed in consecutive sections. Merge the
+section notes below into a single result that follows the instructions, removing
+duplicates and keeping the strongest insights from across the whole recording.
+
+INSTRUCTIONS:
+{instructions}"""
+
+ARTICLE_SECTION_INSTRUCTIONS = """
+
+You are writing section {position} of {total} of this article, in parallel with
+the other sections. Write only the section titled "{title}", starting with its
+subheading. {position_note}Do not summarize other sections or add a conclusion
+unless this is the final section."""
+
+ARTICLE_TRANSITION_INSTRUCTIONS = """The article below was written section by section. For each numbered
+boundary, write one short sentence that bridges the end of the previous section
+to the start of the next. Reply with exactly one line per boundary in the form
+"N: sentence" and nothing else."""
+
+# Generation, transcription and storage steps report some failures as text
+FAILED_OUTPUT_PREFIXES = (
+    "Error", "Transcription failed", "Database save failed", "Database connection failed", "Failed to save",
+)
+
+COMBINED_ARTIFACTS_INSTRUCTIONS = """Produce two artifacts from the same content in a single response.
+
+SOCIAL POSTS ("posts"):
+{social}
+
+IMAGE PROMPTS ("prompts"):
+{images}"""
+
+def is_failed_output(value: Any) -> bool:
+    """True for failure text returned in place of output; never checkpoint or build on it"""
+    return isinstance(value, str) and value.startswith(FAILED_OUTPUT_PREFIXES)
+
+def _complete(step: str, layout: PromptLayout, max_tokens: int,
+              ai_provider: Optional[str] = None, ai_model: Optional[str] = None,
+              json_schema: Optional[Dict[str, Any]] = None) -> str:
+    """Route a chat completion for a pipeline step through the provider router.
+
+    Free-text output ends at ``END_MARKER`` (a stop sequence), and output cut
+    off at ``max_tokens`` is continued instead of regenerated.
+    """
+    router = get_llm_router()
+    if json_schema:
+        return router.complete(
+            step, layout=layout, max_tokens=max_tokens,
+            provider=ai_provider, model=ai_model, json_schema=json_schema
+        ).text
+
+    layout = replace(layout, task=layout.task + END_MARKER_INSTRUCTIONS)
+    response = router.complete(
+        step, layout=layout, max_tokens=max_tokens,
+        provider=ai_provider, model=ai_model, stop=[END_MARKER]
+    )
+    text = response.text or ""
+    for _ in range(get_config().max_continuations):
+        if response.finish_reason not in TRUNCATED_FINISH_REASONS:
+            break
+        logger.info(f"{step} output hit max_tokens={max_tokens}; continuing")
+        response = router.complete(
+            step, layout=layout.continued(text), max_tokens=max_tokens,
+            provider=ai_provider, model=ai_model, stop=[END_MARKER]
+        )
+        text += response.text or ""
+    return text.replace(END_MARKER, "").rstrip()
+
+def generate_with_structure(structured_fn: Callable, fallback_fn: Callable, *args, **kwargs) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Run a structured generator, falling back to free text when its output is invalid.
+
+    Returns the text to display and store, plus the typed result as a dict
+    (``None`` when the free-text fallback was used).
+    """
+    if get_config().structured_output:
+        try:
+            result = structured_fn(*args, **kwargs)
+            return result.to_markdown(), result.to_dict()
+        except StructuredOutputError as e:
+            logger.warning(f"Structured output failed for {structured_fn.__name__}, using free text: {e}")
+    return fallback_fn(*args, **kwargs), None
+
+def generate_wisdom(transcript: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                    ai_provider: str = None, ai_model: str = None) -> str:
     """Extract key insights and wisdom from a transcript"""
     try:
-        # Use enhanced prompt system with automatic KB concatenation
-        system_prompt = custom_prompt or get_enhanced_prompt("wisdom_extraction", knowledge_base)
-        
-        openai_client = get_openai_client()
-        if not openai_client:
-            return "Error: OpenAI API key is not configured."
-            
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Here's the transcription to analyze:\n\n{transcript}"}
-            ],
-            max_tokens=1500
-        )
-        
-        return response.choices[0].message.content
-        
+        # KB and transcript form the shared, cacheable prefix; instructions go last
+        instructions = custom_prompt or load_prompt_from_file("wisdom_extraction")
+        layout = PromptLayout.for_step(instructions, knowledge_base=knowledge_base, transcript=transcript)
+
+        return _complete(
+            "wisdom_extraction", layout,
+            max_tokens=max_tokens_for("wisdom_extraction", transcript),
+            ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         logger.exception("Error in wisdom generation:")
         return f"Error generating wisdom: {str(e)}"
 
-def generate_outline(transcript: str, wisdom: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None) -> str:
+def merge_wisdom(section_wisdom: List[str], custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                 ai_provider: str = None, ai_model: str = None) -> str:
+    """Reduce per-section wisdom from an incrementally transcribed recording into one result"""
+    try:
+        instructions = WISDOM_MERGE_INSTRUCTIONS.format(
+            instructions=custom_prompt or load_prompt_from_file("wisdom_extraction")
+        )
+        sections = "\n\n".join(
+            f"SECTION {i} NOTES:\n{wisdom}" for i, wisdom in enumerate(section_wisdom, 1)
+        )
+        layout = PromptLayout.for_step(instructions, sections, knowledge_base=knowledge_base)
+
+        return _complete(
+            "wisdom_extraction", layout,
+            max_tokens=max_tokens_for("wisdom_extraction", sections),
+            ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        logger.exception("Error in wisdom merge:")
+        return f"Error merging wisdom: {str(e)}"
+
+def generate_outline(transcript: str, wisdom: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                     ai_provider: str = None, ai_model: str = None) -> str:
     """Create a structured outline based on transcript and wisdom"""
     try:
-        # Use enhanced prompt system with automatic KB concatenation
-        system_prompt = custom_prompt or get_enhanced_prompt("outline_creation", knowledge_base)
-        
-        content = f"TRANSCRIPT:\n{transcript}\n\nWISDOM:\n{wisdom}"
-        
-        openai_client = get_openai_client()
-        if not openai_client:
-            return "Error: OpenAI API key is not configured."
-            
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content}
-            ],
-            max_tokens=1500
-        )
-        
-        return response.choices[0].message.content
-        
+        # KB and transcript form the shared, cacheable prefix; instructions go last
+        instructions = custom_prompt or load_prompt_from_file("outline_creation")
+        layout = PromptLayout.for_step(
+            instructions, f"WISDOM:\n{wisdom}",
+            knowledge_base=knowledge_base, transcript=transcript
+        )
+
+        return _complete(
+            "outline_creation", layout,
+            max_tokens=max_tokens_for("outline_creation", transcript),
+            ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         logger.exception("Error in outline generation:")
         return f"Error generating outline: {str(e)}"
 
-def generate_article(transcript: str, wisdom: str, outline: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None) -> str:
-    """Generate a comprehensive article based on transcript, wisdom, and outline"""
+def generate_article(transcript: str, wisdom: str, outline: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                     ai_provider: str = None, ai_model: str = None, template: str = None,
+                     target_words: int = None) -> str:
+    """Generate a comprehensive article based on transcript, wisdom, and outline.
+
+    ``template`` (a file under ``templates/`` or its text) and ``target_words``
+    default to ``ARTICLE_TEMPLATE``/``ARTICLE_TARGET_WORDS`` and shape both the
+    instructions and the output budget.
+    """
     try:
-        # Use enhanced prompt system with automatic KB concatenation
-        system_prompt = custom_prompt or get_enhanced_prompt("article_writing", knowledge_base)
-        
-        # Limit transcript length to avoid token limits
-        transcript_excerpt = transcript[:2000] if len(transcript) > 2000 else transcript
-        content = f"TRANSCRIPT:\n{transcript_excerpt}\n\nWISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}"
-        
-        openai_client = get_openai_client()
-        if not openai_client:
-            return "Error: OpenAI API key is not configured."
-            
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content}
-            ],
-            max_tokens=2000
-        )
-        
-        return response.choices[0].message.content
-        
+        config = get_config()
+        template_text = load_template(template or config.article_template)
+        target_words = target_words or config.article_target_words
+
+        # The full transcript is part of the shared prefix, so after the wisdom
+        # step it is served from the provider's prompt cache instead of re-read
+        instructions = custom_prompt or load_prompt_from_file("article_writing")
+        if template_text:
+            instructions += f"\n\nFollow this template structure:\n{template_text}"
+        if target_words:
+            instructions += f"\n\nTarget length: about {target_words} words."
+        layout = PromptLayout.for_step(
+            instructions, f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}",
+            knowledge_base=knowledge_base, transcript=transcript
+        )
+
+        return _complete(
+            "article_writing", layout,
+            max_tokens=max_tokens_for("article_writing", transcript, template_text, target_words),
+            ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         logger.exception("Error in article generation:")
         return f"Error generating article: {str(e)}"
 
-def generate_social_content(wisdom: str, outline: str, article: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None) -> str:
+def generate_article_section(transcript: str, wisdom: str, outline: str, section_title: str, section_points: str,
+                             position: int, total: int, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                             ai_provider: str = None, ai_model: str = None) -> str:
+    """Write one outline section of the article; sections share the cached prefix.
+
+    The section's output budget is its share of the whole article's budget
+    (see ``max_tokens_for``), and so is its share of ``ARTICLE_TARGET_WORDS``.
+    """
+    try:
+        config = get_config()
+        template_text = load_template(config.article_template)
+        target_words = config.article_target_words
+        instructions = (custom_prompt or load_prompt_from_file("article_writing")) + ARTICLE_SECTION_INSTRUCTIONS.format(
+            position=position, total=total, title=section_title,
+            position_note="As the first section, open with the article headline and introduction. " if position == 1 else ""
+        )
+        if target_words:
+            instructions += f"\n\nTarget length for this section: about {max(target_words // total, 50)} words."
+        layout = PromptLayout.for_step(
+            instructions,
+            f"WISDOM:\n{wisdom}\n\nFULL OUTLINE:\n{outline}\n\nSECTION TO WRITE:\n{section_title}\n{section_points}",
+            knowledge_base=knowledge_base, transcript=transcript
+        )
+
+        return _complete(
+            "article_writing", layout,
+            max_tokens=max_tokens_for("article_writing", transcript, template_text, target_words, parts=total),
+            ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        logger.exception("Error in article section generation:")
+        return f"Error generating article section: {str(e)}"
+
+def generate_section_transitions(boundaries: List[str], knowledge_base: Dict[str, str] = None,
+                                 ai_provider: str = None, ai_model: str = None) -> str:
+    """Write one bridging sentence per section boundary (one ``N: sentence`` line each)"""
+    try:
+        content = "\n\n".join(boundaries)
+        layout = PromptLayout.for_step(ARTICLE_TRANSITION_INSTRUCTIONS, content, knowledge_base=knowledge_base)
+
+        return _complete(
+            "article_transitions", layout,
+            max_tokens=max_tokens_for("article_transitions", content), ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        logger.exception("Error in section transition generation:")
+        return f"Error generating transitions: {str(e)}"
+
+def generate_social_content(wisdom: str, outline: str, article: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                            ai_provider: str = None, ai_model: str = None) -> str:
     """Generate 5 distinct social media posts"""
     try:
-        # Use enhanced prompt system with automatic KB concatenation
-        system_prompt = custom_prompt or get_enhanced_prompt("social_media", knowledge_base)
-        
+        instructions = custom_prompt or load_prompt_from_file("social_media")
+
         # Include article in content for richer context
         article_excerpt = article[:1500] if len(article) > 1500 else article
         content = f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}\n\nARTICLE:\n{article_excerpt}"
-        
-        openai_client = get_openai_client()
-        if not openai_client:
-            return "Error: OpenAI API key is not configured."
-            
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content}
-            ],
-            max_tokens=1500
-        )
-        
-        return response.choices[0].message.content
-        
+        layout = PromptLayout.for_step(instructions, content, knowledge_base=knowledge_base)
+
+        return _complete(
+            "social_media", layout,
+            max_tokens=max_tokens_for("social_media"), ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         logger.exception("Error in social content generation:")
         return f"Error generating social content: {str(e)}"
 
-def transcribe_audio(audio_file) -> str:
+def generate_social_posts(wisdom: str, outline: str, article: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                          ai_provider: str = None, ai_model: str = None) -> SocialContent:
+    """Generate social posts as validated, typed JSON (raises StructuredOutputError)"""
+    instructions = (custom_prompt or load_prompt_from_file("social_media")) + schema_instructions(SOCIAL_POSTS_SCHEMA)
+    article_excerpt = article[:1500] if len(article) > 1500 else article
+    content = f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}\n\nARTICLE:\n{article_excerpt}"
+    layout = PromptLayout.for_step(instructions, content, knowledge_base=knowledge_base)
+
+    try:
+        text = _complete(
+            "social_media", layout, max_tokens=max_tokens_for("social_media"),
+            ai_provider=ai_provider, ai_model=ai_model,
+            json_schema={"name": "social_posts", "schema": SOCIAL_POSTS_SCHEMA}
+        )
+    except LLMRouterError as e:
+        raise StructuredOutputError(str(e)) from e
+    return SocialContent.from_json(text)
+
+def generate_image_prompt_set(wisdom: str, outline: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                              ai_provider: str = None, ai_model: str = None) -> ImagePrompts:
+    """Generate image prompts as validated, typed JSON (raises StructuredOutputError)"""
+    instructions = (custom_prompt or load_prompt_from_file("image_prompts")) + schema_instructions(IMAGE_PROMPTS_SCHEMA)
+    layout = PromptLayout.for_step(instructions, f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}", knowledge_base=knowledge_base)
+
+    try:
+        text = _complete(
+            "image_prompts", layout, max_tokens=max_tokens_for("image_prompts"),
+            ai_provider=ai_provider, ai_model=ai_model,
+            json_schema={"name": "image_prompts", "schema": IMAGE_PROMPTS_SCHEMA}
+        )
+    except LLMRouterError as e:
+        raise StructuredOutputError(str(e)) from e
+    return ImagePrompts.from_json(text)
+
+def generate_social_and_images(wisdom: str, outline: str, article: str, social_prompt: str = None,
+                               image_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                               ai_provider: str = None, ai_model: str = None) -> Tuple[SocialContent, ImagePrompts]:
+    """Generate social posts and image prompts in one structured completion (raises StructuredOutputError)"""
+    instructions = COMBINED_ARTIFACTS_INSTRUCTIONS.format(
+        social=social_prompt or load_prompt_from_file("social_media"),
+        images=image_prompt or load_prompt_from_file("image_prompts"),
+    ) + schema_instructions(COMBINED_ARTIFACTS_SCHEMA)
+    article_excerpt = article[:1500] if len(article) > 1500 else article
+    content = f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}\n\nARTICLE:\n{article_excerpt}"
+    layout = PromptLayout.for_step(instructions, content, knowledge_base=knowledge_base)
+
+    try:
+        text = _complete(
+            "social_and_images", layout, max_tokens=max_tokens_for("social_and_images"),
+            ai_provider=ai_provider, ai_model=ai_model,
+            json_schema={"name": "social_and_images", "schema": COMBINED_ARTIFACTS_SCHEMA}
+        )
+    except LLMRouterError as e:
+        raise StructuredOutputError(str(e)) from e
+    return split_combined_artifacts(text)
+
+def generate_image_prompts(wisdom: str, outline: str, custom_prompt: str = None, knowledge_base: Dict[str, str] = None,
+                           ai_provider: str = None, ai_model: str = None) -> str:
+    """Generate image generation prompts that visualize the key concepts"""
+    try:
+        instructions = custom_prompt or load_prompt_from_file("image_prompts")
+
+        content = f"WISDOM:\n{wisdom}\n\nOUTLINE:\n{outline}"
+        layout = PromptLayout.for_step(instructions, content, knowledge_base=knowledge_base)
+
+        return _complete(
+            "image_prompts", layout,
+            max_tokens=max_tokens_for("image_prompts"), ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        logger.exception("Error in image prompt generation:")
+        return f"Error generating image prompts: {str(e)}"
+
+def editor_critique(content: str, content_type: str, ai_provider: str = None, ai_model: str = None,
+                    knowledge_base: Dict[str, str] = None) -> str:
+    """Ask the editor persona for constructive feedback on generated content"""
+    try:
+        instructions = load_prompt_from_file("editor_persona") + EDITOR_VERDICT_INSTRUCTIONS
+
+        user_content = f"CONTENT TYPE: {content_type.replace('_', ' ')}\n\nCONTENT TO REVIEW:\n{content}"
+        layout = PromptLayout.for_step(instructions, user_content, knowledge_base=knowledge_base)
+
+        return _complete(
+            "editor_critique", layout,
+            max_tokens=max_tokens_for("editor_critique"), ai_provider=ai_provider, ai_model=ai_model
+        )
+
+    except LLMRouterError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        logger.exception("Error in editor critique:")
+        return f"Error generating critique: {str(e)}"
+
+def transcribe_audio(audio_file, step: str = "transcription") -> str:
     """Transcribe audio using OpenAI Whisper - handles both file paths and file objects"""
     try:
         openai_client = get_openai_client()
         if not openai_client:
             return "Error: OpenAI client not available."
-        
-        # Handle both file paths (strings) and file objects
-        if isinstance(audio_file, str):
-            # It's a file path, open it
-            with open(audio_file, 'rb') as f:
+
+        # verbose_json reports the audio duration used for cost accounting
+        start = time.perf_counter()
+
+        # Aborted if the job is cancelled while the upload is in flight
+        with span("whisper.transcribe", kind="http", model="whisper-1", step=step), \
+                abortable_client(openai_client) as openai_client:
+            # Handle both file paths (strings) and file objects
+            if isinstance(audio_file, str):
+                # It's a file path, open it
+                with open(audio_file, 'rb') as f:
+                    response = openai_client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=f,
+                        response_format="verbose_json"
+                    )
+            else:
+                # It's a file object, reset pointer and use directly
+                audio_file.seek(0)
                 response = openai_client.audio.transcriptions.create(
                     model="whisper-1",
-                    file=f
+                    file=audio_file,
+                    response_format="verbose_json"
                 )
-        else:
-            # It's a file object, reset pointer and use directly
-            audio_file.seek(0)
-            response = openai_client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-        
+
+        duration = getattr(response, "duration", None)
+        record_transcription(
+            audio_seconds=float(duration) if isinstance(duration, (int, float)) else 0.0,
+            latency=time.perf_counter() - start,
+            step=step,
+        )
+
         return response.text
-        
+
+    except JobCancelled:
+        raise
     except Exception as e:
-        return f"Transcription failed: {str(e)}" 
\ No newline at end of file
+        return f"Transcription failed: {str(e)}"
@@ -0,0 +1,237 @@
+"""
+Token and Cost Accounting for WhisperForge
+==========================================
+
+Records prompt, completion, cache-read and cache-write tokens, audio
+seconds, latency and an estimated cost for every LLM and Whisper call,
+attributed to the pipeline step and job that made it.
+
+A ``JobUsage`` is bound to the current context with ``usage_scope``; the LLM
+router and ``transcribe_audio`` report into whichever job is active. Worker
+threads do not inherit context variables, so code that fans out to a thread
+pool should submit ``contextvars.copy_context().run``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICING: Dict[str, tuple] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "claude-3-5-sonnet": (3.00, 0.30, 15.00),
+    "claude-3-5-haiku": (0.80, 0.08, 4.00),
+    "grok-beta": (5.00, 5.00, 15.00),
+}
+
+# Anthropic bills prompt-cache writes (5-minute TTL) at 1.25x the input price
+CACHE_WRITE_MULTIPLIER = 1.25
+
+# USD per audio minute
+WHISPER_PRICE_PER_MINUTE = 0.006
+
+
+def _pricing_for(model: str) -> Optional[tuple]:
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    # Match dated snapshots such as "claude-3-5-sonnet-20241022" (longest prefix wins)
+    for name in sorted(MODEL_PRICING, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICING[name]
+    return None
+
+
+def estimate_llm_cost(model: str, prompt_tokens: int, completion_tokens: int,
+                      cached_tokens: int = 0, cache_write_tokens: int = 0) -> float:
+    """Estimated USD cost of a chat completion (0.0 for unknown models).
+
+    ``prompt_tokens`` includes ``cached_tokens`` (cache reads) and
+    ``cache_write_tokens`` (input written to the cache), which are priced
+    at the cached and cache-write rates.
+    """
+    pricing = _pricing_for(model or "")
+    if pricing is None:
+        return 0.0
+    input_price, cached_price, output_price = pricing
+    uncached = max(0, prompt_tokens - cached_tokens - cache_write_tokens)
+    return (uncached * input_price + cached_tokens * cached_price
+            + cache_write_tokens * input_price * CACHE_WRITE_MULTIPLIER
+            + completion_tokens * output_price) / 1_000_000
+
+
+def estimate_transcription_cost(audio_seconds: float) -> float:
+    """Estimated USD cost of a Whisper transcription"""
+    return (audio_seconds / 60.0) * WHISPER_PRICE_PER_MINUTE
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for budget accounting"""
+    return max(1, len(text or "") // 4)
+
+
+def cache_write_tokens_from_usage(usage: Any) -> int:
+    """Prompt tokens written to the provider cache (Anthropic ``cache_creation_input_tokens``)"""
+    return int(getattr(usage, "cache_creation_input_tokens", 0) or 0) if usage is not None else 0
+
+
+def usage_token_counts(usage: Any, cached_tokens: int = 0) -> tuple:
+    """Normalise an SDK usage object into (prompt, completion) token counts"""
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        # Anthropic reports uncached, cache-read and cache-write input separately
+        prompt = (getattr(usage, "input_tokens", 0) or 0) + cached_tokens + cache_write_tokens_from_usage(usage)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", 0) or 0
+    return int(prompt or 0), int(completion or 0)
+
+
+@dataclass
+class UsageRecord:
+    """Usage of a single external AI call"""
+
+    step: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    audio_seconds: float = 0.0
+    latency: float = 0.0
+    cost_usd: float = 0.0
+
+
+class JobUsage:
+    """Thread-safe collection of usage records for one pipeline job"""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def by_step(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate records per step"""
+        with self._lock:
+            records = list(self.records)
+        steps: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            step = steps.setdefault(record.step, {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cached_tokens": 0, "cache_write_tokens": 0, "audio_seconds": 0.0, "latency": 0.0,
+                "cost_usd": 0.0, "models": [],
+            })
+            step["calls"] += 1
+            step["prompt_tokens"] += record.prompt_tokens
+            step["completion_tokens"] += record.completion_tokens
+            step["cached_tokens"] += record.cached_tokens
+            step["cache_write_tokens"] += record.cache_write_tokens
+            step["audio_seconds"] += record.audio_seconds
+            step["latency"] += record.latency
+            step["cost_usd"] += record.cost_usd
+            model = f"{record.provider}/{record.model}"
+            if model not in step["models"]:
+                step["models"].append(model)
+        for step in steps.values():
+            step["latency"] = round(step["latency"], 3)
+            step["cost_usd"] = round(step["cost_usd"], 6)
+        return steps
+
+    def totals(self) -> Dict[str, Any]:
+        """Job-wide totals across all steps"""
+        totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                  "cached_tokens": 0, "cache_write_tokens": 0, "audio_seconds": 0.0, "latency": 0.0,
+                  "cost_usd": 0.0}
+        for step in self.by_step().values():
+            for key in totals:
+                totals[key] += step[key]
+        totals["latency"] = round(totals["latency"], 3)
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return totals
+
+    def primary_model(self) -> tuple:
+        """(provider, model) that served the most LLM calls, or (None, None)"""
+        with self._lock:
+            records = [r for r in self.records if not r.audio_seconds]
+        counts: Dict[tuple, int] = {}
+        for record in records:
+            key = (record.provider, record.model)
+            counts[key] = counts.get(key, 0) + 1
+        if not counts:
+            return None, None
+        return max(counts, key=counts.get)
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serialisable summary suitable for ``pipeline_logs.metadata``"""
+        return {"job_id": self.job_id, "totals": self.totals(), "steps": self.by_step()}
+
+
+_current_usage: contextvars.ContextVar[Optional[JobUsage]] = contextvars.ContextVar(
+    "whisperforge_job_usage", default=None
+)
+
+
+@contextmanager
+def usage_scope(job_usage: JobUsage) -> Iterator[JobUsage]:
+    """Attribute all AI calls made inside the block to ``job_usage``"""
+    token = _current_usage.set(job_usage)
+    try:
+        yield job_usage
+    finally:
+        _current_usage.reset(token)
+
+
+def get_current_usage() -> Optional[JobUsage]:
+    """The job usage bound to the current context, if any"""
+    return _current_usage.get()
+
+
+def record_usage(record: UsageRecord) -> UsageRecord:
+    """Attach a record to the current job and export it to metrics and logs"""
+    job_usage = _current_usage.get()
+    if job_usage is not None:
+        job_usage.add(record)
+
+    try:
+        from .metrics_exporter import track_ai_usage
+        track_ai_usage(record)
+    except Exception as e:
+        logger.debug(f"Failed to export usage metrics for {record.step}: {e}")
+
+    try:
+        from .logging_config import log_ai_request
+        log_ai_request(record.provider, record.model, record.step,
+                       tokens=record.prompt_tokens + record.completion_tokens)
+    except Exception as e:
+        logger.debug(f"Failed to log AI request for {record.step}: {e}")
+
+    return record
+
+
+def record_transcription(audio_seconds: float, latency: float, step: str = "transcription",
+                         model: str = "whisper-1") -> UsageRecord:
+    """Record a Whisper call"""
+    return record_usage(UsageRecord(
+        step=step,
+        provider="openai",
+        model=model,
+        audio_seconds=audio_seconds,
+        latency=latency,
+        cost_usd=estimate_transcription_cost(audio_seconds),
+    ))
@@ -0,0 +1,244 @@
+"""
+Editorial Review for WhisperForge
+=================================
+
+Parallel critique-and-revise pass over generated artifacts.
+
+Instead of generate -> critique -> regenerate inline for every step, the
+pipeline produces all drafts first and then hands them to an
+``EditorialPass``. Critiques for all artifacts run concurrently, revisions
+only run when the critique asks for material changes, and the whole pass is
+bounded by a per-job budget of rounds, wall-clock seconds and tokens.
+
+Revisions run in dependency order: when wisdom and the article are both
+revised, the article reviser is called after the wisdom revision and sees
+the revised wisdom. Revisions with no revised upstream run concurrently.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .content_generation import editor_critique
+from .cost_accounting import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Artifact key -> content type understood by the editor persona
+EDITABLE_STEPS = {
+    "wisdom_extraction": "wisdom_extraction",
+    "outline_creation": "outline_creation",
+    "article_creation": "article_writing",
+    "social_content": "social_media",
+}
+
+# Artifacts each artifact is generated from
+UPSTREAM_STEPS = {
+    "wisdom_extraction": (),
+    "outline_creation": ("wisdom_extraction",),
+    "article_creation": ("wisdom_extraction", "outline_creation"),
+    "social_content": ("wisdom_extraction", "outline_creation", "article_creation"),
+}
+
+REVISION_TEMPLATE = """Based on this editorial feedback, please revise the {label}:
+
+EDITORIAL FEEDBACK:
+{critique}
+
+ORIGINAL {label_upper}:
+{content}
+
+Please provide an improved version that addresses the feedback."""
+
+
+def needs_revision(critique: str) -> bool:
+    """True when the critique asks for material changes.
+
+    The editor is asked to start with ``VERDICT: APPROVE`` or
+    ``VERDICT: REVISE``; critiques without a verdict are treated as REVISE.
+    Failed critiques never trigger a revision.
+    """
+    if not critique or critique.startswith("Error"):
+        return False
+    head = critique.strip().splitlines()[0].upper()
+    if "VERDICT" in head:
+        return "REVISE" in head
+    return True
+
+
+def revision_waves(keys: List[str]) -> List[List[str]]:
+    """Group ``keys`` so each artifact is revised after its revised upstream artifacts"""
+    waves = []
+    remaining = list(keys)
+    while remaining:
+        wave = [key for key in remaining if not any(up in remaining for up in UPSTREAM_STEPS.get(key, ()))]
+        waves.append(wave)
+        remaining = [key for key in remaining if key not in wave]
+    return waves
+
+
+@dataclass
+class EditorBudget:
+    """Per-job limits for the editorial pass"""
+
+    max_rounds: int = 1
+    max_seconds: float = 90.0
+    max_tokens: int = 24000
+
+
+@dataclass
+class EditorialResult:
+    """Outcome of the editorial pass for one artifact"""
+
+    content: str
+    critiques: List[str] = field(default_factory=list)
+    revised: bool = False
+    rounds: int = 0
+    skipped_reason: Optional[str] = None
+
+    @property
+    def critique(self) -> str:
+        return self.critiques[-1] if self.critiques else ""
+
+
+class EditorialPass:
+    """Runs concurrent critiques and conditional revisions within a budget"""
+
+    def __init__(self, budget: Optional[EditorBudget] = None, ai_provider: Optional[str] = None,
+                 ai_model: Optional[str] = None, knowledge_base: Optional[Dict[str, str]] = None,
+                 max_workers: int = 4):
+        self.budget = budget or EditorBudget()
+        self.ai_provider = ai_provider
+        self.ai_model = ai_model
+        self.knowledge_base = knowledge_base
+        self.max_workers = max_workers
+        self.tokens_used = 0
+        self.seconds_used = 0.0
+
+    def _remaining_seconds(self, started: float) -> float:
+        return self.budget.max_seconds - (time.monotonic() - started)
+
+    def _has_token_budget(self, text: str) -> bool:
+        return self.tokens_used + 2 * estimate_tokens(text) <= self.budget.max_tokens
+
+    def _run_batch(self, executor: ThreadPoolExecutor, tasks: Dict[str, Callable[[], str]],
+                   started: float) -> Dict[str, str]:
+        """Run tasks concurrently, dropping any that miss the time budget"""
+        # copy_context keeps usage accounting attributed to the current job
+        futures = {
+            executor.submit(contextvars.copy_context().run, task): key
+            for key, task in tasks.items()
+        }
+        done, not_done = wait(futures, timeout=max(0.0, self._remaining_seconds(started)))
+        for future in not_done:
+            future.cancel()
+        results = {}
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.warning(f"Editorial task for {key} failed: {e}")
+        return results
+
+    def run(self, artifacts: Dict[str, str],
+            revisers: Dict[str, Callable[[str, Dict[str, str]], str]]) -> Dict[str, EditorialResult]:
+        """Critique ``artifacts`` concurrently and revise where needed.
+
+        ``revisers`` maps an artifact key to a callable that regenerates the
+        artifact from a revision prompt and the current artifacts, which
+        include any upstream revisions made earlier in the same round.
+        """
+        started = time.monotonic()
+        results = {
+            key: EditorialResult(content=content)
+            for key, content in artifacts.items()
+            if key in EDITABLE_STEPS and content
+        }
+        pending = list(results)
+
+        # Not used as a context manager: tasks that overrun the time budget are
+        # abandoned instead of blocking the pipeline on shutdown
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="editor")
+        try:
+            for round_number in range(1, self.budget.max_rounds + 1):
+                if not pending:
+                    break
+
+                # Critique every pending artifact concurrently
+                to_critique = {}
+                for key in pending:
+                    content = results[key].content
+                    if self._remaining_seconds(started) <= 0:
+                        results[key].skipped_reason = "time budget exhausted"
+                    elif not self._has_token_budget(content):
+                        results[key].skipped_reason = "token budget exhausted"
+                    else:
+                        self.tokens_used += 2 * estimate_tokens(content)
+                        to_critique[key] = (
+                            lambda c=content, t=EDITABLE_STEPS[key]: editor_critique(
+                                c, t, self.ai_provider, self.ai_model, self.knowledge_base
+                            )
+                        )
+                critiques = self._run_batch(executor, to_critique, started)
+
+                # Revise only where the critique asks for material changes
+                to_revise = {}
+                for key, critique in critiques.items():
+                    result = results[key]
+                    result.critiques.append(critique)
+                    result.rounds = round_number
+                    self.tokens_used += estimate_tokens(critique)
+                    if not needs_revision(critique) or key not in revisers:
+                        continue
+                    label = key.replace("_", " ")
+                    prompt = REVISION_TEMPLATE.format(
+                        label=label, label_upper=label.upper(),
+                        critique=critique, content=result.content
+                    )
+                    if not self._has_token_budget(prompt):
+                        result.skipped_reason = "token budget exhausted"
+                        continue
+                    self.tokens_used += 2 * estimate_tokens(prompt)
+                    to_revise[key] = prompt
+
+                pending = []
+                for wave in revision_waves(list(to_revise)):
+                    if self._remaining_seconds(started) <= 0:
+                        for key in wave:
+                            results[key].skipped_reason = "time budget exhausted"
+                        continue
+                    current = {**artifacts, **{key: result.content for key, result in results.items()}}
+                    batch = {
+                        key: lambda r=revisers[key], p=to_revise[key], c=current: r(p, c)
+                        for key in wave
+                    }
+                    for key, revision in self._run_batch(executor, batch, started).items():
+                        if revision and not revision.startswith("Error"):
+                            results[key].content = revision
+                            results[key].revised = True
+                            pending.append(key)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.seconds_used = time.monotonic() - started
+        logger.info(
+            f"Editorial pass finished in {self.seconds_used:.1f}s using ~{self.tokens_used} tokens; "
+            f"revised {sum(1 for r in results.values() if r.revised)}/{len(results)} artifacts"
+        )
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        """Budget usage summary for display and logging"""
+        return {
+            "seconds_used": round(self.seconds_used, 2),
+            "tokens_used": self.tokens_used,
+            "max_seconds": self.budget.max_seconds,
+            "max_tokens": self.budget.max_tokens,
+            "max_rounds": self.budget.max_rounds,
+        }
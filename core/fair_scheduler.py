@@ -0,0 +1,263 @@
+"""
+Fair-Share Scheduling for WhisperForge
+======================================
+
+Chunk transcription and LLM calls each pass through a ``FairScheduler``
+before they start, so one user's large batch cannot hold every slot:
+
+- **Weighted fair queuing**: each request gets a virtual finish tag of
+  ``start + cost / weight``, where ``cost`` is the work it represents
+  (seconds of audio, thousands of tokens) and ``weight`` comes from the
+  user's subscription tier. Free slots go to the smallest finish tag, so a
+  short job queued behind another user's long batch starts next instead of
+  waiting for the whole batch.
+- **Per-user concurrency cap**: a user never holds more than
+  ``scheduler_user_concurrency`` slots of a resource at once.
+- **Quota admission**: ``admit_job`` checks the user's remaining
+  ``usage_quota`` (audio minutes) before a job starts, and ``charge_usage``
+  adds the minutes transcribed to ``usage_current``.
+
+The user whose work is running is carried in a contextvar (see
+``tenant_scope``), like usage accounting and cancellation, so the chunk
+and provider code does not need to pass it around. Schedulers are
+per-process; across queue worker processes the queue's per-user FIFO keeps
+users apart.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import itertools
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cancellation import current_token
+from .config import get_config
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIER = "free"
+ANONYMOUS = "anonymous"
+WAIT_POLL_SECONDS = 0.5
+
+
+class QuotaExceeded(Exception):
+    """Raised when a job needs more audio minutes than the user has left"""
+
+
+@dataclass
+class Tenant:
+    """The user (and tier) that scheduled work is done for"""
+
+    user_id: str = ANONYMOUS
+    tier: str = DEFAULT_TIER
+    remaining_minutes: Optional[float] = None   # None when quotas are not known
+
+    @property
+    def weight(self) -> float:
+        return tier_weight(self.tier)
+
+
+def tier_weight(tier: Optional[str]) -> float:
+    """Scheduling weight of a subscription tier (unknown tiers get the default tier's)"""
+    weights = get_config().tier_weights
+    return float(weights.get(tier or DEFAULT_TIER, weights.get(DEFAULT_TIER, 1.0)))
+
+
+_current_tenant: contextvars.ContextVar[Optional[Tenant]] = contextvars.ContextVar(
+    "whisperforge_tenant", default=None
+)
+
+
+def current_tenant() -> Tenant:
+    """The tenant of the running job, or an anonymous free-tier tenant"""
+    return _current_tenant.get() or Tenant()
+
+
+@contextmanager
+def tenant_scope(tenant: Tenant) -> Iterator[Tenant]:
+    """Attribute scheduled work in the block (and threads copying its context) to ``tenant``"""
+    reset = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(reset)
+
+
+@dataclass(order=True)
+class _Request:
+    finish: float
+    seq: int
+    user_id: str = field(compare=False)
+    start: float = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+
+
+class FairScheduler:
+    """Weighted fair queue over ``capacity`` slots with a per-user cap"""
+
+    def __init__(self, name: str, capacity: int, per_user_limit: Optional[int] = None):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.per_user_limit = max(1, per_user_limit or self.capacity)
+        self._cond = threading.Condition()
+        self._waiting: List[_Request] = []
+        self._running: Dict[str, int] = defaultdict(int)
+        self._in_use = 0
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+    @contextmanager
+    def slot(self, cost: float = 1.0, tenant: Optional[Tenant] = None) -> Iterator[None]:
+        """Hold one slot for the block, waiting for a fair turn first.
+
+        Waiting honours the current ``CancellationToken``: a cancelled job
+        leaves the queue and raises ``JobCancelled``.
+        """
+        tenant = tenant or current_tenant()
+        request = self._enqueue(tenant, cost)
+        try:
+            if not request.granted:
+                with span(f"schedule.{self.name}", user_id=tenant.user_id, cost=round(cost, 3)):
+                    self._wait_for(request)
+        except BaseException:
+            with self._cond:
+                if request.granted:
+                    self._release_locked(request)
+                elif request in self._waiting:
+                    self._waiting.remove(request)
+            raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release_locked(request)
+
+    def _enqueue(self, tenant: Tenant, cost: float) -> _Request:
+        with self._cond:
+            start = max(self._virtual_time, self._last_finish.get(tenant.user_id, 0.0))
+            finish = start + max(cost, 0.001) / max(tenant.weight, 0.001)
+            self._last_finish[tenant.user_id] = finish
+            request = _Request(finish=finish, seq=next(self._seq), user_id=tenant.user_id, start=start)
+            self._waiting.append(request)
+            self._dispatch_locked()
+            return request
+
+    def _wait_for(self, request: _Request) -> None:
+        token = current_token()
+        with self._cond:
+            while not request.granted:
+                if token is not None:
+                    token.raise_if_cancelled()
+                self._cond.wait(WAIT_POLL_SECONDS)
+
+    def _dispatch_locked(self) -> None:
+        """Grant free slots to the eligible requests with the smallest finish tags"""
+        granted = False
+        while self._in_use < self.capacity:
+            eligible = [r for r in self._waiting if self._running[r.user_id] < self.per_user_limit]
+            if not eligible:
+                break
+            request = min(eligible)
+            self._waiting.remove(request)
+            request.granted = True
+            self._in_use += 1
+            self._running[request.user_id] += 1
+            self._virtual_time = max(self._virtual_time, request.start)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _release_locked(self, request: _Request) -> None:
+        self._in_use -= 1
+        self._running[request.user_id] -= 1
+        if not self._running[request.user_id]:
+            del self._running[request.user_id]
+        self._dispatch_locked()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Slots in use and waiting requests, per user"""
+        with self._cond:
+            waiting: Dict[str, int] = defaultdict(int)
+            for request in self._waiting:
+                waiting[request.user_id] += 1
+            return {"name": self.name, "capacity": self.capacity, "in_use": self._in_use,
+                    "running": dict(self._running), "waiting": dict(waiting)}
+
+
+def admit_job(user_id: Optional[str], audio_minutes: float = 0.0) -> Tenant:
+    """Check a job against the user's remaining quota before expensive work starts.
+
+    Returns the job's ``Tenant`` (with its tier); raises ``QuotaExceeded``
+    if the user has no minutes left or fewer than ``audio_minutes``. Jobs
+    without a user, or when the database is unavailable, are admitted on
+    the default tier.
+    """
+    if not user_id:
+        return Tenant()
+    user = _load_user(user_id)
+    if user is None:
+        return Tenant(user_id=str(user_id))
+    tenant = Tenant(user_id=str(user_id), tier=user.get("subscription_tier") or DEFAULT_TIER)
+    if get_config().quota_enforced and user.get("usage_quota") is not None:
+        tenant.remaining_minutes = float(user["usage_quota"]) - float(user.get("usage_current") or 0)
+        if tenant.remaining_minutes <= 0 or audio_minutes > tenant.remaining_minutes:
+            raise QuotaExceeded(
+                f"Usage quota exceeded: {audio_minutes:.1f} audio minutes needed, "
+                f"{max(tenant.remaining_minutes, 0):.1f} remaining"
+            )
+    return tenant
+
+
+def charge_usage(user_id: Optional[str], audio_minutes: float) -> None:
+    """Add transcribed minutes to the user's ``usage_current``"""
+    if not user_id or audio_minutes <= 0:
+        return
+    try:
+        from .supabase_integration import get_supabase_client
+
+        db = get_supabase_client()
+        if db:
+            db.add_user_usage(user_id, audio_minutes)
+    except Exception as e:
+        logger.warning(f"Could not record usage for user {user_id}: {e}")
+
+
+def _load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        from .supabase_integration import get_supabase_client
+
+        db = get_supabase_client()
+        return db.get_user(user_id) if db else None
+    except Exception as e:
+        logger.warning(f"Could not load quota for user {user_id}: {e}")
+        return None
+
+
+# Global scheduler instances, one per resource
+_schedulers: Dict[str, FairScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def scheduler_snapshots() -> List[Dict[str, Any]]:
+    """``snapshot()`` of every scheduler created in this process"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return [scheduler.snapshot() for scheduler in schedulers]
+
+
+def get_scheduler(resource: str) -> FairScheduler:
+    """The process-wide scheduler for "transcription" or "llm" slots"""
+    with _schedulers_lock:
+        if resource not in _schedulers:
+            config = get_config()
+            capacity = config.scheduler_transcription_slots if resource == "transcription" \
+                else config.scheduler_llm_slots
+            _schedulers[resource] = FairScheduler(resource, capacity, config.scheduler_user_concurrency)
+        return _schedulers[resource]
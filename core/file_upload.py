@@ -4,6 +4,7 @@ Supports large file processing up to 2GB with intelligent chunking and parallel
 """
 
 import asyncio
+import contextvars
 import logging
 import math
 import mimetypes
@@ -16,6 +17,9 @@ from typing import Optional, List, Dict, Any, Tuple
 
 import streamlit as st
 
+from .cost_accounting import record_transcription
+from .resource_monitor import ResourceSampler
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -401,11 +405,16 @@ class FileUploadManager:
                     return chunk_index, "Error: OpenAI API key not configured", False
                 
                 # Transcribe chunk
+                chunk_start = time.perf_counter()
                 with open(chunk_file_path, "rb") as audio_file:
                     transcript = openai_client.audio.transcriptions.create(
                         model="whisper-1",
                         file=audio_file
                     )
+                record_transcription(
+                    audio_seconds=chunk_info.get("duration", 0.0),
+                    latency=time.perf_counter() - chunk_start,
+                )
                 
                 chunk_statuses[chunk_index] = "completed"
                 return chunk_index, transcript.text, True
@@ -419,7 +428,7 @@ class FileUploadManager:
         with ThreadPoolExecutor(max_workers=self.max_parallel_chunks) as executor:
             # Submit all chunks for processing
             future_to_chunk = {
-                executor.submit(transcribe_single_chunk, chunk): chunk["index"] 
+                executor.submit(contextvars.copy_context().run, transcribe_single_chunk, chunk): chunk["index"]
                 for chunk in chunks
             }
             
@@ -963,8 +972,13 @@ class EnhancedLargeFileProcessor:
         
         return uploaded_file
     
-    def process_large_file(self, uploaded_file) -> Dict[str, Any]:
-        """Enhanced large file processing with FFmpeg"""
+    def process_large_file(self, uploaded_file, incremental_wisdom=None) -> Dict[str, Any]:
+        """Enhanced large file processing with FFmpeg
+
+        When an ``IncrementalWisdomExtractor`` is passed, chunked files start
+        wisdom extraction while transcription is still running and the merged
+        wisdom is returned under ``"wisdom"``.
+        """
         
         # Validate file first
         validation = self.validate_file(uploaded_file)
@@ -978,7 +992,7 @@ class EnhancedLargeFileProcessor:
         
         if requires_chunking:
             st.info("🔧 **Processing Method:** FFmpeg chunking (large file detected)")
-            return self._process_with_ffmpeg_chunking(uploaded_file)
+            return self._process_with_ffmpeg_chunking(uploaded_file, incremental_wisdom)
         else:
             st.info("⚡ **Processing Method:** Standard processing (small file)")
             return self._process_standard(uploaded_file)
@@ -986,7 +1000,7 @@ class EnhancedLargeFileProcessor:
     def _process_standard(self, uploaded_file) -> Dict[str, Any]:
         """Process smaller files using standard method"""
         try:
-            from core.content_generation import transcribe_audio
+            from core.audio_chunks import transcribe_scheduled
             
             # Create temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
@@ -996,7 +1010,7 @@ class EnhancedLargeFileProcessor:
             try:
                 # Transcribe directly
                 with st.spinner("🎯 Transcribing audio..."):
-                    transcript = transcribe_audio(tmp_file_path)
+                    transcript = transcribe_scheduled(tmp_file_path)
                 
                 return {
                     "success": True,
@@ -1013,21 +1027,27 @@ class EnhancedLargeFileProcessor:
         except Exception as e:
             return {"success": False, "error": f"Standard processing failed: {str(e)}"}
     
-    def _process_with_ffmpeg_chunking(self, uploaded_file) -> Dict[str, Any]:
-        """Process large files using FFmpeg chunking"""
+    def _process_with_ffmpeg_chunking(self, uploaded_file, incremental_wisdom=None) -> Dict[str, Any]:
+        """Process large files using FFmpeg chunking
+
+        RSS, open files, temp directory bytes and FFmpeg CPU of each stage
+        are exported as gauges and returned under ``"resource_usage"``.
+        """
         
         # Setup temporary directory
         self.temp_dir = tempfile.mkdtemp(prefix="whisperforge_chunks_")
+        sampler = ResourceSampler(self.temp_dir, pipeline="upload")
         
         try:
             # Save uploaded file
             input_file_path = os.path.join(self.temp_dir, uploaded_file.name)
-            with open(input_file_path, 'wb') as f:
+            with sampler.stage("save_upload"), open(input_file_path, 'wb') as f:
                 f.write(uploaded_file.getvalue())
             
             # Get audio information
             st.info("🔍 Analyzing audio file...")
-            audio_info = self.get_audio_info(input_file_path)
+            with sampler.stage("probe"):
+                audio_info = self.get_audio_info(input_file_path)
             
             if "error" in audio_info:
                 return {"success": False, "error": audio_info["error"]}
@@ -1037,7 +1057,8 @@ class EnhancedLargeFileProcessor:
             
             # Create chunks using FFmpeg
             st.info("✂️ Creating audio chunks...")
-            chunks_result = self._create_ffmpeg_chunks(input_file_path, duration)
+            with sampler.stage("chunking"):
+                chunks_result = self._create_ffmpeg_chunks(input_file_path, duration)
             
             if not chunks_result["success"]:
                 return chunks_result
@@ -1047,7 +1068,10 @@ class EnhancedLargeFileProcessor:
             
             # Process chunks in parallel
             st.info("🚀 Starting parallel transcription...")
-            transcription_result = self._transcribe_chunks_parallel_ffmpeg(chunks)
+            if incremental_wisdom is not None:
+                incremental_wisdom.start(chunk["index"] for chunk in chunks)
+            with sampler.stage("chunk_transcription"):
+                transcription_result = self._transcribe_chunks_parallel_ffmpeg(chunks, incremental_wisdom)
             
             if not transcription_result["success"]:
                 return transcription_result
@@ -1055,7 +1079,7 @@ class EnhancedLargeFileProcessor:
             # Reassemble transcript
             full_transcript = self._reassemble_transcript_ffmpeg(transcription_result["chunk_transcripts"])
             
-            return {
+            result = {
                 "success": True,
                 "transcript": full_transcript,
                 "method": "ffmpeg_chunking",
@@ -1064,10 +1088,21 @@ class EnhancedLargeFileProcessor:
                 "success_rate": transcription_result.get("success_rate", "unknown")
             }
             
+            # Reduce the section wisdom extracted during transcription
+            if incremental_wisdom is not None:
+                with st.spinner("💡 Merging section wisdom..."), sampler.stage("wisdom_merge"):
+                    result["wisdom"] = incremental_wisdom.finalize()
+                result["incremental_wisdom"] = incremental_wisdom.report()
+            
+            result["resource_usage"] = sampler.report()
+            return result
+            
         except Exception as e:
             return {"success": False, "error": f"FFmpeg processing failed: {str(e)}"}
         
         finally:
+            if incremental_wisdom is not None:
+                incremental_wisdom.shutdown()
             # Cleanup temporary directory
             self._cleanup_temp_dir()
     
@@ -1123,9 +1158,10 @@ class EnhancedLargeFileProcessor:
         except Exception as e:
             return {"success": False, "error": f"Chunk creation failed: {str(e)}"}
     
-    def _transcribe_chunks_parallel_ffmpeg(self, chunks: List[Dict]) -> Dict[str, Any]:
+    def _transcribe_chunks_parallel_ffmpeg(self, chunks: List[Dict], incremental_wisdom=None) -> Dict[str, Any]:
         """Transcribe chunks in parallel using ThreadPoolExecutor"""
-        from core.content_generation import transcribe_audio
+        from core.audio_chunks import transcribe_scheduled
+        from core.content_generation import is_failed_output
         
         chunk_transcripts = {}
         total_chunks = len(chunks)
@@ -1140,7 +1176,8 @@ class EnhancedLargeFileProcessor:
                 chunk_index = chunk_info["index"]
                 file_path = chunk_info["file_path"]
                 
-                transcript = transcribe_audio(file_path)
+                # Whisper calls share the per-user fair-share slots with every other job
+                transcript = transcribe_scheduled(file_path, chunk_info.get("duration"))
                 return chunk_index, transcript, True
                 
             except Exception as e:
@@ -1154,17 +1191,23 @@ class EnhancedLargeFileProcessor:
         with ThreadPoolExecutor(max_workers=self.max_parallel_chunks) as executor:
             # Submit all chunks
             future_to_chunk = {
-                executor.submit(transcribe_single_chunk, chunk): chunk 
+                executor.submit(contextvars.copy_context().run, transcribe_single_chunk, chunk): chunk
                 for chunk in chunks
             }
             
             # Process completed futures
             for future in as_completed(future_to_chunk):
                 chunk_index, transcript, success = future.result()
+                # transcribe_audio reports some failures as text, e.g. a missing client
+                usable = success and not is_failed_output(transcript)
                 
-                if success:
+                if usable:
                     chunk_transcripts[chunk_index] = transcript
                 
+                # Feed the contiguous prefix to wisdom extraction as it grows
+                if incremental_wisdom is not None:
+                    incremental_wisdom.add_chunk(chunk_index, transcript if usable else None)
+                
                 completed_chunks += 1
                 
                 # Update progress
@@ -1,10 +1,47 @@
-from __future__ import annotations
+"""
+Health Checks and SLOs for WhisperForge
+=======================================
+
+``HealthChecker`` keeps rolling windows of request, pipeline and per-step
+outcomes and evaluates the SLOs in ``docs/monitoring.md`` against them:
+
+- error rate (5xx) and median/p95 response time over the last 5 minutes
+- pipeline success rate and per-step p95 latency over the last hour
+- users active in the last hour
+
+A ``RollingWindow`` is a ring of time slots, each holding a count, an error
+count and a fixed log-spaced latency histogram. Recording touches one slot
+and reading merges a fixed number of slots, so memory and query cost stay
+constant however much traffic passes through. Quantiles are accurate to
+one histogram bin (about 15%).
 
-"""Minimal health check utilities for WhisperForge."""
+The instrumentation in ``metrics_exporter`` feeds the checker; SLOs are
+re-evaluated as outcomes arrive (at most every ``EVALUATE_INTERVAL_SECONDS``)
+and every hook added with ``add_alert_hook`` is called when an SLO starts
+failing, and again every ``slo_alert_cooldown_seconds`` while it stays failing.
+"""
 
-from dataclasses import dataclass, asdict
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Latency bins from 1 ms to past an hour, each 15% wider than the last
+LATENCY_BOUNDS = tuple(0.001 * 1.15 ** i for i in range(110))
+REQUEST_WINDOW_SECONDS = 300
+PIPELINE_WINDOW_SECONDS = 3600
+EVALUATE_INTERVAL_SECONDS = 10.0
+
 
 @dataclass
 class HealthStatus:
@@ -13,40 +50,292 @@ class HealthStatus:
 
     # Optional fields for backward compatibility
     uptime_seconds: float = 0.0
+    slo_violations: int = 0
 
 
 @dataclass
 class SloMetrics:
-    error_rate_5xx: float = 0.0
-    median_response_time: int = 0
+    error_rate_5xx: float = 0.0          # percent of requests, last 5 minutes
+    median_response_time: int = 0        # ms, last 5 minutes
+    p95_response_time: int = 0           # ms, last 5 minutes
+    requests_5m: int = 0
     active_users_1h: int = 0
+    pipeline_success_rate: float = 100.0  # percent, last hour
+    pipelines_1h: int = 0
+    step_p95_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class WindowSummary:
+    count: int = 0
+    errors: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return 100.0 * self.errors / self.count if self.count else 0.0
+
+
+class RollingWindow:
+    """Counts, errors and a latency histogram over the last ``window_seconds``"""
+
+    def __init__(self, window_seconds: float, slots: int = 60, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / slots
+        self.clock = clock
+        self._epochs = [-1] * slots
+        self._counts = [0] * slots
+        self._errors = [0] * slots
+        self._bins = [[0] * (len(LATENCY_BOUNDS) + 1) for _ in range(slots)]
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, error: bool = False) -> None:
+        epoch = int(self.clock() / self.slot_seconds)
+        index = epoch % len(self._epochs)
+        with self._lock:
+            if self._epochs[index] != epoch:
+                # The slot last held data from a full window ago
+                self._epochs[index] = epoch
+                self._counts[index] = self._errors[index] = 0
+                self._bins[index] = [0] * (len(LATENCY_BOUNDS) + 1)
+            self._counts[index] += 1
+            self._errors[index] += bool(error)
+            self._bins[index][bisect.bisect_left(LATENCY_BOUNDS, duration)] += 1
+
+    def summary(self) -> WindowSummary:
+        oldest = int(self.clock() / self.slot_seconds) - len(self._epochs) + 1
+        merged = [0] * (len(LATENCY_BOUNDS) + 1)
+        summary = WindowSummary()
+        with self._lock:
+            for index, epoch in enumerate(self._epochs):
+                if epoch < oldest:
+                    continue
+                summary.count += self._counts[index]
+                summary.errors += self._errors[index]
+                for bin_index, count in enumerate(self._bins[index]):
+                    merged[bin_index] += count
+        summary.p50 = _quantile(merged, summary.count, 0.50)
+        summary.p95 = _quantile(merged, summary.count, 0.95)
+        return summary
+
+
+def _quantile(bins: List[int], count: int, q: float) -> float:
+    """Upper bound of the bin holding the ``q`` quantile (conservative for SLOs)"""
+    if not count:
+        return 0.0
+    rank, seen = q * count, 0
+    for index, bin_count in enumerate(bins):
+        seen += bin_count
+        if seen >= rank:
+            return LATENCY_BOUNDS[min(index, len(LATENCY_BOUNDS) - 1)]
+    return LATENCY_BOUNDS[-1]
+
+
+class ActiveUsers:
+    """Users seen in the last ``window`` seconds (entries expire, so the map stays small)"""
+
+    def __init__(self, window: float = PIPELINE_WINDOW_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, user_id: str) -> None:
+        with self._lock:
+            self._last_seen[user_id] = self.clock()
+            self._expire_locked()
+
+    def count(self) -> int:
+        with self._lock:
+            self._expire_locked()
+            return len(self._last_seen)
+
+    def _expire_locked(self) -> None:
+        cutoff = self.clock() - self.window
+        for user_id in [u for u, seen in self._last_seen.items() if seen < cutoff]:
+            del self._last_seen[user_id]
+
+
+@dataclass
+class SloResult:
+    """One SLO evaluated over its window"""
+
+    slo: str
+    value: float
+    threshold: float
+    window_seconds: float
+    samples: int
+    met: bool = True
+
+    @property
+    def message(self) -> str:
+        return f"{self.slo}: {self.value:.2f} against a target of {self.threshold:g} ({self.samples} samples)"
+
+
+AlertHook = Callable[[SloResult], None]
 
 
 class HealthChecker:
-    """Simple health check implementation."""
+    """Rolling-window SLOs over the requests, pipelines and steps recorded in this process"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.started_at = clock()
+        self.requests = RollingWindow(REQUEST_WINDOW_SECONDS, slots=30, clock=clock)
+        self.pipelines = RollingWindow(PIPELINE_WINDOW_SECONDS, slots=60, clock=clock)
+        self.steps: Dict[str, RollingWindow] = {}
+        self.active_users = ActiveUsers(clock=clock)
+        self._alert_hooks: List[AlertHook] = []
+        self._alerted: Dict[str, float] = {}
+        self._last_evaluated: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # -- recording ---------------------------------------------------------
+
+    def record_request(self, duration: float, status_code: int) -> None:
+        self.requests.record(duration, error=status_code >= 500)
+        self._maybe_evaluate()
+
+    def record_pipeline(self, duration: float, success: bool) -> None:
+        self.pipelines.record(duration, error=not success)
+        self._maybe_evaluate()
+
+    def record_step(self, step: str, duration: float, success: bool = True) -> None:
+        with self._lock:
+            window = self.steps.get(step)
+            if window is None:
+                window = self.steps[step] = RollingWindow(PIPELINE_WINDOW_SECONDS, slots=60, clock=self.clock)
+        window.record(duration, error=not success)
+        self._maybe_evaluate()
+
+    def record_user(self, user_id: str) -> None:
+        self.active_users.touch(user_id)
+
+    # -- reading -----------------------------------------------------------
 
     def get_health_status(self) -> HealthStatus:
+        violations = self.check_slo_violations()
         return HealthStatus(
-            status="healthy",
+            status="degraded" if violations else "healthy",
             timestamp=datetime.utcnow().isoformat(),
-            uptime_seconds=0.0,
+            uptime_seconds=self.clock() - self.started_at,
+            slo_violations=len(violations),
         )
 
     def get_slo_metrics(self) -> SloMetrics:
-        """Return placeholder SLO metrics."""
-        return SloMetrics()
+        requests, pipelines = self.requests.summary(), self.pipelines.summary()
+        with self._lock:
+            steps = dict(self.steps)
+        return SloMetrics(
+            error_rate_5xx=round(requests.error_rate, 3),
+            median_response_time=int(requests.p50 * 1000),
+            p95_response_time=int(requests.p95 * 1000),
+            requests_5m=requests.count,
+            active_users_1h=self.active_users.count(),
+            pipeline_success_rate=round(100.0 - pipelines.error_rate, 3),
+            pipelines_1h=pipelines.count,
+            step_p95_seconds={step: round(window.summary().p95, 3) for step, window in sorted(steps.items())},
+        )
+
+    def evaluate_slos(self) -> List[SloResult]:
+        """Every SLO that has data in its window"""
+        config = get_config()
+        requests, pipelines = self.requests.summary(), self.pipelines.summary()
+        results = []
+        if requests.count:
+            results.append(SloResult("error_rate_5xx_percent", requests.error_rate, config.slo_error_rate_percent,
+                                     REQUEST_WINDOW_SECONDS, requests.count))
+            results.append(SloResult("median_response_seconds", requests.p50, config.slo_median_response_seconds,
+                                     REQUEST_WINDOW_SECONDS, requests.count))
+        if pipelines.count:
+            results.append(SloResult("pipeline_success_percent", 100.0 - pipelines.error_rate,
+                                     config.slo_pipeline_success_percent, PIPELINE_WINDOW_SECONDS, pipelines.count))
+        with self._lock:
+            steps = dict(self.steps)
+        for step, threshold in sorted(config.slo_step_p95_seconds.items()):
+            summary = steps[step].summary() if step in steps else None
+            if summary and summary.count:
+                results.append(SloResult(f"{step}_p95_seconds", summary.p95, threshold,
+                                         PIPELINE_WINDOW_SECONDS, summary.count))
+        for result in results:
+            # Success rates are floors, everything else is a ceiling
+            result.met = result.value >= result.threshold if result.slo.endswith("success_percent") \
+                else result.value <= result.threshold
+        return results
 
-    def check_slo_violations(self) -> list:
-        return []
+    def check_slo_violations(self) -> List[SloResult]:
+        return [result for result in self.evaluate_slos() if not result.met]
+
+    def slo_compliance(self) -> float:
+        """Percent of SLOs with data that are currently met (100 without data)"""
+        results = self.evaluate_slos()
+        return 100.0 * sum(result.met for result in results) / len(results) if results else 100.0
 
     def get_metrics_json(self) -> str:
         data: Dict[str, Any] = {
             "health": asdict(self.get_health_status()),
             "slo_metrics": asdict(self.get_slo_metrics()),
+            "slo_violations": [asdict(violation) for violation in self.check_slo_violations()],
         }
-        import json
-
         return json.dumps(data)
 
+    # -- alerting ----------------------------------------------------------
+
+    def add_alert_hook(self, hook: AlertHook) -> None:
+        """Call ``hook(violation)`` when an SLO starts failing (and again after the cooldown)"""
+        with self._lock:
+            self._alert_hooks.append(hook)
+
+    def _maybe_evaluate(self) -> None:
+        now = self.clock()
+        with self._lock:
+            if self._last_evaluated is not None and now - self._last_evaluated < EVALUATE_INTERVAL_SECONDS:
+                return
+            self._last_evaluated = now
+        self.evaluate_alerts()
+
+    def evaluate_alerts(self) -> List[SloResult]:
+        """Fire alert hooks for new (or still failing, past the cooldown) violations"""
+        violations = self.check_slo_violations()
+        now, cooldown = self.clock(), get_config().slo_alert_cooldown_seconds
+        failing = {violation.slo for violation in violations}
+        fired = []
+        with self._lock:
+            for slo in [slo for slo in self._alerted if slo not in failing]:
+                logger.info(f"SLO recovered: {slo}")
+                del self._alerted[slo]
+            for violation in violations:
+                last = self._alerted.get(violation.slo)
+                if last is None or now - last >= cooldown:
+                    self._alerted[violation.slo] = now
+                    fired.append(violation)
+            hooks = list(self._alert_hooks)
+        for violation in fired:
+            logger.warning(f"SLO violation alert: {violation.message}")
+            for hook in hooks:
+                try:
+                    hook(violation)
+                except Exception as e:
+                    logger.warning(f"SLO alert hook failed: {e}")
+        return fired
+
+
+def webhook_alert_hook(url: str) -> AlertHook:
+    """Alert hook that POSTs each violation as JSON to ``url`` (off the recording thread)"""
+
+    def post(violation: SloResult) -> None:
+        import httpx
+
+        payload = {**asdict(violation), "message": violation.message, "service": "whisperforge"}
+        try:
+            httpx.post(url, json=payload, timeout=10.0)
+        except Exception as e:
+            logger.warning(f"Could not deliver SLO alert to {url}: {e}")
+
+    return lambda violation: threading.Thread(target=post, args=(violation,), daemon=True).start()
+
 
 health_checker = HealthChecker()
+if get_config().slo_alert_webhook:
+    health_checker.add_alert_hook(webhook_alert_hook(get_config().slo_alert_webhook))
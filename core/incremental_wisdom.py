@@ -0,0 +1,134 @@
+"""
+Incremental Wisdom Extraction for WhisperForge
+==============================================
+
+Overlaps the wisdom step with chunked transcription of large files.
+
+Chunks finish transcribing out of order. Whenever the contiguous prefix of
+completed chunks grows by ``section_chunks`` chunks, the new section is sent
+for wisdom extraction in the background while the remaining chunks are still
+transcribing. Once transcription completes, ``finalize`` extracts the tail
+section and merges the per-section notes into the final wisdom (the reduce).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .content_generation import generate_wisdom, merge_wisdom
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WisdomSection:
+    """A contiguous run of chunks submitted for extraction"""
+
+    first_chunk: int
+    last_chunk: int
+    submitted_at: float
+    future: Future
+
+
+class IncrementalWisdomExtractor:
+    """Extracts wisdom section by section as transcript chunks complete"""
+
+    def __init__(self, custom_prompt: Optional[str] = None, knowledge_base: Optional[Dict[str, str]] = None,
+                 ai_provider: Optional[str] = None, ai_model: Optional[str] = None,
+                 section_chunks: int = 3, max_workers: int = 2):
+        self.custom_prompt = custom_prompt
+        self.knowledge_base = knowledge_base
+        self.ai_provider = ai_provider
+        self.ai_model = ai_model
+        self.section_chunks = max(1, section_chunks)
+        self.max_workers = max_workers
+
+        self.sections: List[WisdomSection] = []
+        self.transcription_finished_at: Optional[float] = None
+        self._order: List[int] = []
+        self._completed: Dict[int, str] = {}
+        self._frontier = 0        # position in _order of the first incomplete chunk
+        self._section_start = 0   # position in _order where the next section begins
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self, chunk_indices: Iterable[int]) -> None:
+        """Register the chunk indices that make up the transcript, in order"""
+        self._order = sorted(chunk_indices)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="wisdom")
+
+    def add_chunk(self, chunk_index: int, transcript: Optional[str]) -> None:
+        """Record a finished chunk; failed chunks should pass ``None``"""
+        with self._lock:
+            self._completed[chunk_index] = transcript or ""
+            while self._frontier < len(self._order) and self._order[self._frontier] in self._completed:
+                self._frontier += 1
+            if self._frontier - self._section_start >= self.section_chunks:
+                self._submit_section(self._frontier)
+
+    def _submit_section(self, end: int) -> None:
+        """Submit chunks ``_order[_section_start:end]`` for extraction (lock held)"""
+        indices = self._order[self._section_start:end]
+        self._section_start = end
+        text = " ".join(t for t in (self._completed[i] for i in indices) if t).strip()
+        if not text or self._executor is None:
+            return
+
+        # copy_context keeps usage accounting attributed to the current job
+        future = self._executor.submit(
+            contextvars.copy_context().run, generate_wisdom, text,
+            custom_prompt=self.custom_prompt, knowledge_base=self.knowledge_base,
+            ai_provider=self.ai_provider, ai_model=self.ai_model
+        )
+        self.sections.append(WisdomSection(indices[0], indices[-1], time.monotonic(), future))
+        logger.info(f"Started wisdom extraction for chunks {indices[0]}-{indices[-1]}")
+
+    def finalize(self) -> str:
+        """Extract the remaining tail and merge all sections into the final wisdom"""
+        with self._lock:
+            self.transcription_finished_at = time.monotonic()
+            # Chunks that never reported are treated as failed
+            self._frontier = len(self._order)
+            if self._section_start < self._frontier:
+                self._submit_section(self._frontier)
+            sections = list(self.sections)
+
+        try:
+            section_wisdom = []
+            for section in sections:
+                wisdom = section.future.result()
+                if wisdom and not wisdom.startswith("Error"):
+                    section_wisdom.append(wisdom)
+                else:
+                    logger.warning(
+                        f"Wisdom extraction failed for chunks {section.first_chunk}-{section.last_chunk}: {wisdom}"
+                    )
+        finally:
+            self.shutdown()
+
+        if not section_wisdom:
+            return "Error: wisdom extraction failed for every transcript section"
+        if len(section_wisdom) == 1:
+            return section_wisdom[0]
+        return merge_wisdom(
+            section_wisdom, custom_prompt=self.custom_prompt, knowledge_base=self.knowledge_base,
+            ai_provider=self.ai_provider, ai_model=self.ai_model
+        )
+
+    def shutdown(self) -> None:
+        """Release worker threads, abandoning sections that have not started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def report(self) -> Dict[str, int]:
+        """How many sections were extracted before transcription finished"""
+        finished = self.transcription_finished_at
+        early = sum(1 for s in self.sections if finished is None or s.submitted_at < finished)
+        return {"sections": len(self.sections), "sections_started_during_transcription": early}
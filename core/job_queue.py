@@ -0,0 +1,449 @@
+"""
+Durable Job Queue for WhisperForge
+==================================
+
+SQLite-backed queue so uploads are processed by worker processes instead of
+inline in the Streamlit request thread. No external service is needed, and
+queued or in-flight jobs survive app restarts:
+
+- **Leases / visibility timeout**: a worker leases a job for
+  ``job_visibility_timeout`` seconds and renews the lease while it runs. If
+  the worker dies, the lease expires and the job becomes visible again.
+- **Retries**: failed or expired jobs are retried with exponential backoff
+  up to ``job_max_attempts`` attempts, then marked failed.
+- **Ordering**: each user's jobs start in submission order (FIFO); among
+  the head jobs of all users, the highest priority is leased first.
+- **Cancellation**: ``cancel`` drops a queued job; a running job is marked
+  ``cancelling`` and its worker, which polls for that, cancels the job's
+  ``CancellationToken`` and records it as ``cancelled``.
+
+Run workers with ``python whisperforge_cli.py queue worker --processes 4``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cancellation import CancellationToken
+from .config import get_config
+from .metrics_exporter import registry, start_metrics_server
+from .pipeline_engine import PIPELINE_STEPS, PipelineJob, cleanup_job_audio, run_job
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    user_id TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    payload TEXT NOT NULL,
+    results TEXT,
+    error TEXT,
+    current_step TEXT,
+    step_index INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker_id TEXT,
+    leased_until REAL,
+    available_at REAL NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, status, seq);
+"""
+
+# Head-of-line job per user: no earlier queued job for the same user
+LEASE_CANDIDATE = """
+SELECT seq, job_id FROM jobs AS j
+WHERE j.status = 'queued' AND j.available_at <= :now
+  AND (j.user_id IS NULL OR NOT EXISTS (
+      SELECT 1 FROM jobs AS e
+      WHERE e.status = 'queued' AND e.user_id = j.user_id AND e.seq < j.seq
+  ))
+ORDER BY j.priority DESC, j.seq ASC
+LIMIT 1
+"""
+
+# Running jobs: a cancelling job keeps its lease until the worker stops it
+ACTIVE_STATUSES = "('running', 'cancelling')"
+CANCEL_POLL_SECONDS = 2.0
+RETRY_BACKOFF_SECONDS = 10
+MAX_BACKOFF_SECONDS = 300
+
+queue_jobs = registry.gauge("whisperforge_queue_jobs", "Queue jobs by status", ("status",))
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before retry number ``attempts``"""
+    return min(MAX_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+class JobQueue:
+    """SQLite job queue shared by the app and any number of worker processes"""
+
+    def __init__(self, path: Optional[str] = None, visibility_timeout: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        config = get_config()
+        self.path = str(path or config.job_queue_path)
+        self.visibility_timeout = visibility_timeout or config.job_visibility_timeout
+        self.max_attempts = max_attempts or config.job_max_attempts
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the queue safe across processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    # -- producer side -----------------------------------------------------
+
+    def submit(self, job: PipelineJob, priority: int = 0) -> str:
+        """Enqueue a job; higher ``priority`` is leased first across users.
+
+        Resubmitting a finished job id (e.g. to resume it from checkpoints)
+        queues it again; a job that is still queued or running is left as is.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, user_id, priority, payload, max_attempts, available_at, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id) DO UPDATE SET status = 'queued', priority = excluded.priority, "
+                "payload = excluded.payload, results = NULL, error = NULL, current_step = NULL, step_index = 0, "
+                "attempts = 0, worker_id = NULL, leased_until = NULL, available_at = excluded.available_at, "
+                "submitted_at = excluded.submitted_at, started_at = NULL, finished_at = NULL "
+                "WHERE jobs.status IN ('completed', 'failed', 'cancelled')",
+                (job.job_id, job.user_id, priority, json.dumps(job.to_dict()), self.max_attempts, now, now),
+            )
+        logger.info(f"Queued job {job.job_id} (user={job.user_id}, priority={priority})")
+        return job.job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status in the same shape as ``PipelineEngine.status``"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._status_dict(row) if row else None
+
+    def results(self, job_id: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT results FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row["results"]) if row and row["results"] else {}
+
+    def list_jobs(self, user_id: Optional[str] = None, status: Optional[str] = None,
+                  limit: int = 100) -> List[Dict[str, Any]]:
+        query, params = "SELECT * FROM jobs WHERE 1=1", []
+        if user_id is not None:
+            query, params = query + " AND user_id = ?", params + [user_id]
+        if status is not None:
+            query, params = query + " AND status = ?", params + [status]
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY seq DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._status_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def cancel(self, job_id: str, reason: str = "cancelled by user") -> bool:
+        """Cancel a job; False if it is unknown or already finished"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] not in ("queued", "running"):
+                return False
+            if row["status"] == "queued":
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', error = ?, finished_at = ? WHERE job_id = ?",
+                    (reason, now, job_id),
+                )
+            else:
+                conn.execute("UPDATE jobs SET status = 'cancelling', error = ? WHERE job_id = ?", (reason, job_id))
+        logger.info(f"Cancel requested for job {job_id}: {reason}")
+        return True
+
+    def cancel_requested(self, job_id: str) -> Optional[str]:
+        """The cancel reason if the job is being cancelled, else None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, error FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != "cancelling":
+            return None
+        return row["error"] or "cancelled"
+
+    @staticmethod
+    def _status_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "job_id": row["job_id"],
+            "user_id": row["user_id"],
+            "status": row["status"],
+            "current_step": row["current_step"],
+            "step_index": row["step_index"],
+            "error": row["error"],
+            "priority": row["priority"],
+            "attempts": row["attempts"],
+            "submitted_at": row["submitted_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "progress": round(row["step_index"] / len(PIPELINE_STEPS) * 100, 1),
+        }
+
+    # -- worker side -------------------------------------------------------
+
+    def lease(self, worker_id: str) -> Optional[PipelineJob]:
+        """Lease the next eligible job, or None when nothing is ready"""
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            candidate = conn.execute(LEASE_CANDIDATE, {"now": now}).fetchone()
+            if candidate is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, leased_until = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?) WHERE seq = ?",
+                (worker_id, now + self.visibility_timeout, now, candidate["seq"]),
+            )
+            payload = conn.execute("SELECT payload FROM jobs WHERE seq = ?", (candidate["seq"],)).fetchone()
+        return PipelineJob.from_dict(json.loads(payload["payload"]))
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        """Make jobs whose worker stopped renewing its lease visible again"""
+        expired = conn.execute(
+            "SELECT seq, job_id, status, attempts, max_attempts FROM jobs "
+            f"WHERE status IN {ACTIVE_STATUSES} AND leased_until < ?",
+            (now,),
+        ).fetchall()
+        for row in expired:
+            if row["status"] == "cancelling":
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', worker_id = NULL, finished_at = ? WHERE seq = ?",
+                    (now, row["seq"]),
+                )
+            elif row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'lease expired', worker_id = NULL, "
+                    "finished_at = ? WHERE seq = ?", (now, row["seq"]),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker_id = NULL, leased_until = NULL, "
+                    "available_at = ? WHERE seq = ?", (now + retry_delay(row["attempts"]), row["seq"]),
+                )
+            logger.warning(f"Lease expired for job {row['job_id']} (attempt {row['attempts']})")
+
+    def heartbeat(self, job_id: str, worker_id: str, current_step: Optional[str] = None,
+                  step_index: Optional[int] = None, results: Optional[Dict[str, Any]] = None) -> bool:
+        """Renew the lease (and record progress); False if the lease was lost"""
+        assignments, params = ["leased_until = ?"], [time.time() + self.visibility_timeout]
+        if step_index is not None:
+            assignments += ["current_step = ?", "step_index = ?"]
+            params += [current_step, step_index]
+        if results is not None:
+            assignments.append("results = ?")
+            params.append(json.dumps(results, default=str))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = ? AND worker_id = ? "
+                f"AND status IN {ACTIVE_STATUSES}",
+                params + [job_id, worker_id],
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, results: Dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'completed', results = ?, error = NULL, current_step = NULL, "
+                "step_index = ?, leased_until = NULL, finished_at = ? "
+                f"WHERE job_id = ? AND worker_id = ? AND status IN {ACTIVE_STATUSES}",
+                (json.dumps(results, default=str), len(PIPELINE_STEPS), time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str,
+             results: Optional[Dict[str, Any]] = None) -> str:
+        """Record a failed attempt; returns the job's new status"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, attempts, max_attempts FROM jobs "
+                f"WHERE job_id = ? AND worker_id = ? AND status IN {ACTIVE_STATUSES}",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                return "lost"
+            encoded = json.dumps(results, default=str) if results is not None else None
+            if row["status"] == "cancelling":
+                # Never retry a job the user cancelled
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', results = COALESCE(?, results), current_step = NULL, "
+                    "leased_until = NULL, finished_at = ? WHERE job_id = ?",
+                    (encoded, now, job_id),
+                )
+                return "cancelled"
+            if row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, results = COALESCE(?, results), "
+                    "leased_until = NULL, finished_at = ? WHERE job_id = ?",
+                    (error, encoded, now, job_id),
+                )
+                return "failed"
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, worker_id = NULL, leased_until = NULL, "
+                "current_step = NULL, step_index = 0, available_at = ? WHERE job_id = ?",
+                (error, now + retry_delay(row["attempts"]), job_id),
+            )
+            return "queued"
+
+
+class QueueWorker:
+    """Leases jobs and runs them through the headless pipeline"""
+
+    def __init__(self, queue: JobQueue, worker_id: Optional[str] = None, poll_interval: float = 1.0):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        """Process jobs until stopped (or ``max_jobs`` ran); returns jobs processed"""
+        processed = 0
+        while not self.stop_event.is_set() and (max_jobs is None or processed < max_jobs):
+            job = self.queue.lease(self.worker_id)
+            if job is None:
+                self.stop_event.wait(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        return processed
+
+    def process(self, job: PipelineJob) -> str:
+        """Run one leased job, renewing its lease until it finishes"""
+        logger.info(f"Worker {self.worker_id} running job {job.job_id}")
+        done = threading.Event()
+        token = CancellationToken()
+        renewer = threading.Thread(target=self._renew_lease, args=(job.job_id, done, token), daemon=True)
+        renewer.start()
+        try:
+            # Audio is kept until the final attempt so retries can re-read it
+            outcome = run_job({**job.to_dict(), "cleanup_audio": False},
+                              on_event=lambda event: self._record_progress(job.job_id, event), token=token)
+        finally:
+            done.set()
+            renewer.join()
+            token.release()
+
+        if outcome["error"] is None:
+            self.queue.complete(job.job_id, self.worker_id, outcome["results"])
+            status = "completed"
+        else:
+            error = f"{outcome['failed_step']}: {outcome['error']}"
+            status = self.queue.fail(job.job_id, self.worker_id, error, outcome["results"])
+        if status in ("completed", "failed", "cancelled"):
+            cleanup_job_audio(job, outcome["results"], cancelled=status == "cancelled")
+        logger.info(f"Job {job.job_id} {status}")
+        return status
+
+    def _renew_lease(self, job_id: str, done: threading.Event, token: CancellationToken) -> None:
+        """Renew the lease every third of the visibility timeout; poll for cancels in between"""
+        interval = max(1.0, self.queue.visibility_timeout / 3)
+        renew_at = time.monotonic() + interval
+        while not done.wait(min(CANCEL_POLL_SECONDS, interval)):
+            reason = self.queue.cancel_requested(job_id)
+            if reason:
+                token.cancel(reason)
+            if time.monotonic() < renew_at:
+                continue
+            renew_at = time.monotonic() + interval
+            if not self.queue.heartbeat(job_id, self.worker_id):
+                logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}")
+                return
+
+    def _record_progress(self, job_id: str, event: Dict[str, Any]) -> None:
+        step = event["step"] if event["event"] == "step_started" else None
+        self.queue.heartbeat(job_id, self.worker_id, current_step=step, step_index=event["step_index"],
+                             results=event.get("results"))
+
+
+def _worker_main(path: str, worker_id: str, metrics_port: int = 0) -> None:
+    """Entry point of one worker process"""
+    start_metrics_server(metrics_port)
+    worker = QueueWorker(JobQueue(path), worker_id=worker_id)
+    # Finish the current job on SIGTERM/SIGINT, then exit
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: worker.stop_event.set())
+    worker.run()
+
+
+def run_workers(processes: Optional[int] = None, path: Optional[str] = None) -> None:
+    """Start ``processes`` worker processes (default: one per core) and wait for them"""
+    processes = processes or os.cpu_count() or 1
+    path = str(path or get_config().job_queue_path)
+    job_queue = JobQueue(path)  # create the schema before workers race to
+    # Queue depth on METRICS_PORT, each worker's own metrics on the ports after it
+    metrics_port = get_config().metrics_port
+    if start_metrics_server(metrics_port):
+        queue_jobs.set_function(lambda: {(status,): count for status, count in job_queue.counts().items()})
+    workers = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(path, f"{socket.gethostname()}:w{i}", metrics_port + i + 1 if metrics_port else 0),
+            daemon=False,
+        )
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {processes} queue workers on {path}")
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # Workers received the signal too and exit after their current job
+        logger.info("Waiting for queue workers to finish their current job")
+        for worker in workers:
+            worker.join()
+
+
+# Global queue instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the job queue for this process"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
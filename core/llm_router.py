@@ -0,0 +1,549 @@
+"""
+LLM Provider Router for WhisperForge
+====================================
+
+Maps each pipeline step to a provider/model policy and routes chat
+completions across the configured AI providers (OpenAI, Anthropic, Grok).
+
+The router keeps rolling latency and error statistics per provider, skips
+providers whose circuit is open or whose ``rate_limits`` are exhausted, and
+fails over to the next candidate on errors or timeouts so that a single slow
+or failing vendor does not stall the pipeline.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .cancellation import JobCancelled, abortable_client, current_token
+from .config import get_config
+from .cost_accounting import (
+    UsageRecord, cache_write_tokens_from_usage, estimate_llm_cost, estimate_tokens, record_usage, usage_token_counts,
+)
+from .fair_scheduler import get_scheduler
+from .instrumentation import instrumented
+from .prompt_layout import PromptLayout, cached_tokens_from_usage
+from .tracing import span
+from .utils import get_anthropic_client, get_grok_api_key, get_openai_client
+
+logger = logging.getLogger(__name__)
+
+GROK_BASE_URL = "https://api.x.ai/v1"
+
+# Provider names as they appear in the UI ("OpenAI") map onto config names.
+PROVIDER_ALIASES = {
+    "openai": "openai",
+    "anthropic": "anthropic",
+    "claude": "anthropic",
+    "grok": "grok",
+    "xai": "grok",
+}
+
+
+class LLMRouterError(Exception):
+    """Raised when no provider could serve a completion request"""
+
+
+@dataclass
+class LLMResponse:
+    """Result of a routed chat completion"""
+
+    text: str
+    provider: str
+    model: str
+    latency: float
+    usage: Any = None
+    finish_reason: Optional[str] = None
+    cached_tokens: int = 0
+    attempts: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StepPolicy:
+    """Provider/model preference for a single pipeline step"""
+
+    provider: str = "openai"
+    model: Optional[str] = None
+    fallbacks: List[Tuple[str, Optional[str]]] = field(
+        default_factory=lambda: [("anthropic", None), ("grok", None)]
+    )
+    timeout: float = 120.0
+    tier: str = "default"  # key into each provider's ``models`` map, e.g. "fast"
+
+    def candidates(self) -> List[Tuple[str, Optional[str]]]:
+        """Primary provider followed by the fallbacks, without duplicates"""
+        seen = set()
+        ordered = []
+        for provider, model in [(self.provider, self.model)] + list(self.fallbacks):
+            provider = normalize_provider(provider)
+            if provider not in seen:
+                seen.add(provider)
+                ordered.append((provider, model))
+        return ordered
+
+
+DEFAULT_STEP_POLICIES: Dict[str, StepPolicy] = {
+    "wisdom_extraction": StepPolicy(),
+    "outline_creation": StepPolicy(),
+    "article_writing": StepPolicy(timeout=180.0),
+    "article_transitions": StepPolicy(),
+    "social_media": StepPolicy(),
+    "image_prompts": StepPolicy(),
+    "social_and_images": StepPolicy(),
+    "editor_critique": StepPolicy(),
+}
+
+# Model tier per step for each named policy (selected with MODEL_POLICY).
+# "quality" runs every step on the full model; "tiered" keeps it for the
+# user-facing wisdom and article and sends intermediate artifacts to the
+# fast tier; "economy" keeps only the article on the full model.
+MODEL_POLICIES: Dict[str, Dict[str, str]] = {
+    "quality": {},
+    "tiered": {
+        "outline_creation": "fast",
+        "article_transitions": "fast",
+        "social_media": "fast",
+        "image_prompts": "fast",
+        "social_and_images": "fast",
+        "editor_critique": "fast",
+    },
+    "economy": {
+        "wisdom_extraction": "fast",
+        "outline_creation": "fast",
+        "article_transitions": "fast",
+        "social_media": "fast",
+        "image_prompts": "fast",
+        "social_and_images": "fast",
+        "editor_critique": "fast",
+    },
+}
+
+
+def build_step_policies(name: str) -> Dict[str, StepPolicy]:
+    """Step policies for a named model policy from ``MODEL_POLICIES``"""
+    if name not in MODEL_POLICIES:
+        raise ValueError(f"Unknown model policy '{name}'. Choose from: {', '.join(MODEL_POLICIES)}")
+    tiers = MODEL_POLICIES[name]
+    return {
+        step: replace(policy, tier=tiers.get(step, policy.tier))
+        for step, policy in DEFAULT_STEP_POLICIES.items()
+    }
+
+
+def normalize_provider(provider: Optional[str]) -> str:
+    """Normalise a provider name such as "OpenAI" to its config key"""
+    if not provider:
+        return "openai"
+    return PROVIDER_ALIASES.get(provider.strip().lower(), provider.strip().lower())
+
+
+class ProviderStats:
+    """Rolling latency/error statistics and circuit breaker for one provider"""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 200,
+                 error_threshold: float = 0.5, min_samples: int = 4,
+                 cooldown_seconds: float = 30.0):
+        self.window_seconds = window_seconds
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.cooldown_seconds = cooldown_seconds
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+        self._ewma_latency: Optional[float] = None
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, latency, success))
+            if success:
+                if self._ewma_latency is None:
+                    self._ewma_latency = latency
+                else:
+                    self._ewma_latency = 0.3 * latency + 0.7 * self._ewma_latency
+            self._trim(now)
+            total = len(self._samples)
+            errors = sum(1 for _, _, ok in self._samples if not ok)
+            if total >= self.min_samples and errors / total >= self.error_threshold:
+                self._open_until = now + self.cooldown_seconds
+
+    def _trim(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+
+    @property
+    def ewma_latency(self) -> Optional[float]:
+        return self._ewma_latency
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, _, ok in self._samples if not ok) / len(self._samples)
+
+    @property
+    def is_open(self) -> bool:
+        """True while the circuit breaker is tripped"""
+        return time.monotonic() < self._open_until
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ewma_latency": self._ewma_latency,
+            "error_rate": self.error_rate,
+            "samples": len(self._samples),
+            "circuit_open": self.is_open,
+        }
+
+
+class RateLimiter:
+    """Sliding one-minute window enforcing a provider's ``rate_limits``"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self._calls: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        if not self.requests_per_minute:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            while self._calls and now - self._calls[0] >= 60.0:
+                self._calls.popleft()
+            if len(self._calls) >= self.requests_per_minute:
+                return False
+            self._calls.append(now)
+            return True
+
+    def seconds_until_available(self) -> float:
+        if not self.requests_per_minute:
+            return 0.0
+        with self._lock:
+            if len(self._calls) < self.requests_per_minute:
+                return 0.0
+            return max(0.0, 60.0 - (time.monotonic() - self._calls[0]))
+
+
+class ProviderRouter:
+    """Routes chat completions to providers according to per-step policies"""
+
+    def __init__(self, policies: Optional[Dict[str, StepPolicy]] = None,
+                 latency_slack: float = 1.5, max_wait_seconds: float = 30.0):
+        self.policies = dict(DEFAULT_STEP_POLICIES)
+        if policies:
+            self.policies.update(policies)
+        self.latency_slack = latency_slack
+        self.max_wait_seconds = max_wait_seconds
+        self.stats: Dict[str, ProviderStats] = {}
+        self.limiters: Dict[str, RateLimiter] = {}
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Policy and provider helpers
+    # ------------------------------------------------------------------
+
+    def get_policy(self, step: str, provider: Optional[str] = None,
+                   model: Optional[str] = None) -> StepPolicy:
+        """Resolve the policy for a step, applying caller overrides.
+
+        An explicitly selected model always wins; without one, the step runs
+        on the selected provider's model for the step's tier.
+        """
+        policy = self.policies.get(step, StepPolicy())
+        if provider or model:
+            primary = normalize_provider(provider) if provider else policy.provider
+            fallbacks = [(p, m) for p, m in policy.candidates() if p != primary]
+            policy = StepPolicy(
+                provider=primary,
+                model=model or (policy.model if primary == policy.provider else None),
+                fallbacks=fallbacks,
+                timeout=policy.timeout,
+                tier=policy.tier,
+            )
+        return policy
+
+    def _provider_config(self, provider: str):
+        return getattr(get_config(), provider, None)
+
+    def _default_model(self, provider: str, tier: str = "default") -> Optional[str]:
+        provider_config = self._provider_config(provider)
+        if provider_config is None:
+            return None
+        return provider_config.models.get(tier) or provider_config.models.get("default")
+
+    def _get_stats(self, provider: str) -> ProviderStats:
+        with self._lock:
+            if provider not in self.stats:
+                self.stats[provider] = ProviderStats()
+            return self.stats[provider]
+
+    def _get_limiter(self, provider: str) -> RateLimiter:
+        with self._lock:
+            if provider not in self.limiters:
+                provider_config = self._provider_config(provider)
+                rpm = provider_config.rate_limits.get("requests_per_minute") if provider_config else None
+                self.limiters[provider] = RateLimiter(rpm)
+            return self.limiters[provider]
+
+    def _get_client(self, provider: str):
+        """Return a cached SDK client for the provider, or None if unconfigured"""
+        with self._lock:
+            if provider in self._clients:
+                return self._clients[provider]
+        if provider == "openai":
+            client = get_openai_client()
+        elif provider == "anthropic":
+            client = get_anthropic_client()
+        elif provider == "grok":
+            client = None
+            api_key = get_grok_api_key()
+            if api_key:
+                try:
+                    import openai
+                    provider_config = self._provider_config("grok")
+                    base_url = (provider_config.base_url if provider_config else None) or GROK_BASE_URL
+                    client = openai.OpenAI(api_key=api_key, base_url=base_url)
+                except Exception as e:
+                    logger.error(f"Error initializing Grok client: {e}")
+        else:
+            client = None
+        if client is not None:
+            with self._lock:
+                self._clients[provider] = client
+        return client
+
+    def reset_clients(self) -> None:
+        """Drop cached SDK clients (e.g. after API keys change)"""
+        with self._lock:
+            self._clients.clear()
+
+    def _order_candidates(self, policy: StepPolicy) -> List[Tuple[str, str]]:
+        """Order the policy's candidates by health and rolling latency.
+
+        The primary provider stays first unless an alternative with known
+        latency is faster by more than ``latency_slack``. Providers with an
+        open circuit are kept as a last resort.
+        """
+        scored = []
+        for position, (provider, model) in enumerate(policy.candidates()):
+            model = model or self._default_model(provider, policy.tier)
+            if not model:
+                continue
+            stats = self._get_stats(provider)
+            latency = stats.ewma_latency
+            if latency is None:
+                score = 0.0 if position == 0 else float("inf")
+            else:
+                score = latency if position == 0 else latency * self.latency_slack
+            scored.append((stats.is_open, score, position, provider, model))
+        scored.sort()
+        return [(provider, model) for _, _, _, provider, model in scored]
+
+    # ------------------------------------------------------------------
+    # Completion
+    # ------------------------------------------------------------------
+
+    def complete(self, step: str, system_prompt: Optional[str] = None,
+                 user_content: Optional[str] = None, max_tokens: int = 1500,
+                 provider: Optional[str] = None, model: Optional[str] = None,
+                 layout: Optional[PromptLayout] = None, json_schema: Optional[Dict[str, Any]] = None,
+                 stop: Optional[List[str]] = None, **kwargs) -> LLMResponse:
+        """Run a chat completion for ``step``, failing over between providers.
+
+        Pass either ``system_prompt``/``user_content`` or a ``PromptLayout``
+        whose shared prefix lets the provider reuse cached prompt tokens.
+        ``json_schema`` (``{"name": ..., "schema": ...}``) requests
+        schema-constrained JSON; the response text is the JSON document.
+        ``stop`` sequences end generation early on every provider. Each
+        attempt waits for the current user's fair turn at an LLM slot.
+
+        Inside a job's cancellation scope the call timeout is capped by the
+        step deadline, and cancelling the job aborts the in-flight request
+        and raises ``JobCancelled`` instead of failing over.
+        """
+        if layout is None:
+            layout = PromptLayout(system=system_prompt or "", task=user_content or "")
+        policy = self.get_policy(step, provider, model)
+        candidates = self._order_candidates(policy)
+        attempts: List[str] = []
+        errors: List[str] = []
+        token = current_token()
+        # Scheduling cost in thousands of tokens, so short calls overtake long ones
+        cost = (estimate_tokens(layout.system + layout.task + (layout.context or "")) + max_tokens) / 1000
+
+        pending = [(p, m) for p, m in candidates if self._get_client(p) is not None]
+        if not pending:
+            raise LLMRouterError("No AI provider API key is configured")
+
+        deadline = time.monotonic() + self.max_wait_seconds
+        while pending:
+            rate_limited = []
+            for provider_name, model_name in pending:
+                if token is not None:
+                    token.raise_if_cancelled()
+                if not self._get_limiter(provider_name).try_acquire():
+                    rate_limited.append((provider_name, model_name))
+                    continue
+
+                attempts.append(f"{provider_name}/{model_name}")
+                stats = self._get_stats(provider_name)
+                start = time.perf_counter()
+                try:
+                    # A fair-share slot is held only for the request itself, not across
+                    # rate-limit waits or the other failover attempts
+                    with get_scheduler("llm").slot(cost=cost):
+                        start = time.perf_counter()
+                        response = self._call_provider(
+                            provider_name, model_name, layout,
+                            max_tokens, token.bound_timeout(policy.timeout) if token else policy.timeout,
+                            json_schema=json_schema, stop=stop, **kwargs
+                        )
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    latency = time.perf_counter() - start
+                    stats.record(latency, False)
+                    errors.append(f"{provider_name}: {e}")
+                    logger.warning(
+                        f"LLM call failed for {step} via {provider_name}/{model_name} "
+                        f"after {latency:.1f}s: {e}"
+                    )
+                    continue
+
+                latency = time.perf_counter() - start
+                stats.record(latency, True)
+                response.latency = latency
+                response.attempts = attempts
+                response.cached_tokens = cached_tokens_from_usage(response.usage)
+                self._record_usage(step, response)
+                return response
+
+            if not rate_limited:
+                break
+            wait = min(self._get_limiter(p).seconds_until_available() for p, _ in rate_limited)
+            if time.monotonic() + wait > deadline:
+                errors.append("rate limit exceeded for: " + ", ".join(p for p, _ in rate_limited))
+                break
+            logger.info(f"All providers rate limited for {step}; waiting {wait:.1f}s")
+            if token is not None:
+                if token.wait(max(wait, 0.05)):
+                    token.raise_if_cancelled()
+            else:
+                time.sleep(max(wait, 0.05))
+            pending = rate_limited
+
+        raise LLMRouterError(f"All providers failed for {step}: " + "; ".join(errors))
+
+    def _call_provider(self, provider: str, model: str, layout: PromptLayout,
+                       max_tokens: int, timeout: float, json_schema: Optional[Dict[str, Any]] = None,
+                       stop: Optional[List[str]] = None, **kwargs) -> LLMResponse:
+        with span(f"llm.{provider}", kind="http", provider=provider, model=model, max_tokens=max_tokens) as call, \
+                abortable_client(self._get_client(provider), timeout) as client:
+            response = self._request(client, provider, model, layout, max_tokens, timeout,
+                                     json_schema=json_schema, stop=stop, **kwargs)
+            call.set_attribute("finish_reason", response.finish_reason)
+            return response
+
+    @instrumented()
+    def _request(self, client: Any, provider: str, model: str, layout: PromptLayout,
+                 max_tokens: int, timeout: float, json_schema: Optional[Dict[str, Any]] = None,
+                 stop: Optional[List[str]] = None, **kwargs) -> LLMResponse:
+        if provider == "anthropic":
+            if stop:
+                kwargs["stop_sequences"] = stop
+            if json_schema:
+                # Anthropic has no JSON mode; a forced tool call yields schema-shaped input
+                kwargs["tools"] = [{"name": json_schema["name"], "input_schema": json_schema["schema"]}]
+                kwargs["tool_choice"] = {"type": "tool", "name": json_schema["name"]}
+            response = client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                **layout.anthropic_request(),
+                timeout=timeout,
+                **kwargs
+            )
+            tool_inputs = [block.input for block in response.content if getattr(block, "type", None) == "tool_use"]
+            if json_schema and tool_inputs:
+                text = json.dumps(tool_inputs[0])
+            else:
+                text = "".join(getattr(block, "text", "") for block in response.content)
+            return LLMResponse(
+                text=text, provider=provider, model=model, latency=0.0,
+                usage=getattr(response, "usage", None),
+                finish_reason=getattr(response, "stop_reason", None),
+            )
+
+        if stop:
+            kwargs["stop"] = stop
+        if json_schema:
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": json_schema["name"], "schema": json_schema["schema"], "strict": True},
+            }
+        response = client.chat.completions.create(
+            model=model,
+            messages=layout.openai_messages(),
+            max_tokens=max_tokens,
+            timeout=timeout,
+            **kwargs
+        )
+        choice = response.choices[0]
+        return LLMResponse(
+            text=choice.message.content, provider=provider, model=model, latency=0.0,
+            usage=getattr(response, "usage", None),
+            finish_reason=getattr(choice, "finish_reason", None),
+        )
+
+    def _record_usage(self, step: str, response: LLMResponse) -> None:
+        """Report tokens, latency and estimated cost of the call"""
+        try:
+            prompt_tokens, completion_tokens = usage_token_counts(response.usage, response.cached_tokens)
+            cache_write_tokens = cache_write_tokens_from_usage(response.usage)
+            record_usage(UsageRecord(
+                step=step,
+                provider=response.provider,
+                model=response.model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=response.cached_tokens,
+                cache_write_tokens=cache_write_tokens,
+                latency=response.latency,
+                cost_usd=estimate_llm_cost(
+                    response.model, prompt_tokens, completion_tokens, response.cached_tokens, cache_write_tokens
+                ),
+            ))
+        except Exception as e:
+            logger.debug(f"Failed to record token usage for {step}: {e}")
+
+    def get_provider_status(self) -> Dict[str, Dict[str, Any]]:
+        """Rolling statistics per provider, for health pages and debugging"""
+        with self._lock:
+            providers = list(self.stats)
+        return {provider: self._get_stats(provider).snapshot() for provider in providers}
+
+
+# Global router instance
+_router: Optional[ProviderRouter] = None
+
+
+def get_llm_router() -> ProviderRouter:
+    """Get the global provider router"""
+    global _router
+    if _router is None:
+        _router = ProviderRouter(policies=build_step_policies(get_config().model_policy))
+    return _router
+
+
+def set_llm_router(router: Optional[ProviderRouter]) -> None:
+    """Replace the global provider router (mainly for tests)"""
+    global _router
+    _router = router
@@ -1,16 +1,234 @@
 """
 Enhanced Logging Configuration for WhisperForge
 Provides structured logging with different levels and contexts
+
+Logging never touches a file on the calling thread: the ``whisperforge``
+logger only has a ``QueueHandler``, and a ``BatchingQueueListener`` thread
+drains the queue and hands records to the console, log-file, error-file and
+structured JSONL handlers in batches (one write per file per batch).
+
+Log files live in ``LOG_DIR`` under fixed names and rotate when they pass
+``LOG_MAX_BYTES`` or are ``LOG_ROTATE_SECONDS`` old. Several processes (queue
+workers) can share the files: batches are appended with ``O_APPEND``,
+rotation happens under a file lock, and a process whose file was rotated by
+another reopens it. ``scripts/benchmark_logging.py`` measures the per-event
+cost on the calling thread.
 """
 
+import atexit
 import logging
-import sys
+import logging.handlers
 import os
+import queue
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
 import json
 import traceback
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from .config import get_config
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation falls back to unlocked
+    fcntl = None
+
+
+class BatchingRotatingFileHandler(logging.Handler):
+    """Appends batches of records to a file that rotates by size and age.
+
+    Rotated files are renamed ``<name>.<YYYYmmdd-HHMMSS>`` and only the
+    newest ``backup_count`` are kept. The file is opened on the first write.
+    """
+
+    def __init__(self, path, max_bytes: int = 0, rotate_seconds: int = 0, backup_count: int = 7,
+                 level: int = logging.NOTSET):
+        super().__init__(level)
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self._stream = None
+        self._inode = None
+        self._period = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emit_batch([record])
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + "\n")
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        data = "".join(lines).encode("utf-8", "backslashreplace")
+        with self.lock:
+            try:
+                self._prepare(len(data))
+                # One O_APPEND write per batch keeps lines whole across processes
+                os.write(self._stream, data)
+            except Exception:
+                self.handleError(records[-1])
+
+    def _prepare(self, incoming: int) -> None:
+        """Open, reopen (rotated by another process) or rotate the file before a write"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if self._stream is not None and (current is None or current.st_ino != self._inode):
+            self._close_stream()
+        if current is not None and self._rotation_due(current, incoming):
+            self._rotate(incoming)
+        if self._stream is None:
+            self._open()
+
+    def _rotation_due(self, stat: os.stat_result, incoming: int) -> bool:
+        if self.max_bytes and stat.st_size and stat.st_size + incoming > self.max_bytes:
+            return True
+        # Age counts from the last write, so a file another process already rotated is left alone
+        return bool(self.rotate_seconds) and int(stat.st_mtime // self.rotate_seconds) < self._current_period()
+
+    def _current_period(self) -> int:
+        return int(time.time() // self.rotate_seconds) if self.rotate_seconds else 0
+
+    def _rotate(self, incoming: int) -> None:
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        with open(lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another process may have rotated while we waited for the lock
+                try:
+                    current = os.stat(self.path)
+                except FileNotFoundError:
+                    return
+                if not self._rotation_due(current, incoming):
+                    return
+                self._close_stream()
+                stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+                target, n = self.path.with_name(f"{self.path.name}.{stamp}"), 1
+                while target.exists():
+                    target, n = self.path.with_name(f"{self.path.name}.{stamp}.{n}"), n + 1
+                os.rename(self.path, target)
+                self._prune()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _prune(self) -> None:
+        rotated = sorted(self.path.parent.glob(self.path.name + ".2*"), key=lambda p: p.stat().st_mtime)
+        for old in rotated[:max(len(rotated) - self.backup_count, 0)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._inode = os.fstat(self._stream).st_ino
+
+    def _close_stream(self) -> None:
+        if self._stream is not None:
+            os.close(self._stream)
+            self._stream = None
+
+    def close(self) -> None:
+        with self.lock:
+            self._close_stream()
+        super().close()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats the ``structured`` dict attached to a record as one JSON line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(getattr(record, "structured", None) or {"message": record.getMessage()}, default=str)
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message and traceback now (arguments may change later), without copying the record"""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None  # don't keep the frames alive in the queue
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that drains up to ``batch_size`` records at a time and
+    passes them to handlers with ``emit_batch`` in one call"""
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int = 256,
+                 source: Optional[DroppingQueueHandler] = None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.source = source
+        self._reported_drops = 0
+
+    def _monitor(self) -> None:
+        has_task_done = hasattr(self.queue, "task_done")
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            stopping = any(record is self._sentinel for record in batch)
+            records = [record for record in batch if record is not self._sentinel]
+            if records:
+                self.handle_batch(records)
+            if has_task_done:
+                for _ in batch:
+                    self.queue.task_done()
+            if stopping:
+                break
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        records = [self.prepare(record) for record in records] + self._drop_notice()
+        for handler in self.handlers:
+            accepted = [r for r in records if r.levelno >= handler.level and handler.filter(r)]
+            if not accepted:
+                continue
+            if hasattr(handler, "emit_batch"):
+                handler.emit_batch(accepted)
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+    def _drop_notice(self) -> List[logging.LogRecord]:
+        dropped = self.source.dropped if self.source else 0
+        if dropped == self._reported_drops:
+            return []
+        notice = logging.LogRecord("whisperforge", logging.WARNING, __file__, 0,
+                                   f"Log queue full: dropped {dropped - self._reported_drops} records", None, None)
+        self._reported_drops = dropped
+        return [notice]
+
 
 class WhisperForgeLogger:
     """Enhanced logger with context and structured output"""
@@ -18,20 +236,26 @@ class WhisperForgeLogger:
     def __init__(self, name: str = "whisperforge"):
         self.name = name
         self.logger = logging.getLogger(name)
+        self.structured_logger = logging.getLogger(f"{name}.structured")
+        self.listener: Optional[BatchingQueueListener] = None
         self.setup_logging()
     
     def setup_logging(self):
-        """Configure logging with multiple handlers and formats"""
+        """Route the logger through a queue to batching, rotating handlers"""
         
+        self.stop()
+        config = get_config()
+        logs_dir = Path(config.log_dir)
+
         # Clear existing handlers
         self.logger.handlers.clear()
+        self.structured_logger.handlers.clear()
         
         # Set base level
         self.logger.setLevel(logging.DEBUG)
-        
-        # Create logs directory
-        logs_dir = Path("logs")
-        logs_dir.mkdir(exist_ok=True)
+        self.structured_logger.setLevel(logging.INFO)
+        # Structured events go only to the JSONL file
+        self.structured_logger.propagate = False
         
         # Console handler with color coding
         console_handler = logging.StreamHandler(sys.stdout)
@@ -41,29 +265,51 @@ class WhisperForgeLogger:
             datefmt='%H:%M:%S'
         )
         console_handler.setFormatter(console_formatter)
+        console_handler.addFilter(lambda record: not hasattr(record, "structured"))
         
+        rotation = {
+            "max_bytes": config.log_max_bytes,
+            "rotate_seconds": config.log_rotate_seconds,
+            "backup_count": config.log_backup_count,
+        }
+
         # File handler for all logs
-        file_handler = logging.FileHandler(
-            logs_dir / f"whisperforge_{datetime.now().strftime('%Y%m%d')}.log"
-        )
-        file_handler.setLevel(logging.DEBUG)
+        file_handler = BatchingRotatingFileHandler(logs_dir / "whisperforge.log", level=logging.DEBUG, **rotation)
         file_formatter = logging.Formatter(
             '%(asctime)s | %(levelname)s | %(name)s | %(funcName)s:%(lineno)d | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
+        file_handler.addFilter(lambda record: not hasattr(record, "structured"))
         
         # Error handler for critical issues
-        error_handler = logging.FileHandler(
-            logs_dir / f"errors_{datetime.now().strftime('%Y%m%d')}.log"
-        )
-        error_handler.setLevel(logging.ERROR)
+        error_handler = BatchingRotatingFileHandler(logs_dir / "errors.log", level=logging.ERROR, **rotation)
         error_handler.setFormatter(file_formatter)
+        error_handler.addFilter(lambda record: not hasattr(record, "structured"))
+
+        # Structured JSONL events
+        structured_handler = BatchingRotatingFileHandler(logs_dir / "structured.jsonl", **rotation)
+        structured_handler.setFormatter(JsonLinesFormatter())
+        structured_handler.addFilter(lambda record: hasattr(record, "structured"))
         
-        # Add handlers
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
+        # Only the queue handler runs on the calling thread
+        log_queue: queue.Queue = queue.Queue(maxsize=config.log_queue_size)
+        self.queue_handler = DroppingQueueHandler(log_queue)
+        self.listener = BatchingQueueListener(
+            log_queue, console_handler, file_handler, error_handler, structured_handler,
+            source=self.queue_handler,
+        )
+        self.logger.addHandler(self.queue_handler)
+        self.structured_logger.addHandler(self.queue_handler)
+        self.listener.start()
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
     
     def log_pipeline_step(self, step: str, status: str, data: Optional[Dict] = None):
         """Log pipeline step with structured data"""
@@ -158,14 +404,8 @@ class WhisperForgeLogger:
         })
     
     def _log_structured(self, data: Dict[str, Any]):
-        """Log structured data to JSON file"""
-        json_log_file = Path("logs") / f"structured_{datetime.now().strftime('%Y%m%d')}.jsonl"
-        
-        try:
-            with open(json_log_file, "a") as f:
-                f.write(json.dumps(data) + "\n")
-        except Exception as e:
-            self.logger.error(f"Failed to write structured log: {e}")
+        """Queue structured data for the JSONL file (serialised on the listener thread)"""
+        self.structured_logger.info(data.get("event") or data.get("step") or "event", extra={"structured": data})
 
     # -------------------------------------------------------------------
     # Delegation helpers
@@ -194,11 +434,14 @@ class ColoredFormatter(logging.Formatter):
     
     def format(self, record):
         log_color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
+        # Color a copy: the file handlers format the same record after this one
+        record = logging.makeLogRecord(record.__dict__)
         record.levelname = f"{log_color}{record.levelname}{self.COLORS['RESET']}"
         return super().format(record)
 
 # Global logger instance
 logger = WhisperForgeLogger()
+atexit.register(logger.stop)
 
 # Convenience functions
 def log_pipeline_step(step: str, status: str, data: Optional[Dict] = None):
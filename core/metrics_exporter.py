@@ -1,78 +1,504 @@
-"""Minimal metrics exporter used in tests.
+"""
+Prometheus Metrics for WhisperForge
+===================================
+
+A small thread-safe registry of counters, gauges and fixed-bucket
+histograms with labels. Observations only update per-label totals and
+bucket counts, so memory stays bounded however long the process runs.
+
+``export_prometheus_metrics`` renders the Prometheus text exposition
+format with the series ``monitoring/grafana_dashboard.json`` queries, and
+``start_metrics_server`` serves it on ``/metrics`` when ``METRICS_PORT``
+is set:
 
-This module records request and pipeline metrics and can output them in either a
-Prometheus-like text format or as JSON.  It is intentionally lightweight and has
-no external dependencies.
+    track_pipeline("background", duration=42.0, success=True)
+    start_metrics_server()      # http://0.0.0.0:$METRICS_PORT/metrics
+
+Gauges that describe current state (health, CPU, memory, scheduler slots)
+are computed from callbacks when scraped.
 """
 
 from __future__ import annotations
 
+import bisect
 import json
-from typing import Any, Dict, List
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .config import get_config
+from .health_check import health_checker
+
+logger = logging.getLogger(__name__)
+
+# Seconds; requests are sub-second to a few seconds, pipelines minutes to an hour
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PIPELINE_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """Base of the metric types: a name, help text and per-label-set values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def label_sets(self) -> List[Dict[str, str]]:
+        """Label sets observed so far"""
+        with self._lock:
+            return [self._labels(key) for key in sorted(self._values)]
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            values = {(): 0.0}
+        return [(self.name, self._labels(key), float(value)) for key, value in sorted(values.items())]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{name} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """Value that goes up and down, set directly or computed at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._function: Optional[Callable[[], Any]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Any]) -> None:
+        """Compute the gauge when scraped: ``function`` returns a number (or
+        None to omit it), or for labelled gauges a ``{label tuple: value}`` dict"""
+        self._function = function
+
+    def samples(self) -> List[Sample]:
+        if self._function is None:
+            return super().samples()
+        try:
+            value = self._function()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} callback failed: {e}")
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [(self.name, {}, float(value))]
+        return [(self.name, self._labels(tuple(str(v) for v in key)), float(val))
+                for key, val in sorted(value.items())]
+
+    def value(self, **labels: Any) -> float:
+        key = self._key(labels)
+        for _, sample_labels, value in self.samples():
+            if tuple(sample_labels.values()) == key:
+                return value
+        return 0.0
+
+
+class Histogram(Metric):
+    """Observations counted into fixed cumulative buckets, plus their sum and count"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not yet cumulative) counts with +Inf last, then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            states = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        if not states and not self.labelnames:
+            states = {(): ([0] * (len(self.buckets) + 1), 0.0)}
+        samples: List[Sample] = []
+        for key, (counts, total) in sorted(states.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        """Sum, count and cumulative bucket counts of one label set"""
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, [[0] * (len(self.buckets) + 1), 0.0])
+            counts = list(counts)
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            buckets[_format_value(bound)] = cumulative
+        return {"sum": total, "count": cumulative, "buckets": buckets}
+
+
+class MetricsRegistry:
+    """Named metrics, registered once and rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
 
+    def _register(self, cls, name: str, *args, **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
 
-metrics_exporter: Dict[str, Any] = {
-    "counters": {},
-    "gauges": {},
-    "histograms": {},
-    "requests": [],
-    "pipelines": [],
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+registry = MetricsRegistry()
+metrics_exporter = registry  # older imports
+
+http_requests = registry.counter(
+    "whisperforge_http_requests_total", "HTTP requests by method, path and status", ("method", "path", "status"))
+request_duration = registry.histogram(
+    "whisperforge_request_duration_seconds", "HTTP request duration in seconds", buckets=REQUEST_BUCKETS)
+pipeline_duration = registry.histogram(
+    "whisperforge_pipeline_duration_seconds", "Pipeline duration in seconds", ("pipeline",), PIPELINE_BUCKETS)
+pipeline_success = registry.counter(
+    "whisperforge_pipeline_success_total", "Pipelines that completed", ("pipeline",))
+pipeline_failure = registry.counter(
+    "whisperforge_pipeline_failure_total", "Pipelines that failed", ("pipeline",))
+database_response_time = registry.gauge(
+    "whisperforge_database_response_time_ms", "Duration of the most recent database call in milliseconds")
+step_duration = registry.histogram(
+    "whisperforge_step_duration_seconds", "Pipeline step duration in seconds", ("step", "status"), PIPELINE_BUCKETS)
+stage_resources = {
+    "rss_peak_mb": registry.gauge(
+        "whisperforge_stage_peak_rss_bytes", "Peak process RSS during the last run of a large-file stage",
+        ("pipeline", "stage")),
+    "open_fds_peak": registry.gauge(
+        "whisperforge_stage_peak_open_fds", "Peak open file descriptors during the last run of a large-file stage",
+        ("pipeline", "stage")),
+    "temp_bytes_peak": registry.gauge(
+        "whisperforge_stage_peak_temp_bytes", "Peak temp directory bytes during the last run of a large-file stage",
+        ("pipeline", "stage")),
+    "child_cpu_seconds": registry.gauge(
+        "whisperforge_stage_child_cpu_seconds", "FFmpeg/child CPU seconds in the last run of a large-file stage",
+        ("pipeline", "stage")),
+}
+registry.gauge("whisperforge_active_users_1h", "Users active in the last hour").set_function(
+    health_checker.active_users.count)
+
+AI_USAGE_FIELDS = (
+    ("ai_calls_total", "calls", "AI provider calls"),
+    ("ai_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent to LLM providers"),
+    ("ai_completion_tokens_total", "completion_tokens", "Completion tokens generated by LLM providers"),
+    ("ai_cached_prompt_tokens_total", "cached_tokens", "Prompt tokens served from provider cache"),
+    ("ai_cache_write_tokens_total", "cache_write_tokens", "Prompt tokens written to the provider cache"),
+    ("ai_audio_seconds_total", "audio_seconds", "Audio seconds sent for transcription"),
+    ("ai_cost_usd_total", "cost_usd", "Estimated AI spend in USD"),
+)
+ai_usage = {
+    field_name: registry.counter(f"whisperforge_{metric}", description, ("step", "provider", "model"))
+    for metric, field_name, description in AI_USAGE_FIELDS
 }
 
 
 def track_request(duration: float, status_code: int, method: str, path: str) -> None:
-    metrics_exporter["requests"].append(
-        {
-            "duration": duration,
-            "status_code": status_code,
-            "method": method,
-            "path": path,
-        }
-    )
-    metrics_exporter["counters"]["http_requests_total"] = (
-        metrics_exporter["counters"].get("http_requests_total", 0) + 1
-    )
-    metrics_exporter["histograms"].setdefault("http_request_duration_seconds", []).append(duration)
+    http_requests.inc(method=method, path=path, status=status_code)
+    request_duration.observe(duration)
+    health_checker.record_request(duration, status_code)
+
+
+@contextmanager
+def timed_request(method: str, path: str) -> Iterator[None]:
+    """``track_request`` for the enclosed block; an exception is recorded as a 500.
+
+    Exceptions outside ``Exception`` (Streamlit's rerun and stop signals)
+    end the request normally.
+    """
+    started = time.perf_counter()
+    status_code = 200
+    try:
+        yield
+    except Exception:
+        status_code = 500
+        raise
+    finally:
+        track_request(time.perf_counter() - started, status_code, method, path)
 
 
 def track_pipeline(name: str, duration: float, success: bool) -> None:
-    metrics_exporter["pipelines"].append(
-        {
-            "name": name,
-            "duration": duration,
-            "success": success,
-        }
-    )
-    key = "pipeline_success_total" if success else "pipeline_failure_total"
-    metrics_exporter["counters"][key] = metrics_exporter["counters"].get(key, 0) + 1
-    metrics_exporter["histograms"].setdefault(f"pipeline_{name}_duration", []).append(duration)
+    pipeline_duration.observe(duration, pipeline=name)
+    (pipeline_success if success else pipeline_failure).inc(pipeline=name)
+    health_checker.record_pipeline(duration, success)
 
 
-def export_prometheus_metrics() -> str:
-    """Return metrics in a very small Prometheus text exposition format."""
+def track_step(step: str, duration: float, success: bool) -> None:
+    step_duration.observe(duration, step=step, status="ok" if success else "error")
+    health_checker.record_step(step, duration, success)
+
+
+@contextmanager
+def timed_step(step: str) -> Iterator[None]:
+    """``track_step`` for the enclosed block; an exception records a failed step"""
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        yield
+        succeeded = True
+    finally:
+        track_step(step, time.perf_counter() - started, succeeded)
+
+
+def track_active_user(user_id: Optional[str]) -> None:
+    if user_id:
+        health_checker.record_user(str(user_id))
+
+
+def track_database_time(duration_ms: float) -> None:
+    database_response_time.set(duration_ms)
+
+
+def track_stage_resources(pipeline: str, usage: Any) -> None:
+    """Export the peaks of one large-file stage (a ``resource_monitor.StageUsage``)"""
+    labels = {"pipeline": pipeline, "stage": usage.stage}
+    stage_resources["rss_peak_mb"].set(usage.rss_peak_mb * 1024 * 1024, **labels)
+    stage_resources["open_fds_peak"].set(usage.open_fds_peak, **labels)
+    stage_resources["temp_bytes_peak"].set(usage.temp_bytes_peak, **labels)
+    stage_resources["child_cpu_seconds"].set(usage.child_cpu_seconds, **labels)
+
+
+def track_ai_usage(record: Any) -> None:
+    """Accumulate tokens, audio seconds and estimated cost per step/provider/model."""
 
-    lines = [
-        "# HELP whisperforge_http_requests_total Number of HTTP requests",
-        "# TYPE whisperforge_http_requests_total counter",
-        f"whisperforge_http_requests_total {len(metrics_exporter['requests'])}",
-        "# HELP whisperforge_pipeline_success_total Pipeline success count",
-        "# TYPE whisperforge_pipeline_success_total counter",
-    ]
+    labels = {"step": record.step, "provider": record.provider, "model": record.model}
+    ai_usage["calls"].inc(**labels)
+    for _, field_name, _ in AI_USAGE_FIELDS[1:]:
+        ai_usage[field_name].inc(max(getattr(record, field_name) or 0, 0), **labels)
 
-    success_count = sum(1 for p in metrics_exporter["pipelines"] if p["success"])
-    lines.append(f"whisperforge_pipeline_success_total {success_count}")
 
-    return "\n".join(lines)
+class _CpuSampler:
+    """Process CPU percent (of one core) since the previous scrape"""
+
+    def __init__(self):
+        self._last = (time.monotonic(), sum(os.times()[:2]))
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            now, cpu = time.monotonic(), sum(os.times()[:2])
+            last_now, last_cpu = self._last
+            self._last = (now, cpu)
+        return 100.0 * (cpu - last_cpu) / max(now - last_now, 1e-6)
+
+
+def _cpu_usage() -> Callable[[], float]:
+    try:
+        import psutil
+
+        process = psutil.Process()
+        process.cpu_percent(None)  # prime the first interval
+        return lambda: process.cpu_percent(None)
+    except ImportError:
+        return _CpuSampler()
+
+
+def _memory_usage_percent() -> Optional[float]:
+    """Resident memory of this process as a percent of physical memory"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_percent()
+    except ImportError:
+        pass
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * page_size
+        return 100.0 * rss / (os.sysconf("SC_PHYS_PAGES") * page_size)
+    except (OSError, ValueError, AttributeError):
+        return None  # not Linux; omit the series
+
+
+def _scheduler_gauge(field_name: str) -> Callable[[], Dict[LabelKey, float]]:
+    def collect() -> Dict[LabelKey, float]:
+        from .fair_scheduler import scheduler_snapshots
+
+        values = {}
+        for snapshot in scheduler_snapshots():
+            value = snapshot[field_name]
+            values[(snapshot["name"],)] = sum(value.values()) if isinstance(value, dict) else value
+        return values
+    return collect
+
+
+registry.gauge("whisperforge_health_status", "1 when the service is healthy, 0 while an SLO fails").set_function(
+    lambda: 1.0 if health_checker.get_health_status().status == "healthy" else 0.0)
+registry.gauge("whisperforge_slo_compliance_percentage", "Percent of SLOs currently met").set_function(
+    health_checker.slo_compliance)
+registry.gauge("whisperforge_cpu_usage_percent", "Process CPU usage percent").set_function(_cpu_usage())
+registry.gauge("whisperforge_memory_usage_percent", "Process resident memory percent").set_function(
+    _memory_usage_percent)
+registry.gauge("whisperforge_scheduler_slots_in_use", "Scheduler slots held", ("resource",)).set_function(
+    _scheduler_gauge("in_use"))
+registry.gauge("whisperforge_scheduler_waiting", "Requests waiting for a slot", ("resource",)).set_function(
+    _scheduler_gauge("waiting"))
+
+
+def export_prometheus_metrics() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+
+    return registry.render()
 
 
 def export_json_metrics() -> Dict[str, Any]:
     """Return the metrics as a JSON-serialisable object."""
 
-    return json.loads(json.dumps(
-        {
-            "counters": metrics_exporter["counters"],
-            "gauges": metrics_exporter["gauges"],
-            "histograms": metrics_exporter["histograms"],
-        }
-    ))
+    data: Dict[str, Dict[str, Any]] = {"counters": {}, "gauges": {}, "histograms": {}}
+    for metric in registry.metrics():
+        if isinstance(metric, Histogram):
+            data["histograms"][metric.name] = [
+                {"labels": labels, **metric.snapshot(**labels)} for labels in metric.label_sets()
+            ]
+        else:
+            group = data["counters"] if isinstance(metric, Counter) else data["gauges"]
+            group[metric.name] = [{"labels": labels, "value": value} for _, labels, value in metric.samples()]
+    return json.loads(json.dumps(data))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = export_prometheus_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics scrape: " + format % args)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
 
+def start_metrics_server(port: Optional[int] = None, addr: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve ``/metrics`` on a daemon thread (once per process); None when disabled or the port is taken"""
+    global _server
+    config = get_config()
+    port = config.metrics_port if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((addr or config.metrics_addr, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"Could not serve metrics on port {port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Serving Prometheus metrics on :{port}/metrics")
+        return _server
@@ -14,6 +14,10 @@ import uuid
 from contextlib import contextmanager
 from typing import Any, Dict, Optional
 
+from .instrumentation import get_instrumentation
+from .metrics_exporter import track_active_user
+from .tracing import span
+
 
 logger = logging.getLogger(__name__)
 
@@ -61,11 +65,12 @@ def set_trace_context(user_id: Optional[str] = None, operation: Optional[str] =
 
 @contextmanager
 def trace_operation(operation: str, user_id: Optional[str] = None):
-    """Context manager that logs a trace when the block executes."""
+    """Context manager that logs a trace and records a span for the block."""
 
     trace_id = set_trace_context(user_id=user_id, operation=operation)
     try:
-        yield trace_id
+        with span(operation, user_id=user_id):
+            yield trace_id
     finally:
         structured_logger.info(
             "trace operation finished",
@@ -97,11 +102,12 @@ error_tracker = ErrorTracker()
 class PerformanceTracker:
     @contextmanager
     def track_operation(self, name: str):
-        start = time.time()
+        start = time.perf_counter()
         try:
-            yield
+            with span(name):
+                yield
         finally:
-            duration = time.time() - start
+            duration = time.perf_counter() - start
             structured_logger.info(
                 "operation timing",
                 extra={"operation": name, "duration": duration},
@@ -125,16 +131,13 @@ performance_tracker = PerformanceTracker()
 
 
 def monitor_function(name: str):
-    """Decorator that times the wrapped function using ``PerformanceTracker``."""
-
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            with performance_tracker.track_operation(name):
-                return func(*args, **kwargs)
+    """Decorator that counts and times calls of the wrapped function as ``name``.
 
-        return wrapper
+    Goes through ``core.instrumentation``: no logging per call, and the
+    function is returned unwrapped unless its module is in ``INSTRUMENT_MODULES``.
+    """
 
-    return decorator
+    return get_instrumentation().instrument(name)
 
 
 # ---------------------------------------------------------------------------
@@ -155,6 +158,7 @@ def track_performance(operation: str, duration: float) -> None:
 
 
 def track_user_action(action: str, user_id: Optional[str] = None) -> None:
+    track_active_user(user_id)
     structured_logger.info("user action", extra={"action": action, "user_id": user_id})
 
 
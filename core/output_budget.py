@@ -0,0 +1,111 @@
+"""
+Output Budgets for WhisperForge
+===============================
+
+Per-step ``max_tokens`` derived from the input size, an optional content
+template (e.g. ``templates/podcast_show_notes.md``) and an optional target
+length, instead of a fixed 1500/2000 for every job. Short clips no longer
+pay for padded output and long talks get room for a complete article.
+
+Budgets are a ceiling, not a target: generation also stops early at
+``END_MARKER`` (passed as a stop sequence), and output cut off at the limit
+is continued rather than regenerated (see ``content_generation._complete``).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import get_config
+from .cost_accounting import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+END_MARKER = "<<END>>"
+END_MARKER_INSTRUCTIONS = f"\n\nWhen the content is complete, write {END_MARKER} on its own line."
+
+# Finish reasons meaning the output hit max_tokens (OpenAI/Grok, Anthropic)
+TRUNCATED_FINISH_REASONS = {"length", "max_tokens"}
+
+TOKENS_PER_WORD = 1.4
+# Parallel parts (article sections) get an even share of the output plus
+# headroom, since outline sections are rarely the same length
+PART_HEADROOM = 1.5
+TEMPLATES_DIR = Path("templates")
+
+
+@dataclass
+class OutputProfile:
+    """How a step's output budget scales"""
+
+    min_tokens: int
+    max_tokens: int
+    input_ratio: float = 0.0    # output tokens per input token
+    per_section: int = 0        # tokens per template section
+
+
+STEP_OUTPUT_PROFILES: Dict[str, OutputProfile] = {
+    "wisdom_extraction": OutputProfile(400, 2000, input_ratio=0.08),
+    "outline_creation": OutputProfile(300, 1500, input_ratio=0.05),
+    "article_writing": OutputProfile(800, 4000, input_ratio=0.25, per_section=350),
+    "article_transitions": OutputProfile(100, 1500, input_ratio=0.4),
+    "social_media": OutputProfile(900, 1800),
+    "image_prompts": OutputProfile(400, 1000),
+    "social_and_images": OutputProfile(1300, 2500),
+    "editor_critique": OutputProfile(300, 800),
+}
+
+
+def load_template(template: Optional[str]) -> Optional[str]:
+    """Template text from a path, a name under ``templates/`` or the text itself"""
+    if not template:
+        return None
+    for candidate in (Path(template), TEMPLATES_DIR / template, TEMPLATES_DIR / f"{template}.md"):
+        try:
+            if candidate.is_file():
+                return candidate.read_text(encoding="utf-8")
+        except OSError:
+            continue
+    if "\n" in template:
+        return template
+    logger.warning(f"Content template not found: {template}")
+    return None
+
+
+def template_sections(template_text: Optional[str]) -> int:
+    """Number of ``##`` sections the template asks for"""
+    if not template_text:
+        return 0
+    return len(re.findall(r"^##\s+\S", template_text, re.MULTILINE))
+
+
+def max_tokens_for(step: str, input_text: str = "", template_text: Optional[str] = None,
+                   target_words: Optional[int] = None, default: int = 1500, parts: int = 1) -> int:
+    """Output token budget for a step, clamped to the step's profile.
+
+    With ``parts`` > 1 the step's output is written as that many parallel
+    calls (article sections), and the budget is for one of them.
+    """
+    profile = STEP_OUTPUT_PROFILES.get(step)
+    if profile is None:
+        return default
+    if not get_config().adaptive_max_tokens:
+        return profile.max_tokens
+
+    if target_words:
+        # Headroom over the requested length for headings and markdown
+        budget = int(target_words * TOKENS_PER_WORD * 1.2)
+    else:
+        budget = profile.min_tokens + int(estimate_tokens(input_text) * profile.input_ratio)
+        sections = template_sections(template_text)
+        if sections and profile.per_section:
+            budget = max(profile.min_tokens, sections * profile.per_section)
+    if parts > 1:
+        # Split the unclamped whole, so many sections together may exceed one call's ceiling
+        part_floor = profile.per_section or profile.min_tokens
+        return max(part_floor, min(profile.max_tokens, int(budget / parts * PART_HEADROOM)))
+    return max(profile.min_tokens, min(profile.max_tokens, budget))
@@ -0,0 +1,882 @@
+"""
+Headless Pipeline Engine for WhisperForge
+=========================================
+
+Runs the content pipeline outside Streamlit. ``StreamingPipelineController``
+keeps its state in ``st.session_state`` and advances one step per rerun, so
+processing is tied to a browser tab; the engine instead runs each submitted
+job to completion on a background thread (or process) pool:
+
+    engine = get_pipeline_engine()
+    job_id = engine.submit(PipelineJob(audio_path="talk.mp3", user_id=user_id))
+    engine.status(job_id)    # {"status": "running", "current_step": ..., "progress": 40.0}
+    engine.results(job_id)   # step results so far, keyed like the controller's
+
+Pages poll ``status``/``results`` (see ``StreamingPipelineController.start_background``)
+or ``subscribe`` to step events, and ``cancel`` stops a job: each run carries a
+``CancellationToken`` with the job deadline, and each step a child token
+with the step deadline. Nothing in this module imports Streamlit.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional
+
+from .article_sections import compose_article
+from .audio_chunks import (
+    AUDIO_BYTES_PER_SECOND, WHISPER_MAX_BYTES, ChunkingError, create_chunks, probe_duration, transcribe_chunks,
+    transcribe_scheduled,
+)
+from .cancellation import CancellationToken, DeadlineExceeded, JobCancelled, cancellation_scope
+from .checkpoints import Checkpoint, CheckpointStore, content_hash, file_sha256, get_checkpoint_store
+from .config import get_config
+from .content_generation import (
+    generate_article, generate_image_prompt_set, generate_image_prompts, generate_outline,
+    generate_social_and_images, generate_social_content, generate_social_posts, generate_wisdom,
+    generate_with_structure, is_failed_output,
+)
+from .cost_accounting import JobUsage, usage_scope
+from .editor import EditorBudget, EditorialPass
+from .fair_scheduler import Tenant, admit_job, charge_usage, tenant_scope
+from .incremental_wisdom import IncrementalWisdomExtractor
+from .metrics_exporter import start_metrics_server, track_active_user, track_pipeline, track_step
+from .profiling import JobProfiler, profiling_requested
+from .resource_monitor import ResourceSampler
+from .structured_output import StructuredOutputError
+from .tracing import span
+from .transcript_digest import build_transcript_digest, transcript_for_step, uses_digest
+try:
+    from .research_enrichment import generate_research_enrichment
+except ImportError:  # research enrichment was removed in v3.0.0
+    def generate_research_enrichment(wisdom, transcript, ai_provider=None, ai_model=None, enabled=True):
+        return {"enabled": False, "entities": []}
+
+logger = logging.getLogger(__name__)
+
+# Same step ids and result keys as StreamingPipelineController.PIPELINE_STEPS
+PIPELINE_STEPS = [
+    "upload_validation", "transcription", "wisdom_extraction",
+    "research_enrichment", "outline_creation", "article_creation",
+    "social_content", "image_prompts", "editorial_review", "database_storage"
+]
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+MAX_FILE_BYTES = 2 * 1024 * 1024 * 1024  # 2GB, as EnhancedLargeFileProcessor
+
+StepCallback = Callable[[Dict[str, Any]], None]
+
+# Settings read by every generation call (transcript digest and output budget)
+GENERATION_SETTINGS = (
+    "transcript_digest_enabled", "transcript_digest_max_tokens", "full_transcript_steps",
+    "max_tokens", "adaptive_max_tokens", "max_continuations", "structured_output",
+)
+
+# What each step reads; a step's checkpoint key hashes exactly these, so
+# editing one prompt recomputes that step and only the steps downstream of it
+STEP_INPUTS: Dict[str, Dict[str, Any]] = {
+    "upload_validation": {"job": ("audio_sha256", "transcript")},
+    "transcription": {"job": ("audio_sha256", "transcript")},
+    "wisdom_extraction": {
+        "upstream": ("transcription",), "prompts": ("wisdom_extraction",), "knowledge_base": True, "model": True,
+        "settings": GENERATION_SETTINGS,
+    },
+    "research_enrichment": {
+        "upstream": ("transcription", "wisdom_extraction"), "model": True, "options": ("research_enabled",),
+    },
+    "outline_creation": {
+        "upstream": ("transcription", "wisdom_extraction"), "prompts": ("outline_creation",),
+        "knowledge_base": True, "model": True, "settings": GENERATION_SETTINGS,
+    },
+    "article_creation": {
+        "upstream": ("transcription", "wisdom_extraction", "outline_creation"), "prompts": ("article_creation",),
+        "knowledge_base": True, "model": True,
+        "settings": GENERATION_SETTINGS + ("article_mode", "article_template", "article_target_words"),
+    },
+    "social_content": {
+        "upstream": ("wisdom_extraction", "outline_creation", "article_creation"),
+        "prompts": ("social_media", "image_prompts"), "knowledge_base": True, "model": True,
+        "settings": GENERATION_SETTINGS + ("fused_artifacts",),
+    },
+    "image_prompts": {
+        "upstream": ("wisdom_extraction", "outline_creation", "social_content"), "prompts": ("image_prompts",),
+        "knowledge_base": True, "model": True, "settings": GENERATION_SETTINGS + ("fused_artifacts",),
+    },
+    "editorial_review": {
+        "upstream": ("transcription", "wisdom_extraction", "outline_creation", "article_creation",
+                     "social_content"),
+        "knowledge_base": True, "model": True, "options": ("editor_enabled", "editor_max_rounds"),
+        "settings": GENERATION_SETTINGS + ("editor_max_rounds", "editor_budget_seconds", "editor_budget_tokens"),
+    },
+    "database_storage": {
+        "upstream": ("transcription", "wisdom_extraction", "outline_creation", "article_creation",
+                     "social_content", "editorial_review"),
+        "job": ("user_id",), "options": ("save_to_database", "content_id"),
+    },
+}
+
+
+@dataclass
+class PipelineJob:
+    """Everything a job needs to run without a browser session"""
+
+    audio_path: Optional[str] = None
+    file_name: Optional[str] = None
+    transcript: Optional[str] = None      # skip transcription when already known
+    user_id: Optional[str] = None
+    prompts: Dict[str, str] = field(default_factory=dict)
+    knowledge_base: Dict[str, str] = field(default_factory=dict)
+    ai_provider: Optional[str] = None
+    ai_model: Optional[str] = None
+    # editor_enabled, research_enabled, save_to_database, deadline_seconds, step_deadline_seconds
+    options: Dict[str, Any] = field(default_factory=dict)
+    cleanup_audio: bool = False           # delete audio_path once it has been transcribed
+    audio_sha256: Optional[str] = None    # content hash, so resumes do not need the audio
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineJob":
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+@dataclass
+class JobStatus:
+    """Progress of a submitted job"""
+
+    job_id: str
+    user_id: Optional[str] = None
+    status: str = "queued"                # queued, running, completed, failed, cancelled
+    current_step: Optional[str] = None
+    step_index: int = 0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        return self.step_index / len(PIPELINE_STEPS) * 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["progress"] = round(self.progress, 1)
+        return data
+
+
+class PipelineRun:
+    """Executes the pipeline steps for one job, with no UI.
+
+    Each ``_step_<id>`` mirrors the controller step of the same name and its
+    return value is stored under ``results[<id>]``.
+    """
+
+    def __init__(self, job: PipelineJob, on_event: Optional[StepCallback] = None,
+                 checkpoints: Optional[CheckpointStore] = None, token: Optional[CancellationToken] = None):
+        self.job = job
+        self.on_event = on_event
+        self.checkpoints = checkpoints
+        config = get_config()
+        self.token = CancellationToken(
+            deadline_seconds=job.options.get("deadline_seconds", config.job_deadline_seconds), parent=token
+        )
+        self.step_deadline = job.options.get("step_deadline_seconds", config.step_deadline_seconds)
+        self.results: Dict[str, Any] = {}
+        self.resumed_steps: List[str] = []
+        self.step_decisions: List[Dict[str, str]] = []
+        self._output_hashes: Dict[str, str] = {}
+        self.usage = JobUsage(job_id=job.job_id)
+        self.current_step: Optional[str] = None
+        self.started_at = time.time()
+        self._digest = None
+        self._digest_steps: set = set()
+        self._prefetched_wisdom: Optional[str] = None
+        self.tenant = Tenant()
+        self.profiler: Optional[JobProfiler] = (
+            JobProfiler(job.job_id) if profiling_requested(job.options) else None
+        )
+
+    def run(self) -> Dict[str, Any]:
+        """Run every step in order; a step exception fails the job.
+
+        With a checkpoint store, steps whose checkpoint matches their inputs
+        (see ``STEP_INPUTS``) are restored instead of recomputed, and each
+        completed step is checkpointed, so a failed job resumes where it
+        stopped and a reprocessed one reruns only what its changes affect.
+        ``results["step_decisions"]`` records why each step ran or was reused.
+
+        Raises ``JobCancelled`` (``DeadlineExceeded`` past a deadline) between
+        or during steps once ``self.token`` is cancelled, and ``QuotaExceeded``
+        before any work if the user lacks the audio minutes. Transcription
+        and LLM calls are scheduled fairly against other users' jobs.
+
+        A profiled job (see ``core.profiling``) stores its profile report,
+        including the artifact paths, under ``results["profile"]``.
+        """
+        try:
+            if self.profiler is not None:
+                self.profiler.start()
+                try:
+                    return self._run_traced()
+                finally:
+                    self.results["profile"] = self.profiler.stop()
+            return self._run_traced()
+        finally:
+            # Closes the job's HTTP pool when this run owns the root token
+            self.token.release()
+
+    def _run_traced(self) -> Dict[str, Any]:
+        with span("job", kind="job", job_id=self.job.job_id, user_id=self.job.user_id,
+                  file_name=self.job.file_name) as job_span:
+            results = self._run_steps()
+            job_span.set_attribute("resumed_steps", len(self.resumed_steps))
+            return results
+
+    def _run_steps(self) -> Dict[str, Any]:
+        self.token.raise_if_cancelled()
+        checkpointing = self._start_checkpoints()
+        self.current_step = PIPELINE_STEPS[0]
+        self.tenant = self._admit(checkpointing)
+        for index, step in enumerate(PIPELINE_STEPS):
+            self.current_step = step
+            checkpoint, input_hash, components, reason = None, None, None, "checkpoints disabled"
+            if checkpointing:
+                components = self._step_components(step)
+                input_hash = content_hash(components)
+                checkpoint = self.checkpoints.get(self.job.job_id, step)
+                reason = explain_invalidation(checkpoint, input_hash, components)
+                if checkpoint is not None and checkpoint.input_hash != input_hash:
+                    logger.info(f"Checkpoint for {self.job.job_id}/{step} invalidated: {reason}")
+            self.token.raise_if_cancelled()
+            if checkpoint is not None and checkpoint.input_hash == input_hash:
+                outputs = checkpoint.outputs
+                self.results.update(outputs)
+                self.resumed_steps.append(step)
+            else:
+                self._emit("step_started", step, index, reason=reason)
+                outputs = self._run_step(step, input_hash, components)
+            self._output_hashes[step] = content_hash(outputs)
+            resumed = step in self.resumed_steps
+            self.step_decisions.append({"step": step, "action": "reused" if resumed else "recomputed",
+                                        "reason": reason})
+            if self.profiler is not None:
+                self.profiler.step_boundary(step)
+            self._emit("step_completed", step, index + 1, results=self.results, resumed=resumed, reason=reason)
+        self.current_step = None
+        if checkpointing:
+            self._finish_checkpoints()
+        self.results["usage"] = self.usage.summary()
+        self.results["resumed_steps"] = list(self.resumed_steps)
+        self.results["step_decisions"] = list(self.step_decisions)
+        return self.results
+
+    def _run_step(self, step: str, input_hash: Optional[str], components: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compute one step under its deadline; returns (and checkpoints) the result keys it wrote"""
+        before = dict(self.results)
+        step_token = self.token.child(deadline_seconds=self.step_deadline)
+        started, succeeded = time.perf_counter(), False
+        try:
+            with span(step, kind="step", job_id=self.job.job_id), usage_scope(self.usage), \
+                    cancellation_scope(step_token), tenant_scope(self.tenant):
+                self.results[step] = getattr(self, f"_step_{step}")()
+                # Steps report failed provider calls as text; a cancel must not pass as output
+                step_token.raise_if_cancelled()
+            succeeded = not is_failed_output(self.results[step])
+        except DeadlineExceeded:
+            raise DeadlineExceeded(f"{step} exceeded its deadline")
+        finally:
+            step_token.release()
+            # A user cancel says nothing about the step's latency SLO
+            if not step_token.cancelled:
+                track_step(step, time.perf_counter() - started, succeeded)
+        # Everything the step wrote, including side keys such as social_posts
+        outputs = {k: v for k, v in self.results.items() if k not in before or before[k] is not v}
+        outputs[step] = self.results[step]
+        if input_hash and not is_failed_output(self.results[step]):
+            with span("checkpoint.save", kind="db", step=step):
+                self.checkpoints.save(self.job.job_id, step, input_hash, outputs, components)
+        if step == "transcription" and not self.job.transcript:
+            audio_seconds = self.usage.by_step().get("transcription", {}).get("audio_seconds", 0.0)
+            charge_usage(self.job.user_id, audio_seconds / 60)
+        return outputs
+
+    def _start_checkpoints(self) -> bool:
+        """Register the job for resume; False when checkpoints are disabled"""
+        if self.checkpoints is None:
+            return False
+        job = self.job
+        if job.audio_path and not job.transcript and not job.audio_sha256 and os.path.isfile(job.audio_path):
+            job.audio_sha256 = file_sha256(job.audio_path)
+        self.checkpoints.save_job(self.job.job_id, job.to_dict())
+        return True
+
+    def _finish_checkpoints(self) -> None:
+        """Start the completed job's retention window and expire old checkpoints"""
+        try:
+            with span("checkpoint.expire", kind="db"):
+                self.checkpoints.complete_job(self.job.job_id)
+                self.checkpoints.expire()
+        except Exception as e:
+            logger.warning(f"Checkpoint retention failed for job {self.job.job_id}: {e}")
+
+    def _admit(self, checkpointing: bool) -> Tenant:
+        """Quota admission before any expensive step; returns the job's tenant"""
+        job = self.job
+        minutes = 0.0
+        transcribed = job.transcript or (checkpointing and "transcription" in self.checkpoints.steps(job.job_id))
+        if not transcribed and job.audio_path and os.path.isfile(job.audio_path):
+            try:
+                minutes = probe_duration(job.audio_path) / 60
+            except ChunkingError:
+                minutes = os.path.getsize(job.audio_path) / AUDIO_BYTES_PER_SECOND / 60
+        return admit_job(job.user_id, audio_minutes=minutes)
+
+    def _step_components(self, step: str) -> Dict[str, Any]:
+        """Hashes of everything ``step`` reads, per ``STEP_INPUTS``"""
+        spec = STEP_INPUTS[step]
+        job = self.job
+        config = get_config()
+        components: Dict[str, Any] = {"step": step}
+        if spec.get("job"):
+            components["job"] = {name: content_hash(getattr(job, name)) for name in spec["job"]}
+        if spec.get("prompts"):
+            # None means the built-in default prompt
+            components["prompts"] = {key: content_hash(job.prompts.get(key)) for key in spec["prompts"]}
+        if spec.get("knowledge_base"):
+            components["knowledge_base"] = content_hash(job.knowledge_base)
+        if spec.get("model"):
+            components["model"] = content_hash([job.ai_provider, job.ai_model, config.model_policy])
+        if spec.get("upstream"):
+            components["upstream"] = {name: self._output_hashes.get(name) for name in spec["upstream"]}
+        if spec.get("options"):
+            components["options"] = content_hash({key: job.options.get(key) for key in spec["options"]})
+        if spec.get("settings"):
+            components["settings"] = content_hash({key: getattr(config, key) for key in spec["settings"]})
+        return components
+
+    def _emit(self, event: str, step: str, step_index: int, **extra: Any) -> None:
+        if self.on_event is not None:
+            self.on_event({"event": event, "job_id": self.job.job_id, "step": step, "step_index": step_index,
+                           **extra})
+
+    def _prompt(self, step: str) -> Optional[str]:
+        return self.job.prompts.get(step)
+
+    def _provider_kwargs(self) -> Dict[str, Any]:
+        return {
+            "knowledge_base": self.job.knowledge_base,
+            "ai_provider": self.job.ai_provider,
+            "ai_model": self.job.ai_model,
+        }
+
+    def _transcript_for(self, step: str) -> str:
+        """Transcript text for a generation step (see ``transcript_digest``)"""
+        transcript = self.results["transcription"]
+        if not uses_digest(step):
+            return transcript
+        if self._digest is None:
+            self._digest = build_transcript_digest(transcript)
+        self._digest_steps.add(step)
+        return transcript_for_step(step, transcript, self._digest)
+
+    def digest_report(self) -> Dict[str, Any]:
+        if self._digest is None:
+            return {}
+        return self._digest.report(steps_using=len(self._digest_steps))
+
+    def _step_upload_validation(self) -> Dict[str, Any]:
+        if self.job.transcript:
+            return {"status": "skipped", "reason": "transcript provided"}
+        path = self.job.audio_path
+        if not path or not os.path.isfile(path):
+            raise Exception(f"Audio file not found: {path}")
+        size = os.path.getsize(path)
+        if size > MAX_FILE_BYTES:
+            raise Exception(f"File too large: {size / (1024 * 1024):.1f}MB (max 2GB)")
+        return {
+            "status": "validated",
+            "file_name": self.job.file_name or os.path.basename(path),
+            "file_size_mb": size / (1024 * 1024),
+        }
+
+    def _step_transcription(self) -> str:
+        if self.job.transcript:
+            return self.job.transcript
+        path = self.job.audio_path
+        if os.path.getsize(path) <= WHISPER_MAX_BYTES:
+            transcript = transcribe_scheduled(path)
+            if not transcript or transcript.startswith(("Transcription failed", "Error")):
+                raise Exception(f"Transcription failed: {transcript}")
+            return transcript
+        return self._transcribe_chunked(path)
+
+    def _transcribe_chunked(self, path: str) -> str:
+        """Chunk with FFmpeg, extracting wisdom while later chunks transcribe"""
+        temp_dir = tempfile.mkdtemp(prefix="whisperforge_chunks_")
+        extractor = IncrementalWisdomExtractor(custom_prompt=self._prompt("wisdom_extraction"),
+                                               **self._provider_kwargs())
+        sampler = ResourceSampler(temp_dir)
+        try:
+            with sampler.stage("chunking"):
+                chunks = create_chunks(path, temp_dir)
+            extractor.start(chunk["index"] for chunk in chunks)
+            with sampler.stage("chunk_transcription"):
+                transcript = transcribe_chunks(chunks, on_chunk=extractor.add_chunk)
+            with sampler.stage("wisdom_merge"):
+                self._prefetched_wisdom = extractor.finalize()
+            self.results["incremental_wisdom"] = extractor.report()
+            return transcript
+        finally:
+            extractor.shutdown()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            self.results["resource_usage"] = sampler.report()
+
+    def _step_wisdom_extraction(self) -> str:
+        wisdom = self._prefetched_wisdom
+        if wisdom and not wisdom.startswith("Error"):
+            return wisdom
+        return generate_wisdom(self._transcript_for("wisdom_extraction"),
+                               custom_prompt=self._prompt("wisdom_extraction"), **self._provider_kwargs())
+
+    def _step_research_enrichment(self) -> Dict[str, Any]:
+        return generate_research_enrichment(
+            wisdom=self.results["wisdom_extraction"],
+            transcript=self.results["transcription"],
+            ai_provider=self.job.ai_provider,
+            ai_model=self.job.ai_model,
+            enabled=self.job.options.get("research_enabled", True)
+        )
+
+    def _step_outline_creation(self) -> str:
+        return generate_outline(self._transcript_for("outline_creation"), self.results["wisdom_extraction"],
+                                custom_prompt=self._prompt("outline_creation"), **self._provider_kwargs())
+
+    def _step_article_creation(self) -> str:
+        return compose_article(self._transcript_for("article_writing"), self.results["wisdom_extraction"],
+                               self.results["outline_creation"], custom_prompt=self._prompt("article_creation"),
+                               **self._provider_kwargs())
+
+    def _step_social_content(self) -> str:
+        wisdom = self.results["wisdom_extraction"]
+        outline = self.results["outline_creation"]
+        article = self.results["article_creation"]
+
+        if get_config().fused_artifacts:
+            try:
+                social, images = generate_social_and_images(
+                    wisdom, outline, article, social_prompt=self._prompt("social_media"),
+                    image_prompt=self._prompt("image_prompts"), **self._provider_kwargs()
+                )
+                self.results["social_posts"] = social.to_dict()
+                self.results["image_prompt_set"] = images.to_dict()
+                self.results["image_prompts"] = images.to_markdown()
+                return social.to_markdown()
+            except StructuredOutputError as e:
+                logger.warning(f"Combined generation failed for job {self.job.job_id}, generating separately: {e}")
+
+        social, self.results["social_posts"] = generate_with_structure(
+            generate_social_posts, generate_social_content, wisdom, outline, article,
+            custom_prompt=self._prompt("social_media"), **self._provider_kwargs()
+        )
+        return social
+
+    def _step_image_prompts(self) -> str:
+        if self.results.get("image_prompts"):
+            return self.results["image_prompts"]
+        images, self.results["image_prompt_set"] = generate_with_structure(
+            generate_image_prompt_set, generate_image_prompts,
+            self.results["wisdom_extraction"], self.results["outline_creation"],
+            custom_prompt=self._prompt("image_prompts"), **self._provider_kwargs()
+        )
+        return images
+
+    def _step_editorial_review(self) -> Dict[str, Any]:
+        if not self.job.options.get("editor_enabled", False):
+            return {"status": "skipped", "reason": "editor disabled"}
+
+        provider_kwargs = self._provider_kwargs()
+        # Revisers read upstream artifacts from ``current``, which carries
+        # revisions made earlier in the same editorial round
+        revisers = {
+            "wisdom_extraction": lambda prompt, current, t=self._transcript_for("wisdom_extraction"): generate_wisdom(
+                t, custom_prompt=prompt, **provider_kwargs),
+            "outline_creation": lambda prompt, current, t=self._transcript_for("outline_creation"): generate_outline(
+                t, current["wisdom_extraction"], custom_prompt=prompt, **provider_kwargs),
+            "article_creation": lambda prompt, current, t=self._transcript_for("article_writing"): generate_article(
+                t, current["wisdom_extraction"], current["outline_creation"], custom_prompt=prompt,
+                **provider_kwargs),
+            "social_content": lambda prompt, current: generate_social_content(
+                current["wisdom_extraction"], current["outline_creation"], current["article_creation"],
+                custom_prompt=prompt, **provider_kwargs),
+        }
+
+        config = get_config()
+        editorial_pass = EditorialPass(
+            budget=EditorBudget(
+                max_rounds=self.job.options.get("editor_max_rounds", config.editor_max_rounds),
+                max_seconds=config.editor_budget_seconds,
+                max_tokens=config.editor_budget_tokens,
+            ),
+            **provider_kwargs,
+        )
+        reviewed = editorial_pass.run({key: self.results.get(key, "") for key in revisers}, revisers)
+
+        critique_keys = {
+            "wisdom_extraction": "wisdom_critique",
+            "outline_creation": "outline_critique",
+            "article_creation": "article_critique",
+            "social_content": "social_critique",
+        }
+        for key, result in reviewed.items():
+            self.results[critique_keys[key]] = result.critique
+            if result.revised:
+                self.results[key] = result.content
+
+        return {
+            "status": "reviewed",
+            "revised": [key for key, result in reviewed.items() if result.revised],
+            "approved": [key for key, result in reviewed.items() if result.critique and not result.revised],
+            "skipped": {key: result.skipped_reason for key, result in reviewed.items() if result.skipped_reason},
+            "budget": editorial_pass.report(),
+        }
+
+    def _step_database_storage(self) -> str:
+        if not self.job.user_id or not self.job.options.get("save_to_database", True):
+            return "Database save skipped"
+        try:
+            from .supabase_integration import get_supabase_client
+
+            db = get_supabase_client()
+            if not db:
+                return "Database connection failed"
+
+            results = self.results
+            record = {
+                "transcript": results.get("transcription", ""),
+                "wisdom": results.get("wisdom_extraction", ""),
+                "outline": results.get("outline_creation", ""),
+                "article": results.get("article_creation", ""),
+                "social_content": results.get("social_content", ""),
+            }
+            if self.job.options.get("content_id"):
+                # Reprocessing a Content Library item updates it in place
+                with span("supabase.content.update", kind="db"):
+                    result = db.client.table("content").update({**record, "updated_at": "now()"}).eq(
+                        "id", self.job.options["content_id"]).execute()
+            else:
+                with span("supabase.content.insert", kind="db"):
+                    result = db.client.table("content").insert({
+                        "user_id": self.job.user_id,
+                        "title": f"Content from {self.job.file_name or 'transcript'}",
+                        **record,
+                        "created_at": "now()"
+                    }).execute()
+
+            content_id = result.data[0]["id"] if result.data else ""
+            if not content_id:
+                return "Failed to save content to database"
+
+            entry = {
+                "type": "background",
+                "duration": time.time() - self.started_at,
+                "success": True,
+                "metadata": {
+                    "content_id": content_id,
+                    "job_id": self.job.job_id,
+                    "usage": self.usage.summary(),
+                    "transcript_digest": self.digest_report(),
+                    # Per-stage RSS, descriptor, temp-space and FFmpeg CPU peaks of chunked files
+                    "resource_usage": self.results.get("resource_usage", {}),
+                },
+            }
+            # Failover and tiered routing pick the model per call; log the one used most
+            provider, model = self.usage.primary_model()
+            if provider:
+                entry.update({"ai_provider": provider, "model": model})
+            with span("supabase.pipeline_logs.insert", kind="db"):
+                db.log_pipeline_execution(self.job.user_id, entry)
+            return f"Content saved with ID: {content_id}"
+
+        except Exception as e:
+            # Don't fail the pipeline for database errors
+            return f"Database save failed: {str(e)}"
+
+
+def explain_invalidation(checkpoint: Optional[Checkpoint], input_hash: str, components: Dict[str, Any]) -> str:
+    """Why a step's checkpoint can or cannot be reused (e.g. a changed prompt or upstream output)"""
+    if checkpoint is None:
+        return "no checkpoint"
+    if checkpoint.input_hash == input_hash:
+        return "inputs unchanged"
+    previous = checkpoint.components
+    if not previous:
+        return "inputs changed"
+    changes = []
+    for kind in ("job", "prompts", "upstream"):
+        old, new = previous.get(kind) or {}, components.get(kind) or {}
+        label = {"job": "input", "prompts": "prompt", "upstream": "upstream step"}[kind]
+        changes += [f"{label} '{name}' changed" for name in new if old.get(name) != new[name]]
+    for kind, label in (("knowledge_base", "knowledge base"), ("model", "model"), ("options", "options"),
+                        ("settings", "settings")):
+        if previous.get(kind) != components.get(kind):
+            changes.append(f"{label} changed")
+    return ", ".join(changes) or "inputs changed"
+
+
+def run_job(job_data: Dict[str, Any], on_event: Optional[StepCallback] = None,
+            token: Optional[CancellationToken] = None) -> Dict[str, Any]:
+    """Run a job to completion; picklable entry point for process pools and queue workers.
+
+    ``cancelled`` in the outcome is True when the job was stopped by
+    ``token`` (not by a deadline, which counts as a failure).
+    """
+    job = PipelineJob.from_dict(job_data)
+    run = PipelineRun(job, on_event=on_event, checkpoints=get_checkpoint_store(), token=token)
+    track_active_user(job.user_id)
+    try:
+        run.run()
+        track_pipeline("background", time.time() - run.started_at, success=True)
+        return {"results": run.results, "error": None, "failed_step": None, "cancelled": False}
+    except Exception as e:
+        logger.error(f"Job {job.job_id} failed in {run.current_step}: {e}")
+        if not is_cancellation(e):
+            track_pipeline("background", time.time() - run.started_at, success=False)
+        return {"results": run.results, "error": str(e), "failed_step": run.current_step,
+                "cancelled": is_cancellation(e)}
+    finally:
+        cleanup_job_audio(job, run.results, cancelled=run.token.cancelled)
+
+
+def is_cancellation(error: BaseException) -> bool:
+    """True for a user cancel; a missed deadline is reported as a failure"""
+    return isinstance(error, JobCancelled) and not isinstance(error, DeadlineExceeded)
+
+
+def cleanup_job_audio(job: PipelineJob, results: Dict[str, Any], cancelled: bool = False) -> None:
+    """Delete a job's uploaded audio once it is no longer needed.
+
+    With checkpoints enabled the audio is kept until transcription has
+    succeeded, so a job that failed earlier can still be resumed; if it never
+    is, ``CheckpointStore.expire`` deletes the audio with the stale job. A
+    cancelled job's audio is deleted straight away.
+    """
+    if not (job.cleanup_audio and job.audio_path and os.path.exists(job.audio_path)):
+        return
+    if cancelled or "transcription" in results or get_checkpoint_store() is None:
+        os.unlink(job.audio_path)
+
+
+class PipelineEngine:
+    """Runs submitted jobs concurrently, independent of any UI session.
+
+    With the default thread pool, ``status``/``results`` update after every
+    step and subscribers receive step events. With ``use_processes=True``
+    jobs run in worker processes (CPU-heavy transcription no longer shares
+    the server's GIL) and report only queued/terminal states; ``cancel``
+    then only stops jobs that have not started.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_processes: Optional[bool] = None):
+        config = get_config()
+        self.max_workers = max_workers or config.pipeline_workers
+        self.use_processes = config.pipeline_executor == "process" if use_processes is None else use_processes
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=self.max_workers) if self.use_processes
+            else ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        )
+        self._jobs: Dict[str, JobStatus] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._subscribers: Dict[str, List[StepCallback]] = {}
+        self._tokens: Dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job: PipelineJob) -> str:
+        """Queue a job and return its id; resubmitting a finished job reruns it"""
+        with self._lock:
+            existing = self._jobs.get(job.job_id)
+            if existing is not None and existing.status not in TERMINAL_STATUSES:
+                return job.job_id
+            self._jobs[job.job_id] = JobStatus(job_id=job.job_id, user_id=job.user_id)
+            self._results[job.job_id] = {}
+            self._tokens[job.job_id] = token = CancellationToken()
+        if self.use_processes:
+            future = self._executor.submit(run_job, job.to_dict())
+            future.add_done_callback(lambda f, job=job: self._finish_process_job(job, f))
+        else:
+            future = self._executor.submit(contextvars.copy_context().run, self._run_in_thread, job, token)
+        self._futures[job.job_id] = future
+        logger.info(f"Submitted pipeline job {job.job_id}")
+        return job.job_id
+
+    def _run_in_thread(self, job: PipelineJob, token: CancellationToken) -> None:
+        run = PipelineRun(job, on_event=self._on_event, checkpoints=get_checkpoint_store(), token=token)
+        with self._lock:
+            # Share the live results dict so pollers see each step as it lands
+            self._results[job.job_id] = run.results
+            status = self._jobs[job.job_id]
+            status.status = "running"
+            status.started_at = time.time()
+        try:
+            run.run()
+            self._finish(job.job_id, error=None)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed in {run.current_step}: {e}")
+            self._finish(job.job_id, error=f"{run.current_step}: {e}", cancelled=is_cancellation(e))
+        finally:
+            token.release()
+            cleanup_job_audio(job, run.results, cancelled=token.cancelled)
+
+    def _finish_process_job(self, job: PipelineJob, future: Future) -> None:
+        job_id = job.job_id
+        if future.cancelled():
+            cleanup_job_audio(job, {}, cancelled=True)
+            self._finish(job_id, error=self._tokens[job_id].reason, cancelled=True)
+            return
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = {"results": {}, "error": str(e), "failed_step": None, "cancelled": False}
+        with self._lock:
+            self._results[job_id] = outcome["results"]
+            self._jobs[job_id].step_index = len(PIPELINE_STEPS) if outcome["error"] is None else 0
+        error = outcome["error"] and f"{outcome['failed_step']}: {outcome['error']}"
+        self._finish(job_id, error=error, cancelled=outcome.get("cancelled", False))
+
+    def _finish(self, job_id: str, error: Optional[str], cancelled: bool = False) -> None:
+        with self._lock:
+            status = self._jobs[job_id]
+            status.status = "cancelled" if cancelled else "failed" if error else "completed"
+            status.error = error
+            status.current_step = None
+            status.finished_at = time.time()
+        self._publish({"event": status.status, "job_id": job_id, "error": error})
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            status = self._jobs[event["job_id"]]
+            status.step_index = event["step_index"]
+            status.current_step = event["step"] if event["event"] == "step_started" else None
+        self._publish(event)
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        for callback in list(self._subscribers.get(event["job_id"], [])):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Pipeline event subscriber failed: {e}")
+
+    def cancel(self, job_id: str, reason: str = "cancelled by user") -> bool:
+        """Stop a job: a queued job never starts, a running one stops at once.
+
+        The running step's provider requests are aborted, queued audio
+        chunks are dropped and temp files removed. Returns False if the job
+        is unknown or already finished.
+        """
+        with self._lock:
+            status = self._jobs.get(job_id)
+            if status is None or status.status in TERMINAL_STATUSES:
+                return False
+            token = self._tokens.get(job_id)
+            future = self._futures.get(job_id)
+        if token is not None:
+            token.cancel(reason)
+        if self.use_processes and future is not None:
+            future.cancel()  # only succeeds before the job starts
+        logger.info(f"Cancel requested for job {job_id}: {reason}")
+        return True
+
+    def subscribe(self, job_id: str, callback: StepCallback) -> None:
+        """Call ``callback(event)`` on each step start/completion and on finish"""
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(callback)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            status = self._jobs.get(job_id)
+            return status.to_dict() if status else None
+
+    def results(self, job_id: str) -> Dict[str, Any]:
+        """Step results so far (all of them once the job has finished)"""
+        with self._lock:
+            return dict(self._results.get(job_id, {}))
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes (or ``timeout``) and return its status"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                return self.status(job_id)
+            except Exception:
+                pass
+        # Process-pool completion callbacks may run just after result() returns
+        deadline = time.monotonic() + 1.0
+        while self.status(job_id) and self.status(job_id)["status"] not in TERMINAL_STATUSES:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        return self.status(job_id)
+
+    def list_jobs(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [s.to_dict() for s in self._jobs.values() if user_id is None or s.user_id == user_id]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def resume_job(job_id: str, backend=None) -> str:
+    """Resubmit a checkpointed job; it restarts from its first missing or
+    invalidated step. ``backend`` is the engine (default) or a ``JobQueue``."""
+    store = get_checkpoint_store()
+    payload = store.load_job(job_id) if store else None
+    if payload is None:
+        raise KeyError(f"No checkpointed job {job_id}")
+    return (backend or get_pipeline_engine()).submit(PipelineJob.from_dict(payload))
+
+
+def content_reprocess_job(item: Dict[str, Any], **job_fields: Any) -> PipelineJob:
+    """Job that regenerates a saved Content Library item from its transcript.
+
+    The job id is stable per item, so repeated reprocessing resumes from the
+    item's checkpoints and updates the saved row in place.
+    """
+    options = {**job_fields.pop("options", {}), "content_id": item["id"]}
+    return PipelineJob(
+        job_id=f"content-{item['id']}",
+        transcript=item.get("transcript") or None,
+        file_name=item.get("title"),
+        user_id=item.get("user_id"),
+        options=options,
+        **job_fields,
+    )
+
+
+# Global engine instance
+_engine: Optional[PipelineEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_pipeline_engine() -> PipelineEngine:
+    """Get or create the process-wide pipeline engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PipelineEngine()
+            start_metrics_server()
+        return _engine
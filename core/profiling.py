@@ -0,0 +1,225 @@
+"""
+Per-Job Profiling for WhisperForge
+==================================
+
+Opt-in profiling of one pipeline job, enabled with the job option
+``profile`` (``queue submit --profile``) or for every job with
+``PROFILE_JOBS=true``:
+
+- **CPU/wall time**: a sampling profiler records every busy thread's stack
+  each ``PROFILE_INTERVAL_MS`` and writes them as folded stacks
+  (``profile.folded``), the input format of flamegraph.pl, speedscope and
+  inferno. With ``PROFILE_MODE=cprofile`` (or where stack sampling is not
+  available) ``cProfile`` profiles the job thread instead (``profile.prof``).
+- **Memory**: ``tracemalloc`` snapshots at every step boundary give the
+  traced and peak memory after each step and the source lines whose
+  allocations grew the most (``allocations.txt``).
+
+Artifacts go to ``PROFILE_DIR/<job_id>/`` and their paths are stored in
+``results["profile"]``. Sampling sees the whole process, so in the app's
+thread-pool engine samples from other jobs running at the same time are
+included; queue workers run one job per process. Disabled jobs pay one
+attribute check per step.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+MAX_STACK_DEPTH = 128
+TRACEMALLOC_FRAMES = 1
+# Leaf functions of threads that are blocked waiting for work, not doing any
+IDLE_LEAVES = {"wait", "select", "poll", "accept", "_wait_for_tstate_lock", "sleep_until_work"}
+
+
+class StackSampler:
+    """Wall-clock stack sampler over every thread but its own and idle ones"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own and frame.f_code.co_name not in IDLE_LEAVES:
+                    self.stacks[self._fold(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _fold(thread_name: str, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join([thread_name.replace(";", ":")] + stack[::-1])
+
+    def folded(self) -> str:
+        """Folded stacks, one ``frame;frame;frame count`` line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# tracemalloc is process-wide; concurrent profiled jobs share it
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+def _acquire_tracemalloc() -> bool:
+    """Start tracemalloc for a job; False if something else was already tracing"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            return False
+        if _tracemalloc_users == 0:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+        return True
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+class JobProfiler:
+    """Profiles one job from ``start`` to ``stop`` and writes its artifacts"""
+
+    def __init__(self, job_id: str, directory: Optional[str] = None, mode: Optional[str] = None,
+                 interval_ms: Optional[float] = None, top: int = 15):
+        config = get_config()
+        self.job_id = job_id
+        self.directory = Path(directory or config.profile_dir) / job_id
+        self.mode = mode or config.profile_mode
+        if self.mode not in PROFILE_MODES or (self.mode == "sample" and not hasattr(sys, "_current_frames")):
+            self.mode = "cprofile"
+        self.interval = (interval_ms or config.profile_interval_ms) / 1000
+        self.top = top
+        self.steps: List[Dict[str, Any]] = []
+        self._sampler: Optional[StackSampler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._tracing = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        if self.mode == "sample":
+            self._sampler = StackSampler(self.interval)
+            self._sampler.start()
+        else:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._tracing = _acquire_tracemalloc()
+        if self._tracing:
+            self._snapshot = self._take_snapshot()
+        logger.info(f"Profiling job {self.job_id} ({self.mode})")
+
+    def step_boundary(self, step: str) -> None:
+        """Record memory after ``step`` and the lines whose allocations grew during it"""
+        if not self._tracing:
+            return
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        growth = snapshot.compare_to(self._snapshot, "lineno") if self._snapshot else []
+        self._snapshot = snapshot
+        self.steps.append({
+            "step": step,
+            "traced_mb": round(current / 1e6, 2),
+            "peak_mb": round(peak / 1e6, 2),
+            "top_allocations": [
+                {
+                    "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count_diff,
+                }
+                for stat in growth[:self.top] if stat.size_diff > 0
+            ],
+        })
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling and write the artifacts; returns the report stored with the job's results"""
+        duration = time.perf_counter() - self._started
+        artifacts: Dict[str, str] = {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        samples = 0
+        if self._sampler is not None:
+            self._sampler.stop()
+            samples = self._sampler.samples
+            path = self.directory / "profile.folded"
+            path.write_text(self._sampler.folded(), encoding="utf-8")
+            artifacts["flamegraph"] = str(path)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            path = self.directory / "profile.prof"
+            self._cprofile.dump_stats(str(path))
+            artifacts["cprofile"] = str(path)
+        if self._tracing:
+            self._snapshot = None
+            _release_tracemalloc()
+            self._tracing = False
+            path = self.directory / "allocations.txt"
+            path.write_text(self.allocation_report(), encoding="utf-8")
+            artifacts["allocations"] = str(path)
+        logger.info(f"Profile of job {self.job_id} written to {self.directory}")
+        return {
+            "mode": self.mode,
+            "duration_seconds": round(duration, 3),
+            "samples": samples,
+            "memory": [{k: v for k, v in step.items() if k != "top_allocations"} for step in self.steps],
+            "artifacts": artifacts,
+        }
+
+    def allocation_report(self) -> str:
+        lines = [f"Top allocations per step for job {self.job_id}", ""]
+        for step in self.steps:
+            lines.append(f"{step['step']}: traced {step['traced_mb']} MB, peak {step['peak_mb']} MB")
+            for allocation in step["top_allocations"]:
+                lines.append(f"  {allocation['size_kb']:>10.1f} KiB  {allocation['count']:>7} blocks  "
+                             f"{allocation['where']}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def profiling_requested(options: Dict[str, Any]) -> bool:
+    """True when the job asked to be profiled, or every job is"""
+    return bool(options.get("profile", get_config().profile_jobs))
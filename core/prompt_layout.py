@@ -0,0 +1,121 @@
+"""
+Prompt Layout for WhisperForge
+==============================
+
+Builds chat messages so that every step of a job shares a byte-identical
+prefix (system preamble + knowledge base + transcript) and only the trailing
+task block differs. Providers cache prompt prefixes, so the four or five calls
+per job only pay full input-token latency for the shared context once.
+
+Layout::
+
+    system:  SHARED_PREAMBLE + knowledge base       (stable per user)
+    user:    TRANSCRIPT block                       (stable per job)
+    user:    step instructions + step inputs        (varies per step)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+SHARED_PREAMBLE = (
+    "You are WhisperForge, an assistant that turns audio transcripts into "
+    "structured written content. The shared context for this job follows; "
+    "the specific task is given in the final message."
+)
+
+TRANSCRIPT_HEADER = "TRANSCRIPT:\n"
+
+CONTINUE_PROMPT = "Continue exactly where you stopped, without repeating anything already written."
+
+
+def format_shared_knowledge_base(knowledge_base: Optional[Dict[str, str]]) -> str:
+    """Render the knowledge base deterministically (sorted by name)"""
+    if not knowledge_base:
+        return ""
+
+    parts = [
+        "## Knowledge Base Context\n",
+        "Use the following knowledge base to inform your analysis and maintain "
+        "consistency with established perspectives:\n",
+    ]
+    for name in sorted(knowledge_base):
+        parts.append(f"### {name}")
+        parts.append(knowledge_base[name])
+        parts.append("")
+    return "\n".join(parts)
+
+
+@dataclass
+class PromptLayout:
+    """Chat prompt split into a cacheable prefix and a per-step task"""
+
+    system: str
+    task: str
+    context: Optional[str] = None
+    partial: Optional[str] = None  # output so far, when continuing a truncated response
+
+    @classmethod
+    def for_step(cls, instructions: str, inputs: str = "",
+                 knowledge_base: Optional[Dict[str, str]] = None,
+                 transcript: Optional[str] = None) -> "PromptLayout":
+        """Build the shared-prefix layout for one pipeline step"""
+        system = SHARED_PREAMBLE
+        kb_context = format_shared_knowledge_base(knowledge_base)
+        if kb_context:
+            system = f"{system}\n\n{kb_context}"
+
+        task = f"## Your Task\n\n{instructions.strip()}"
+        if inputs:
+            task = f"{task}\n\n{inputs}"
+
+        context = f"{TRANSCRIPT_HEADER}{transcript}" if transcript else None
+        return cls(system=system, task=task, context=context)
+
+    def continued(self, partial: str) -> "PromptLayout":
+        """The same prompt, asking the model to continue ``partial``"""
+        return replace(self, partial=partial)
+
+    @property
+    def prefix(self) -> str:
+        """The part of the prompt expected to be shared across steps"""
+        if self.context:
+            return f"{self.system}\n\n{self.context}"
+        return self.system
+
+    def openai_messages(self) -> List[Dict[str, Any]]:
+        """Messages for OpenAI-compatible chat completions (OpenAI, Grok)"""
+        messages = [{"role": "system", "content": self.system}]
+        if self.context:
+            messages.append({"role": "user", "content": self.context})
+        messages.append({"role": "user", "content": self.task})
+        if self.partial:
+            messages.append({"role": "assistant", "content": self.partial})
+            messages.append({"role": "user", "content": CONTINUE_PROMPT})
+        return messages
+
+    def anthropic_request(self) -> Dict[str, Any]:
+        """``system``/``messages`` kwargs for Anthropic with cache breakpoints"""
+        system = [{"type": "text", "text": self.system, "cache_control": {"type": "ephemeral"}}]
+        content = []
+        if self.context:
+            content.append({"type": "text", "text": self.context, "cache_control": {"type": "ephemeral"}})
+        content.append({"type": "text", "text": self.task})
+        messages = [{"role": "user", "content": content}]
+        if self.partial:
+            # Prefilled assistant turn: Claude continues the text directly
+            messages.append({"role": "assistant", "content": self.partial.rstrip()})
+        return {"system": system, "messages": messages}
+
+
+def cached_tokens_from_usage(usage: Any) -> int:
+    """Read the number of prompt tokens served from the provider cache"""
+    if usage is None:
+        return 0
+    # OpenAI: usage.prompt_tokens_details.cached_tokens
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is not None:
+        return int(getattr(details, "cached_tokens", 0) or 0)
+    # Anthropic: usage.cache_read_input_tokens
+    return int(getattr(usage, "cache_read_input_tokens", 0) or 0)
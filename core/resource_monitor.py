@@ -0,0 +1,178 @@
+"""
+Resource Telemetry for Large-File Processing
+============================================
+
+``ResourceSampler`` measures what each stage of large-file processing
+(saving the upload, FFmpeg chunking, chunk transcription, wisdom merge)
+costs the machine. While a stage runs, a background thread samples every
+``SAMPLE_SECONDS``:
+
+- resident memory (RSS) of this process
+- open file descriptors
+- bytes in the job's temp directory (the chunk WAVs)
+
+and each stage also records the CPU time of child processes reaped during
+it, i.e. FFmpeg/ffprobe. Stage peaks are exported as gauges and returned
+by ``report()`` for the job's results:
+
+    sampler = ResourceSampler(temp_dir, pipeline="background")
+    with sampler.stage("chunking"):
+        chunks = create_chunks(path, temp_dir)
+    results["resource_usage"] = sampler.report()
+
+Uses psutil when installed and ``/proc`` otherwise. Child CPU comes from
+``os.times()``, so FFmpeg runs of other jobs in the same process that end
+during the stage are included.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from .metrics_exporter import track_stage_resources
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SECONDS = 0.25
+MB = 1024 * 1024
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where it cannot be read"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def open_fds() -> Optional[int]:
+    """Open file descriptors of this process, or None where they cannot be counted"""
+    try:
+        import psutil
+
+        return psutil.Process().num_fds()
+    except (ImportError, AttributeError):
+        pass
+    try:
+        return len(os.listdir("/proc/self/fd")) - 1  # minus the descriptor listdir itself opened
+    except OSError:
+        return None
+
+
+def directory_bytes(path: Optional[str]) -> int:
+    """Total size of the files under ``path``; files may vanish while walking"""
+    total = 0
+    if not path:
+        return total
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def child_cpu_seconds() -> float:
+    """User + system CPU of this process's reaped children"""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def child_peak_rss_mb() -> Optional[float]:
+    """Largest RSS of any reaped child (FFmpeg) so far"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)  # KiB on Linux
+
+
+@dataclass
+class StageUsage:
+    """Resource peaks of one processing stage"""
+
+    stage: str
+    duration_seconds: float = 0.0
+    rss_start_mb: float = 0.0
+    rss_end_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+    open_fds_peak: int = 0
+    temp_bytes_peak: int = 0
+    child_cpu_seconds: float = 0.0
+    samples: int = 0
+
+    def sample(self, temp_dir: Optional[str]) -> None:
+        rss = rss_bytes()
+        if rss is not None:
+            self.rss_peak_mb = max(self.rss_peak_mb, round(rss / MB, 1))
+        fds = open_fds()
+        if fds is not None:
+            self.open_fds_peak = max(self.open_fds_peak, fds)
+        self.temp_bytes_peak = max(self.temp_bytes_peak, directory_bytes(temp_dir))
+        self.samples += 1
+
+
+class ResourceSampler:
+    """Records per-stage resource peaks for one large-file job"""
+
+    def __init__(self, temp_dir: Optional[str] = None, pipeline: str = "background",
+                 interval: float = SAMPLE_SECONDS):
+        self.temp_dir = temp_dir
+        self.pipeline = pipeline
+        self.interval = interval
+        self.stages: List[StageUsage] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageUsage]:
+        usage = StageUsage(stage=name)
+        usage.sample(self.temp_dir)
+        usage.rss_start_mb = usage.rss_peak_mb
+        started, child_cpu = time.perf_counter(), child_cpu_seconds()
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(self.interval):
+                usage.sample(self.temp_dir)
+
+        thread = threading.Thread(target=run, name="resource-sampler", daemon=True)
+        thread.start()
+        try:
+            yield usage
+        finally:
+            stop.set()
+            thread.join()
+            rss = rss_bytes()
+            usage.rss_end_mb = round(rss / MB, 1) if rss is not None else 0.0
+            usage.sample(self.temp_dir)
+            usage.duration_seconds = round(time.perf_counter() - started, 3)
+            usage.child_cpu_seconds = round(child_cpu_seconds() - child_cpu, 3)
+            self.stages.append(usage)
+            track_stage_resources(self.pipeline, usage)
+            logger.debug(f"Stage {name}: {asdict(usage)}")
+
+    def report(self) -> Dict[str, Any]:
+        """Per-stage usage plus job-wide peaks, for the job's results"""
+        return {
+            "stages": [asdict(usage) for usage in self.stages],
+            "rss_peak_mb": max((usage.rss_peak_mb for usage in self.stages), default=0.0),
+            "temp_bytes_peak": max((usage.temp_bytes_peak for usage in self.stages), default=0),
+            "child_cpu_seconds": round(sum(usage.child_cpu_seconds for usage in self.stages), 3),
+            "child_peak_rss_mb": child_peak_rss_mb(),
+        }
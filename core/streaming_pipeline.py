@@ -4,14 +4,29 @@ Enables real-time progress updates and content streaming during processing
 """
 
 import streamlit as st
+import os
+import tempfile
 import time
 from typing import Dict, Optional, Any
 from datetime import datetime
+from .config import get_config
+from .cost_accounting import JobUsage, usage_scope
 from .content_generation import (
     transcribe_audio, generate_wisdom, generate_outline, generate_article,
-    generate_social_content, generate_image_prompts, editor_critique
+    generate_social_content, generate_image_prompts, generate_social_posts,
+    generate_image_prompt_set, generate_with_structure, generate_social_and_images
 )
-from .research_enrichment import generate_research_enrichment
+from .structured_output import StructuredOutputError
+from .article_sections import compose_article
+from .editor import EditorBudget, EditorialPass
+from .fair_scheduler import ANONYMOUS, Tenant, tenant_scope
+from .metrics_exporter import timed_step, track_pipeline
+from .transcript_digest import build_transcript_digest, transcript_for_step, uses_digest
+try:
+    from .research_enrichment import generate_research_enrichment
+except ImportError:  # research enrichment was removed in v3.0.0
+    def generate_research_enrichment(wisdom, transcript, ai_provider=None, ai_model=None, enabled=True):
+        return {"enabled": False, "entities": []}
 from .visible_thinking import thinking_step_start, thinking_step_complete, thinking_error, render_thinking_stream
 # Removed old complex progress tracker - using simple progress bars now
 
@@ -23,7 +38,7 @@ class StreamingPipelineController:
     PIPELINE_STEPS = [
         "upload_validation", "transcription", "wisdom_extraction", 
         "research_enrichment", "outline_creation", "article_creation", 
-        "social_content", "image_prompts", "database_storage"
+        "social_content", "image_prompts", "editorial_review", "database_storage"
     ]
     
     def __init__(self):
@@ -36,6 +51,11 @@ class StreamingPipelineController:
         st.session_state.pipeline_results = {}
         st.session_state.pipeline_errors = {}
         st.session_state.pipeline_audio_file = None
+        st.session_state.pipeline_usage = JobUsage()
+        st.session_state.pipeline_digest = None
+        st.session_state.pipeline_digest_steps = set()
+        st.session_state.pipeline_started_at = time.time()
+        st.session_state.pipeline_job_id = None
         
     def start_pipeline(self, audio_file):
         """Initialize pipeline for processing with large file support"""
@@ -62,6 +82,86 @@ class StreamingPipelineController:
         if not hasattr(st.session_state, 'ai_model'):
             st.session_state.ai_model = "gpt-4o"
     
+    def start_background(self, audio_file, prompts: Optional[Dict[str, Any]] = None) -> str:
+        """Submit the upload to the headless engine (or the durable job queue
+        when ``JOB_QUEUE=true``) instead of running it here.
+
+        Processing continues if the tab closes; pages call ``sync_background``
+        on each rerun to mirror the job's progress into session state.
+        ``prompts`` are custom prompts keyed by step (default: the session's).
+        Queued uploads are stored next to the queue database rather than in
+        the temp directory, so they outlive the app like the queued job.
+        """
+        from .pipeline_engine import PipelineJob
+        
+        self.start_pipeline(audio_file)
+        config = get_config()
+        upload_dir = None
+        if config.job_queue_enabled:
+            upload_dir = os.path.join(os.path.dirname(config.job_queue_path) or ".", "uploads")
+            os.makedirs(upload_dir, exist_ok=True)
+        suffix = os.path.splitext(audio_file.name)[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, prefix="whisperforge_job_",
+                                         dir=upload_dir) as tmp_file:
+            tmp_file.write(audio_file.getvalue())
+        
+        job = PipelineJob(
+            audio_path=tmp_file.name,
+            file_name=audio_file.name,
+            user_id=st.session_state.get("user_id"),
+            prompts=dict(st.session_state.prompts if prompts is None else prompts),
+            knowledge_base=dict(st.session_state.knowledge_base),
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model,
+            options={
+                "editor_enabled": st.session_state.get("editor_enabled", False),
+                "research_enabled": st.session_state.get("research_enabled", True),
+                "profile": st.session_state.get("profile_jobs", config.profile_jobs),
+            },
+            cleanup_audio=True,
+        )
+        return self.submit_background(job)
+    
+    def submit_background(self, job) -> str:
+        """Submit a prepared ``PipelineJob`` (e.g. a Content Library reprocess)"""
+        if not st.session_state.get("pipeline_active"):
+            self.reset_pipeline()
+            st.session_state.pipeline_active = True
+        st.session_state.pipeline_job_id = self._job_backend().submit(job)
+        return st.session_state.pipeline_job_id
+    
+    def cancel_background(self) -> bool:
+        """Stop the background job; its provider calls and chunk uploads are aborted"""
+        job_id = st.session_state.get("pipeline_job_id")
+        return bool(job_id) and self._job_backend().cancel(job_id)
+    
+    @staticmethod
+    def _job_backend():
+        """Durable queue (served by worker processes) when enabled, else the in-process engine"""
+        if get_config().job_queue_enabled:
+            from .job_queue import get_job_queue
+            return get_job_queue()
+        from .pipeline_engine import get_pipeline_engine
+        return get_pipeline_engine()
+    
+    def sync_background(self) -> Optional[Dict[str, Any]]:
+        """Copy the background job's status and results into session state"""
+        job_id = st.session_state.get("pipeline_job_id")
+        if not job_id:
+            return None
+        backend = self._job_backend()
+        status = backend.status(job_id)
+        if status is None:
+            return None
+        
+        st.session_state.pipeline_results = backend.results(job_id)
+        st.session_state.pipeline_step_index = status["step_index"]
+        st.session_state.pipeline_active = status["status"] in ("queued", "running", "cancelling")
+        if status["status"] == "failed":
+            step, _, error = (status["error"] or "").partition(": ")
+            st.session_state.pipeline_errors = {step or "pipeline": error or status["error"]}
+        return status
+    
     def process_next_step(self):
         """Process the next step in the pipeline"""
         if not st.session_state.pipeline_active:
@@ -72,6 +172,7 @@ class StreamingPipelineController:
         if step_index >= len(self.PIPELINE_STEPS):
             # Pipeline complete
             st.session_state.pipeline_active = False
+            track_pipeline("streaming", time.time() - st.session_state.pipeline_started_at, success=True)
             return False
         
         step_id = self.PIPELINE_STEPS[step_index]
@@ -81,8 +182,10 @@ class StreamingPipelineController:
             with st.status(f"Processing {step_id.replace('_', ' ').title()}...", expanded=True):
                 st.write(f"Step {step_index + 1} of {len(self.PIPELINE_STEPS)}: {step_id.replace('_', ' ')}")
                 
-                # Process the step
-                result = self._execute_step(step_id, step_index)
+                # Process the step, attributing token/cost usage and scheduler slots to this user
+                tenant = Tenant(user_id=str(st.session_state.get("user_id") or ANONYMOUS))
+                with usage_scope(st.session_state.pipeline_usage), tenant_scope(tenant), timed_step(step_id):
+                    result = self._execute_step(step_id, step_index)
                 
                 # Store result
                 st.session_state.pipeline_results[step_id] = result
@@ -99,6 +202,7 @@ class StreamingPipelineController:
             error_msg = str(e)
             st.session_state.pipeline_errors[step_id] = error_msg
             st.session_state.pipeline_active = False
+            track_pipeline("streaming", time.time() - st.session_state.pipeline_started_at, success=False)
             st.error(f"❌ Error in {step_id}: {error_msg}")
             return False
     
@@ -125,6 +229,8 @@ class StreamingPipelineController:
                 result = self._step_social_content()
             elif step_id == "image_prompts":
                 result = self._step_image_prompts()
+            elif step_id == "editorial_review":
+                result = self._step_editorial_review()
             elif step_id == "database_storage":
                 result = self._step_database_storage()
             else:
@@ -215,52 +321,39 @@ class StreamingPipelineController:
         st.session_state.pipeline_transcript = transcript
         return transcript
     
+    def _transcript_for(self, step: str) -> str:
+        """Transcript text for a generation step: the shared digest unless the
+        step is configured to read the full transcript"""
+        transcript = st.session_state.pipeline_transcript
+        if not uses_digest(step):
+            return transcript
+        if st.session_state.get("pipeline_digest") is None:
+            st.session_state.pipeline_digest = build_transcript_digest(transcript)
+        st.session_state.pipeline_digest_steps.add(step)
+        return transcript_for_step(step, transcript, st.session_state.pipeline_digest)
+    
+    def get_digest_report(self) -> Dict[str, Any]:
+        """Token savings from the transcript digest for the current job"""
+        digest = st.session_state.get("pipeline_digest")
+        if digest is None:
+            return {}
+        return digest.report(steps_using=len(st.session_state.get("pipeline_digest_steps", ())))
+    
     def _step_wisdom_extraction(self) -> str:
         """Step 3: Extract wisdom"""
-        transcript = st.session_state.pipeline_transcript
+        transcript = self._transcript_for("wisdom_extraction")
         
         # Get custom prompt if available
         custom_prompt = st.session_state.prompts.get("wisdom_extraction") if hasattr(st.session_state, 'prompts') else None
         
         wisdom = generate_wisdom(
-            transcript, 
-            st.session_state.ai_provider, 
-            st.session_state.ai_model, 
-            custom_prompt, 
-            st.session_state.knowledge_base
+            transcript,
+            custom_prompt=custom_prompt,
+            knowledge_base=st.session_state.knowledge_base,
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model
         )
         
-        # Handle editor mode
-        if st.session_state.get("editor_enabled", False):
-            critique = editor_critique(
-                wisdom, "wisdom_extraction", 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model,
-                st.session_state.knowledge_base
-            )
-            
-            # Store critique for display
-            st.session_state.pipeline_results["wisdom_critique"] = critique
-            
-            # Generate revision based on critique
-            revision_prompt = f"""Based on this editorial feedback, please revise the wisdom extraction:
-
-EDITORIAL FEEDBACK:
-{critique}
-
-ORIGINAL WISDOM:
-{wisdom}
-
-Please provide an improved version that addresses the feedback."""
-            
-            wisdom = generate_wisdom(
-                transcript, 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model, 
-                revision_prompt, 
-                st.session_state.knowledge_base
-            )
-        
         # Store in session for later steps AND results for display
         st.session_state.pipeline_wisdom = wisdom
         return wisdom
@@ -288,7 +381,7 @@ Please provide an improved version that addresses the feedback."""
     
     def _step_outline_creation(self) -> str:
         """Step 4: Create outline"""
-        transcript = st.session_state.pipeline_transcript
+        transcript = self._transcript_for("outline_creation")
         wisdom = st.session_state.pipeline_wisdom
         research = st.session_state.pipeline_results.get("research_enrichment", {})
         
@@ -298,98 +391,35 @@ Please provide an improved version that addresses the feedback."""
         outline = generate_outline(
             transcript,
             wisdom,
-            research, 
-            st.session_state.ai_provider, 
-            st.session_state.ai_model, 
-            custom_prompt, 
-            st.session_state.knowledge_base
+            custom_prompt=custom_prompt,
+            knowledge_base=st.session_state.knowledge_base,
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model
         )
         
-        # Handle editor mode
-        if st.session_state.get("editor_enabled", False):
-            critique = editor_critique(
-                outline, "outline_creation", 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model,
-                st.session_state.knowledge_base
-            )
-            
-            st.session_state.pipeline_results["outline_critique"] = critique
-            
-            revision_prompt = f"""Based on this editorial feedback, please revise the outline:
-
-EDITORIAL FEEDBACK:
-{critique}
-
-ORIGINAL OUTLINE:
-{outline}
-
-Please provide an improved version that addresses the feedback."""
-            
-            outline = generate_outline(
-                transcript,
-                wisdom,
-                research, 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model, 
-                revision_prompt, 
-                st.session_state.knowledge_base
-            )
-        
         # Store in session for later steps AND results for display
         st.session_state.pipeline_outline = outline
         return outline
     
     def _step_article_creation(self) -> str:
         """Step 5: Create article"""
-        transcript = st.session_state.pipeline_transcript
+        transcript = self._transcript_for("article_writing")
         wisdom = st.session_state.pipeline_wisdom
         outline = st.session_state.pipeline_outline
         
         # Get custom prompt if available  
         custom_prompt = st.session_state.prompts.get("article_creation") if hasattr(st.session_state, 'prompts') else None
         
-        article = generate_article(
+        article = compose_article(
             transcript,
-            wisdom, 
-            outline, 
-            st.session_state.ai_provider, 
-            st.session_state.ai_model, 
-            custom_prompt, 
-            st.session_state.knowledge_base
+            wisdom,
+            outline,
+            custom_prompt=custom_prompt,
+            knowledge_base=st.session_state.knowledge_base,
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model
         )
         
-        # Handle editor mode
-        if st.session_state.get("editor_enabled", False):
-            critique = editor_critique(
-                article, "article_writing", 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model,
-                st.session_state.knowledge_base
-            )
-            
-            st.session_state.pipeline_results["article_critique"] = critique
-            
-            revision_prompt = f"""Based on this editorial feedback, please revise the article:
-
-EDITORIAL FEEDBACK:
-{critique}
-
-ORIGINAL ARTICLE:
-{article}
-
-Please provide an improved version that addresses the feedback."""
-            
-            article = generate_article(
-                transcript,
-                wisdom, 
-                outline, 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model, 
-                revision_prompt, 
-                st.session_state.knowledge_base
-            )
-        
         st.session_state.pipeline_article = article
         return article
     
@@ -402,72 +432,142 @@ Please provide an improved version that addresses the feedback."""
         # Get custom prompt if available
         custom_prompt = st.session_state.prompts.get("social_media") if hasattr(st.session_state, 'prompts') else None
         
-        social = generate_social_content(
-            wisdom, 
+        if get_config().fused_artifacts:
+            fused = self._fused_social_and_images(wisdom, outline, article, custom_prompt)
+            if fused is not None:
+                return fused
+        
+        # Typed posts (when valid) feed exports and per-platform publishing
+        social, st.session_state.pipeline_results["social_posts"] = generate_with_structure(
+            generate_social_posts, generate_social_content,
+            wisdom,
             outline,
-            article, 
-            st.session_state.ai_provider, 
-            st.session_state.ai_model, 
-            custom_prompt, 
-            st.session_state.knowledge_base
+            article,
+            custom_prompt=custom_prompt,
+            knowledge_base=st.session_state.knowledge_base,
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model
         )
         
-        # Handle editor mode
-        if st.session_state.get("editor_enabled", False):
-            critique = editor_critique(
-                social, "social_media", 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model,
-                st.session_state.knowledge_base
-            )
-            
-            st.session_state.pipeline_results["social_critique"] = critique
-            
-            revision_prompt = f"""Based on this editorial feedback, please revise the social media content:
-
-EDITORIAL FEEDBACK:
-{critique}
-
-ORIGINAL SOCIAL CONTENT:
-{social}
-
-Please provide improved versions that address the feedback."""
-            
-            social = generate_social_content(
-                wisdom, 
-                outline,
-                article, 
-                st.session_state.ai_provider, 
-                st.session_state.ai_model, 
-                revision_prompt, 
-                st.session_state.knowledge_base
-            )
-        
         st.session_state.pipeline_social = social
         return social
     
+    def _fused_social_and_images(self, wisdom: str, outline: str, article: str,
+                                 social_prompt: Optional[str]) -> Optional[str]:
+        """Produce social posts and image prompts in one call; None to fall back"""
+        image_prompt = st.session_state.prompts.get("image_prompts") if hasattr(st.session_state, 'prompts') else None
+        try:
+            social, images = generate_social_and_images(
+                wisdom,
+                outline,
+                article,
+                social_prompt=social_prompt,
+                image_prompt=image_prompt,
+                knowledge_base=st.session_state.knowledge_base,
+                ai_provider=st.session_state.ai_provider,
+                ai_model=st.session_state.ai_model
+            )
+        except StructuredOutputError as e:
+            st.write(f"⚠️ Combined generation failed, generating separately: {e}")
+            return None
+        
+        # Split back into the usual result keys; the image step reuses them
+        results = st.session_state.pipeline_results
+        results["social_posts"] = social.to_dict()
+        results["image_prompt_set"] = images.to_dict()
+        results["image_prompts"] = images.to_markdown()
+        st.session_state.pipeline_social = social.to_markdown()
+        st.session_state.pipeline_images = results["image_prompts"]
+        return st.session_state.pipeline_social
+    
     def _step_image_prompts(self) -> str:
         """Step 7: Generate image prompts"""
+        if st.session_state.pipeline_results.get("image_prompts"):
+            # Already produced by the fused social step
+            return st.session_state.pipeline_results["image_prompts"]
+        
         wisdom = st.session_state.pipeline_wisdom
         outline = st.session_state.pipeline_outline
         
         # Get custom prompt if available
         custom_prompt = st.session_state.prompts.get("image_prompts") if hasattr(st.session_state, 'prompts') else None
         
-        images = generate_image_prompts(
-            wisdom, 
-            outline, 
-            st.session_state.ai_provider, 
-            st.session_state.ai_model, 
-            custom_prompt, 
-            st.session_state.knowledge_base
+        images, st.session_state.pipeline_results["image_prompt_set"] = generate_with_structure(
+            generate_image_prompt_set, generate_image_prompts,
+            wisdom,
+            outline,
+            custom_prompt=custom_prompt,
+            knowledge_base=st.session_state.knowledge_base,
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model
         )
         
         st.session_state.pipeline_images = images
         return images
     
+    def _step_editorial_review(self) -> Dict[str, Any]:
+        """Step 8: Critique all drafts concurrently and revise where needed"""
+        if not st.session_state.get("editor_enabled", False):
+            return {"status": "skipped", "reason": "editor disabled"}
+        
+        provider_kwargs = {
+            "knowledge_base": st.session_state.knowledge_base,
+            "ai_provider": st.session_state.ai_provider,
+            "ai_model": st.session_state.ai_model,
+        }
+        
+        # Revisers read upstream artifacts from ``current``, which carries
+        # revisions made earlier in the same editorial round
+        revisers = {
+            "wisdom_extraction": lambda prompt, current, t=self._transcript_for("wisdom_extraction"): generate_wisdom(
+                t, custom_prompt=prompt, **provider_kwargs),
+            "outline_creation": lambda prompt, current, t=self._transcript_for("outline_creation"): generate_outline(
+                t, current["wisdom_extraction"], custom_prompt=prompt, **provider_kwargs),
+            "article_creation": lambda prompt, current, t=self._transcript_for("article_writing"): generate_article(
+                t, current["wisdom_extraction"], current["outline_creation"], custom_prompt=prompt,
+                **provider_kwargs),
+            "social_content": lambda prompt, current: generate_social_content(
+                current["wisdom_extraction"], current["outline_creation"], current["article_creation"],
+                custom_prompt=prompt, **provider_kwargs),
+        }
+        
+        config = get_config()
+        editorial_pass = EditorialPass(
+            budget=EditorBudget(
+                max_rounds=st.session_state.get("editor_max_rounds", config.editor_max_rounds),
+                max_seconds=config.editor_budget_seconds,
+                max_tokens=config.editor_budget_tokens,
+            ),
+            ai_provider=st.session_state.ai_provider,
+            ai_model=st.session_state.ai_model,
+            knowledge_base=st.session_state.knowledge_base,
+        )
+        drafts = {key: st.session_state.pipeline_results.get(key, "") for key in revisers}
+        reviewed = editorial_pass.run(drafts, revisers)
+        
+        session_keys = {
+            "wisdom_extraction": ("pipeline_wisdom", "wisdom_critique"),
+            "outline_creation": ("pipeline_outline", "outline_critique"),
+            "article_creation": ("pipeline_article", "article_critique"),
+            "social_content": ("pipeline_social", "social_critique"),
+        }
+        for key, result in reviewed.items():
+            content_key, critique_key = session_keys[key]
+            st.session_state.pipeline_results[critique_key] = result.critique
+            if result.revised:
+                st.session_state.pipeline_results[key] = result.content
+                setattr(st.session_state, content_key, result.content)
+        
+        return {
+            "status": "reviewed",
+            "revised": [key for key, result in reviewed.items() if result.revised],
+            "approved": [key for key, result in reviewed.items() if result.critique and not result.revised],
+            "skipped": {key: result.skipped_reason for key, result in reviewed.items() if result.skipped_reason},
+            "budget": editorial_pass.report(),
+        }
+    
     def _step_database_storage(self) -> str:
-        """Step 8: Store content in database"""
+        """Step 9: Store content in database"""
         try:
             # Direct Supabase access to avoid circular imports
             from .supabase_integration import get_supabase_client
@@ -495,6 +595,24 @@ Please provide improved versions that address the feedback."""
             if not content_id:
                 return "Failed to save content to database"
             
+            # Per-step tokens, latency and cost for spend analysis
+            usage = st.session_state.pipeline_usage
+            entry = {
+                "type": "streaming",
+                "duration": time.time() - st.session_state.pipeline_started_at,
+                "success": True,
+                "metadata": {
+                    "content_id": content_id,
+                    "usage": usage.summary(),
+                    "transcript_digest": self.get_digest_report(),
+                },
+            }
+            # Failover and tiered routing pick the model per call; log the one used most
+            provider, model = usage.primary_model()
+            if provider:
+                entry.update({"ai_provider": provider, "model": model})
+            db.log_pipeline_execution(st.session_state.user_id, entry)
+            
             time.sleep(0.3)  # Simulate save time
             return f"Content saved with ID: {content_id}"
             
@@ -530,6 +648,11 @@ Please provide improved versions that address the feedback."""
     def get_errors(self) -> Dict[str, str]:
         """Get any pipeline errors"""
         return st.session_state.get("pipeline_errors", {})
+    
+    def get_usage(self) -> Dict[str, Any]:
+        """Get per-step token, latency and cost usage for the current job"""
+        usage = st.session_state.get("pipeline_usage")
+        return usage.summary() if usage else {}
 
 
 # Global pipeline controller instance
@@ -5,6 +5,7 @@ Shows content as it's generated with beautiful Aurora styling
 
 import streamlit as st
 import html
+import os
 import time
 from typing import Dict, Any, Optional
 from .streaming_pipeline import get_pipeline_controller
@@ -92,6 +93,61 @@ def show_streaming_results():
     show_real_time_content_stream(results, controller)
 
 
+def show_background_job_results(poll_seconds: float = 2.0):
+    """Display a job running on the headless engine, polling until it finishes.
+
+    The rerun happens in ``rerun_if_polling`` once the rest of the page has
+    rendered.
+    """
+    controller = get_pipeline_controller()
+    status = controller.sync_background()
+    if status is None:
+        return
+
+    st.caption(f"Background job {status['job_id'][:8]} · {status['status']} · {status['progress']:.0f}%")
+    show_streaming_results()
+    if status["status"] == "failed":
+        st.error(f"❌ Processing failed: {status['error']}")
+    elif status["status"] == "cancelled":
+        st.warning("⏹️ Processing cancelled")
+
+    decisions = st.session_state.get("pipeline_results", {}).get("step_decisions")
+    if decisions:
+        with st.expander("♻️ Reused and recomputed steps"):
+            for decision in decisions:
+                icon = "♻️" if decision["action"] == "reused" else "🔁"
+                st.markdown(f"{icon} **{decision['step'].replace('_', ' ').title()}** · {decision['reason']}")
+
+    profile = st.session_state.get("pipeline_results", {}).get("profile")
+    if profile:
+        with st.expander("🔬 Job profile"):
+            st.caption(f"{profile['mode']} · {profile['samples']} samples · {profile['duration_seconds']:.1f}s")
+            for step in profile.get("memory", []):
+                st.markdown(f"**{step['step'].replace('_', ' ').title()}** · traced {step['traced_mb']} MB, "
+                            f"peak {step['peak_mb']} MB")
+            for name, path in profile["artifacts"].items():
+                if os.path.isfile(path):
+                    file_name = os.path.basename(path)
+                    with open(path, "rb") as f:
+                        st.download_button(f"⬇️ {file_name}", f.read(), file_name=file_name,
+                                           key=f"profile_{name}_{status['job_id']}")
+
+    if controller.is_active:
+        if st.button("⏹️ Stop processing", key=f"cancel_{status['job_id']}"):
+            controller.cancel_background()
+            st.rerun()
+        # The job keeps running if this tab closes; polling only refreshes the view
+        st.session_state.poll_seconds = poll_seconds
+
+
+def rerun_if_polling():
+    """Rerun the script after the poll interval if a page is showing a running job"""
+    poll_seconds = st.session_state.pop("poll_seconds", None)
+    if poll_seconds:
+        time.sleep(poll_seconds)
+        st.rerun()
+
+
 def show_real_time_content_stream(results: Dict[str, Any], controller):
     """🚀 ENHANCED: Real-time content streaming with step-by-step reveals"""
     st.markdown("### ✨ Content Generation Stream")
@@ -1,46 +1,26 @@
-"""Tiny helpers for Streamlit monitoring decorators used in tests."""
+"""Tiny helpers for Streamlit monitoring decorators used in tests.
+
+The decorators record call counts and timings through
+``core.instrumentation`` instead of logging on every call, and are
+no-ops unless the decorated function's module is in ``INSTRUMENT_MODULES``.
+"""
 
 from __future__ import annotations
 
-from functools import wraps
 from typing import Callable
 
-from .monitoring import structured_logger
+from .instrumentation import get_instrumentation
 
 
 def streamlit_monitor(func: Callable) -> Callable:
-    """Decorator that logs entry and exit of a Streamlit function."""
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        structured_logger.info("streamlit monitor start", extra={"function": func.__name__})
-        result = func(*args, **kwargs)
-        structured_logger.info("streamlit monitor end", extra={"function": func.__name__})
-        return result
+    """Decorator that counts and times calls of a Streamlit function."""
 
-    return wrapper
+    return get_instrumentation().instrument()(func)
 
 
 def streamlit_page(name: str):
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            structured_logger.info("streamlit page", extra={"page": name})
-            return func(*args, **kwargs)
-
-        return wrapper
-
-    return decorator
+    return get_instrumentation().instrument(f"page.{name}")
 
 
 def streamlit_component(name: str):
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            structured_logger.info("streamlit component", extra={"component": name})
-            return func(*args, **kwargs)
-
-        return wrapper
-
-    return decorator
-
+    return get_instrumentation().instrument(f"component.{name}")
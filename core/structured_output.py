@@ -0,0 +1,255 @@
+"""
+Structured Output for WhisperForge
+==================================
+
+JSON schemas, validation and typed results for social posts and image
+prompts. The router asks providers for schema-constrained JSON (OpenAI and
+Grok ``response_format``, a forced tool call for Anthropic); the response is
+validated here and turned into a small typed object that exports, Notion
+blocks and per-platform fan-out consume directly, with markdown rendering
+for the existing text views.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
+
+PLATFORMS = ["linkedin", "twitter", "instagram", "facebook", "youtube", "other"]
+ASPECT_RATIOS = ["1:1", "16:9", "9:16", "4:5"]
+
+PLATFORM_LABELS = {
+    "linkedin": "LinkedIn",
+    "twitter": "Twitter/X",
+    "instagram": "Instagram",
+    "facebook": "Facebook",
+    "youtube": "YouTube",
+    "other": "Other",
+}
+
+# Strict-mode compatible: every property required, no additional properties
+SOCIAL_POSTS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["posts"],
+    "properties": {
+        "posts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["platform", "title", "parts", "hashtags"],
+                "properties": {
+                    "platform": {"type": "string", "enum": PLATFORMS},
+                    "title": {"type": "string"},
+                    "parts": {"type": "array", "items": {"type": "string"}},
+                    "hashtags": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+        },
+    },
+}
+
+IMAGE_PROMPTS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["prompts"],
+    "properties": {
+        "prompts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["title", "prompt", "style", "aspect_ratio"],
+                "properties": {
+                    "title": {"type": "string"},
+                    "prompt": {"type": "string"},
+                    "style": {"type": "string"},
+                    "aspect_ratio": {"type": "string", "enum": ASPECT_RATIOS},
+                },
+            },
+        },
+    },
+}
+
+# Social posts and image prompts in one completion (see generate_social_and_images)
+COMBINED_ARTIFACTS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["posts", "prompts"],
+    "properties": {
+        "posts": SOCIAL_POSTS_SCHEMA["properties"]["posts"],
+        "prompts": IMAGE_PROMPTS_SCHEMA["properties"]["prompts"],
+    },
+}
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+
+Respond only with JSON matching this schema, with no surrounding prose:
+{schema}"""
+
+
+class StructuredOutputError(ValueError):
+    """Model output that is not valid JSON or does not match the schema"""
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> None:
+    """Validate ``value`` against the subset of JSON Schema used in this module"""
+    expected = schema.get("type")
+    if expected == "object":
+        if not isinstance(value, dict):
+            raise StructuredOutputError(f"{path}: expected object")
+        for key in schema.get("required", []):
+            if key not in value:
+                raise StructuredOutputError(f"{path}: missing '{key}'")
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                validate(item, properties[key], f"{path}.{key}")
+            elif schema.get("additionalProperties") is False:
+                raise StructuredOutputError(f"{path}: unexpected '{key}'")
+    elif expected == "array":
+        if not isinstance(value, list):
+            raise StructuredOutputError(f"{path}: expected array")
+        for index, item in enumerate(value):
+            validate(item, schema.get("items", {}), f"{path}[{index}]")
+    elif expected == "string":
+        if not isinstance(value, str):
+            raise StructuredOutputError(f"{path}: expected string")
+        if "enum" in schema and value not in schema["enum"]:
+            raise StructuredOutputError(f"{path}: '{value}' not in {schema['enum']}")
+
+
+def parse_json_output(text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse model output as JSON (tolerating a code fence) and validate it"""
+    if not text or text.startswith("Error"):
+        raise StructuredOutputError(text or "empty response")
+    cleaned = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"invalid JSON: {e}") from e
+    validate(data, schema)
+    return data
+
+
+def schema_instructions(schema: Dict[str, Any]) -> str:
+    """Instructions suffix describing the expected JSON"""
+    return STRUCTURED_OUTPUT_INSTRUCTIONS.format(schema=json.dumps(schema, separators=(",", ":")))
+
+
+def _text_block(block_type: str, content: str) -> Dict[str, Any]:
+    return {"type": block_type, block_type: {"rich_text": [{"type": "text", "text": {"content": content[:1900]}}]}}
+
+
+@dataclass
+class SocialPost:
+    platform: str
+    title: str
+    parts: List[str]
+    hashtags: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Post body with hashtags, parts separated by blank lines"""
+        body = "\n\n".join(self.parts)
+        return f"{body}\n\n{' '.join(self.hashtags)}" if self.hashtags else body
+
+
+@dataclass
+class SocialContent:
+    """Validated social posts"""
+
+    posts: List[SocialPost]
+
+    @classmethod
+    def from_json(cls, text: str) -> "SocialContent":
+        data = parse_json_output(text, SOCIAL_POSTS_SCHEMA)
+        posts = [SocialPost(**post) for post in data["posts"] if any(p.strip() for p in post["parts"])]
+        if not posts:
+            raise StructuredOutputError("no social posts returned")
+        return cls(posts=posts)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SocialContent":
+        return cls(posts=[SocialPost(**post) for post in data.get("posts", [])])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"posts": [asdict(post) for post in self.posts]}
+
+    def by_platform(self) -> Dict[str, List[SocialPost]]:
+        """Posts grouped per platform for fan-out to publishing integrations"""
+        grouped: Dict[str, List[SocialPost]] = {}
+        for post in self.posts:
+            grouped.setdefault(post.platform, []).append(post)
+        return grouped
+
+    def to_markdown(self) -> str:
+        return "\n\n".join(
+            f"### {PLATFORM_LABELS.get(post.platform, post.platform)}: {post.title}\n\n{post.text}"
+            for post in self.posts
+        )
+
+    def notion_blocks(self) -> List[Dict[str, Any]]:
+        blocks = []
+        for post in self.posts:
+            blocks.append(_text_block("heading_3", f"{PLATFORM_LABELS.get(post.platform, post.platform)}: {post.title}"))
+            blocks.extend(_text_block("paragraph", part) for part in post.parts)
+            if post.hashtags:
+                blocks.append(_text_block("paragraph", " ".join(post.hashtags)))
+        return blocks
+
+
+def split_combined_artifacts(text: str) -> Tuple[SocialContent, ImagePrompts]:
+    """Validate a combined completion and split it into its two typed results"""
+    data = parse_json_output(text, COMBINED_ARTIFACTS_SCHEMA)
+    return (
+        SocialContent.from_json(json.dumps({"posts": data["posts"]})),
+        ImagePrompts.from_json(json.dumps({"prompts": data["prompts"]})),
+    )
+
+
+@dataclass
+class ImagePrompt:
+    title: str
+    prompt: str
+    style: str
+    aspect_ratio: str = "1:1"
+
+
+@dataclass
+class ImagePrompts:
+    """Validated image generation prompts"""
+
+    prompts: List[ImagePrompt]
+
+    @classmethod
+    def from_json(cls, text: str) -> "ImagePrompts":
+        data = parse_json_output(text, IMAGE_PROMPTS_SCHEMA)
+        prompts = [ImagePrompt(**prompt) for prompt in data["prompts"] if prompt["prompt"].strip()]
+        if not prompts:
+            raise StructuredOutputError("no image prompts returned")
+        return cls(prompts=prompts)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ImagePrompts":
+        return cls(prompts=[ImagePrompt(**prompt) for prompt in data.get("prompts", [])])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"prompts": [asdict(prompt) for prompt in self.prompts]}
+
+    def to_markdown(self) -> str:
+        return "\n\n".join(
+            f"### {i}. {p.title}\n\n{p.prompt}\n\n*Style:* {p.style} · *Aspect ratio:* {p.aspect_ratio}"
+            for i, p in enumerate(self.prompts, 1)
+        )
+
+    def notion_blocks(self) -> List[Dict[str, Any]]:
+        blocks = []
+        for p in self.prompts:
+            blocks.append(_text_block("heading_3", p.title))
+            blocks.append(_text_block("quote", p.prompt))
+            blocks.append(_text_block("paragraph", f"Style: {p.style} · Aspect ratio: {p.aspect_ratio}"))
+        return blocks
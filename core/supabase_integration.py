@@ -21,6 +21,11 @@ from .utils import hash_password
 
 logger = logging.getLogger(__name__)
 
+# Compare-and-set attempts when the increment_usage function is not installed
+USAGE_UPDATE_ATTEMPTS = 5
+# PostgREST / Postgres errors meaning the increment_usage function does not exist
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
 
 class SupabaseClient:
     """
@@ -38,6 +43,7 @@ class SupabaseClient:
         
         self.client: Client = create_client(self.url, self.key)
         self.admin_client: Optional[Client] = None
+        self._increment_rpc_available = True
         
         if self.service_role_key:
             self.admin_client = create_client(self.url, self.service_role_key)
@@ -115,6 +121,47 @@ class SupabaseClient:
             logger.error(f"Error updating user usage: {e}")
             return False
     
+    def add_user_usage(self, user_id: int, usage_minutes: float) -> bool:
+        """Add processed audio minutes to the user's current usage.
+
+        Concurrent jobs of one user must not lose increments, so this calls
+        the ``increment_usage`` database function (``usage_current =
+        usage_current + x`` in one statement; see ``create_missing_tables.py``).
+        Without the function it falls back to a compare-and-set update that
+        is retried when another job changed the row in between. Any other RPC
+        error (e.g. a timeout after the increment committed) is not retried,
+        so usage is never charged twice.
+        """
+        if self._increment_rpc_available:
+            try:
+                result = self.client.rpc(
+                    "increment_usage", {"p_user_id": user_id, "p_minutes": usage_minutes}
+                ).execute()
+                return result.data is not None
+            except Exception as e:
+                if getattr(e, "code", None) not in MISSING_FUNCTION_CODES:
+                    logger.error(f"Error adding user usage: {e}")
+                    return False
+                self._increment_rpc_available = False
+                logger.warning(f"increment_usage function unavailable, using compare-and-set updates: {e}")
+        try:
+            for _ in range(USAGE_UPDATE_ATTEMPTS):
+                user = self.get_user(user_id)
+                if not user:
+                    return False
+                current = user.get("usage_current")
+                query = self.client.table("users").update({
+                    "usage_current": float(current or 0) + usage_minutes
+                }).eq("id", user_id)
+                query = query.is_("usage_current", "null") if current is None else query.eq("usage_current", current)
+                if query.execute().data:
+                    return True
+            logger.error(f"Usage update for user {user_id} kept conflicting; {usage_minutes:.2f} minutes not added")
+            return False
+        except Exception as e:
+            logger.error(f"Error adding user usage: {e}")
+            return False
+    
     # Content Storage
     def save_content(self, user_id: int, content_data: Dict[str, Any]) -> Optional[str]:
         """Save generated content to database"""
@@ -0,0 +1,345 @@
+"""
+Span Tracing for WhisperForge
+=============================
+
+Hierarchical timing spans for jobs, pipeline steps, audio chunks, provider
+HTTP calls and database writes:
+
+    with span("transcription", kind="step", job_id=job_id) as s:
+        ...
+        s.set_attribute("chunks", len(chunks))
+
+Each span records a ``perf_counter_ns`` duration, its attributes and its
+parent's id. The current span is a contextvar, so spans opened on thread
+pools that submit through ``contextvars.copy_context().run`` nest under the
+step that started them. Every span carries the ``job_id`` of the job span
+it runs under.
+
+Finished spans are queued and appended to ``trace_path`` as JSONL by a
+background thread, through the same batching, rotating file handler as the
+log files (rotated by ``LOG_MAX_BYTES`` / ``LOG_ROTATE_SECONDS``, keeping
+``LOG_BACKUP_COUNT`` files). ``load_spans`` streams the current and rotated
+files and only parses lines of the requested job. ``to_otlp`` converts them to OTLP/JSON for any OpenTelemetry
+collector, and with ``TRACE_OTEL=true`` spans are also mirrored live
+through the OpenTelemetry API when it is installed.
+
+``python whisperforge_cli.py trace <job_id>`` renders a job's waterfall
+(see ``render_waterfall``).
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import get_config
+from .logging_config import (
+    BatchingQueueListener, BatchingRotatingFileHandler, DroppingQueueHandler, JsonLinesFormatter,
+)
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind: job/step/chunk spans are internal work, HTTP and DB calls are clients
+OTLP_KINDS = {"http": 3, "db": 3}
+OTLP_STATUS = {"ok": 1, "error": 2}
+
+
+@dataclass
+class Span:
+    """One timed operation; ``start_ns`` is wall-clock, ``duration_ns`` monotonic"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"
+    start_ns: int = 0
+    duration_ns: int = 0
+    status: str = "ok"
+    error: Optional[str] = None
+    thread: str = ""
+    job_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("whisperforge_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class JsonlSpanExporter:
+    """Queues finished spans for a background thread that appends them to a
+    rotating JSONL file in batches (safe across threads and worker processes)"""
+
+    def __init__(self, path: str):
+        config = get_config()
+        self.path = path
+        self.handler = BatchingRotatingFileHandler(
+            path, max_bytes=config.log_max_bytes, rotate_seconds=config.log_rotate_seconds,
+            backup_count=config.log_backup_count,
+        )
+        self.handler.setFormatter(JsonLinesFormatter())
+        self._queue_size = config.log_queue_size
+        self._queue: Optional[queue.Queue] = None
+        self._queue_handler: Optional[DroppingQueueHandler] = None
+        self._listener: Optional[BatchingQueueListener] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _start(self) -> None:
+        """Start the writer thread on first export (again in a forked worker process)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue_size)
+            self._queue_handler = DroppingQueueHandler(self._queue)
+            self._listener = BatchingQueueListener(self._queue, self.handler, source=self._queue_handler)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def export(self, span: Span) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        record = logging.LogRecord("whisperforge.tracing", logging.INFO, __file__, 0, span.name, None, None)
+        record.structured = span.to_dict()
+        self._queue_handler.enqueue(record)
+
+    def flush(self) -> None:
+        """Wait until every exported span is written"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        self.handler.close()
+
+
+class OpenTelemetryBridge:
+    """Mirrors spans through the OpenTelemetry API, with the same nesting"""
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("whisperforge")
+        self._live: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._live.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(span.name, context=context, start_time=span.start_ns)
+        with self._lock:
+            self._live[span.span_id] = otel_span
+
+    def end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attribute("whisperforge.kind", span.kind)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if span.status == "error":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.start_ns + span.duration_ns)
+
+
+class Tracer:
+    """Creates nested spans and hands finished ones to the exporters"""
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None, otel: Optional[bool] = None):
+        config = get_config()
+        self.enabled = config.tracing_enabled if enabled is None else enabled
+        self.exporter = JsonlSpanExporter(str(path or config.trace_path))
+        self.bridge: Optional[OpenTelemetryBridge] = None
+        if config.trace_otel if otel is None else otel:
+            try:
+                self.bridge = OpenTelemetryBridge()
+            except ImportError:
+                logger.warning("TRACE_OTEL is set but opentelemetry-api is not installed")
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+        """Time the block as a child of the current span (or a new trace's root)"""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            start_ns=time.time_ns(),
+            thread=threading.current_thread().name,
+            job_id=attributes.get("job_id") or (parent.job_id if parent else None),
+            attributes={key: value for key, value in attributes.items() if value is not None},
+        )
+        if not self.enabled:
+            yield span
+            return
+        if self.bridge is not None:
+            self.bridge.start(span)
+        reset = _current_span.set(span)
+        started = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ns = time.perf_counter_ns() - started
+            _current_span.reset(reset)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        try:
+            if span.kind == "db":
+                from .metrics_exporter import track_database_time
+
+                track_database_time(span.duration_ms)
+            self.exporter.export(span)
+            if self.bridge is not None:
+                self.bridge.end(span)
+        except Exception as e:
+            logger.warning(f"Could not export span {span.name}: {e}")
+
+    def flush(self) -> None:
+        """Wait until finished spans are written to ``trace_path``"""
+        self.exporter.flush()
+
+
+# Global tracer instance
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, kind: str = "internal", **attributes: Any):
+    """Shorthand for ``get_tracer().span(...)``"""
+    return get_tracer().span(name, kind=kind, **attributes)
+
+
+def trace_files(path: Optional[str] = None) -> List[Path]:
+    """The trace file's rotated copies, oldest first, followed by the file itself"""
+    current = Path(path or get_config().trace_path)
+    rotated = sorted(current.parent.glob(current.name + ".2*"), key=lambda p: p.stat().st_mtime)
+    return rotated + ([current] if current.exists() else [])
+
+
+def load_spans(path: Optional[str] = None, job_id: Optional[str] = None) -> List[Span]:
+    """Spans from a JSONL trace file and its rotated copies; with ``job_id``, only that job's spans"""
+    # Lines of other jobs are skipped on a substring match, without parsing them
+    needle = json.dumps({"job_id": job_id})[1:-1] if job_id is not None else None
+    spans = []
+    for trace_file in trace_files(path):
+        with open(trace_file, encoding="utf-8") as f:
+            for line in f:
+                if needle is not None and needle not in line:
+                    continue
+                try:
+                    recorded = Span(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # a line cut short by a crash, or a dropped-spans notice
+                if job_id is None or recorded.job_id == job_id:
+                    spans.append(recorded)
+    return spans
+
+
+def render_waterfall(spans: List[Span], width: int = 50) -> List[str]:
+    """Text waterfall of one trace: nesting, offset, duration and a time bar per span"""
+    if not spans:
+        return []
+    start = min(s.start_ns for s in spans)
+    end = max(s.start_ns + s.duration_ns for s in spans)
+    total = max(end - start, 1)
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {s.span_id for s in spans}
+    for s in sorted(spans, key=lambda s: s.start_ns):
+        children.setdefault(s.parent_id if s.parent_id in ids else None, []).append(s)
+
+    lines = [f"{'span':<44} {'start':>9} {'duration':>10}  timeline ({total / 1e6:.0f} ms)"]
+
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for s in children.get(parent_id, []):
+            offset = s.start_ns - start
+            left = int(offset / total * width)
+            bar = " " * left + "█" * max(1, int(s.duration_ns / total * width))
+            label = f"{'  ' * depth}{s.name}" + (" ✗" if s.status == "error" else "")
+            lines.append(f"{label[:44]:<44} {offset / 1e6:>7.0f}ms {s.duration_ms:>8.0f}ms  |{bar[:width]:<{width}}|")
+            walk(s.span_id, depth + 1)
+
+    walk(None, 0)
+    return lines
+
+
+def to_otlp(spans: List[Span], service_name: str = "whisperforge") -> Dict[str, Any]:
+    """Spans as an OTLP/JSON ``ExportTraceServiceRequest``"""
+
+    def attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [attribute("service.name", service_name)]},
+        "scopeSpans": [{
+            "scope": {"name": "whisperforge"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": OTLP_KINDS.get(s.kind, 1),
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.start_ns + s.duration_ns),
+                "attributes": [attribute("whisperforge.kind", s.kind)]
+                + [attribute(k, v) for k, v in s.attributes.items()],
+                "status": {"code": OTLP_STATUS[s.status], **({"message": s.error} if s.error else {})},
+            } for s in spans],
+        }],
+    }]}
@@ -0,0 +1,178 @@
+"""
+Transcript Digest for WhisperForge
+==================================
+
+Builds a compact version of a transcript once per job so that wisdom,
+outline and article generation do not each pay input-token latency on the
+full text. The digest:
+
+1. removes filler words and stutters ("um", "you know,", "the the"),
+2. drops sentences repeated verbatim or near-verbatim,
+3. if still over budget, keeps the highest-scoring extractive passages
+   (sentences dense in the transcript's most frequent content words) in
+   their original order.
+
+Steps listed in ``Config.full_transcript_steps`` receive the full transcript
+instead; every other step consumes the digest.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .config import get_config
+from .cost_accounting import estimate_tokens
+from .instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+FILLER_PATTERNS = [
+    re.compile(r"\b(?:um+|uh+|erm+|hmm+|uh-huh|mm-hmm)\b[,.]?\s*", re.IGNORECASE),
+    # Only sentence-initial or comma-enclosed fillers; "I mean, ...", "kind of, ..." and
+    # "felt like, ..." carry meaning and are kept
+    re.compile(r"(?:^|(?<=[.!?]\s))(?:like|you know),\s*", re.IGNORECASE),
+    re.compile(r"(?<=,)\s*you know,", re.IGNORECASE),
+]
+REPEATED_WORD = re.compile(r"\b(\w+)(?:[\s,]+\1\b)+", re.IGNORECASE)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"[a-z0-9']+")
+PASSAGE_BREAK = "\n[...]\n"
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does
+for from get got had has have he her here him his how i if in into is it its just know
+like me more my no not now of on one or our out so some that the their them then there
+these they this to up us was we were what when which who will with would you your
+really very going gonna yeah okay right well think thing things actually
+""".split())
+
+
+@dataclass
+class TranscriptDigest:
+    """Compact transcript plus the numbers needed to report savings"""
+
+    text: str
+    original_tokens: int
+    digest_tokens: int
+    duplicates_removed: int = 0
+    extractive: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.digest_tokens)
+
+    def report(self, steps_using: int = 0) -> Dict[str, Any]:
+        """Token savings for the job, given how many steps consumed the digest"""
+        ratio = self.digest_tokens / self.original_tokens if self.original_tokens else 1.0
+        return {
+            "original_tokens": self.original_tokens,
+            "digest_tokens": self.digest_tokens,
+            "compression_ratio": round(ratio, 3),
+            "duplicates_removed": self.duplicates_removed,
+            "extractive": self.extractive,
+            "steps_using_digest": steps_using,
+            "tokens_saved": self.tokens_saved * steps_using,
+        }
+
+
+def remove_fillers(text: str) -> str:
+    """Strip filler words and immediate word repetitions"""
+    text = re.sub(r"\s+", " ", text)
+    for pattern in FILLER_PATTERNS:
+        text = pattern.sub("", text)
+    text = REPEATED_WORD.sub(r"\1", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _content_words(sentence: str) -> List[str]:
+    return [w for w in WORD.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 2]
+
+
+def _select_passages(sentences: List[str], max_tokens: int) -> List[int]:
+    """Indices of the most informative sentences that fit in ``max_tokens``"""
+    frequencies = Counter(w for s in sentences for w in _content_words(s))
+    scores = []
+    for index, sentence in enumerate(sentences):
+        words = _content_words(sentence)
+        score = sum(frequencies[w] for w in set(words)) / (len(words) ** 0.5) if words else 0.0
+        scores.append((score, index))
+
+    # Costs include a passage separator so the joined digest stays in budget
+    def cost(index: int) -> int:
+        return estimate_tokens(sentences[index] + PASSAGE_BREAK)
+
+    # Always keep the opening and closing, which frame the recording
+    selected = {0, len(sentences) - 1}
+    budget = max_tokens - sum(cost(i) for i in selected)
+    for score, index in sorted(scores, reverse=True):
+        if index in selected:
+            continue
+        sentence_cost = cost(index)
+        if sentence_cost <= budget:
+            selected.add(index)
+            budget -= sentence_cost
+    return sorted(selected)
+
+
+@instrumented()
+def build_transcript_digest(transcript: str, max_tokens: Optional[int] = None) -> TranscriptDigest:
+    """Build the digest for a transcript, targeting at most ``max_tokens``"""
+    if max_tokens is None:
+        max_tokens = get_config().transcript_digest_max_tokens
+    original_tokens = estimate_tokens(transcript)
+
+    sentences, seen, duplicates_removed = [], set(), 0
+    for sentence in SENTENCE_SPLIT.split(remove_fillers(transcript or "")):
+        key = " ".join(WORD.findall(sentence.lower()))
+        if not key:
+            continue
+        if key in seen:
+            duplicates_removed += 1
+            continue
+        seen.add(key)
+        sentences.append(sentence)
+
+    text = " ".join(sentences)
+    extractive = False
+    if estimate_tokens(text) > max_tokens and len(sentences) > 2:
+        indices = _select_passages(sentences, max_tokens)
+        passages, current, previous = [], [], None
+        for index in indices:
+            if previous is not None and index != previous + 1:
+                passages.append(" ".join(current))
+                current = []
+            current.append(sentences[index])
+            previous = index
+        passages.append(" ".join(current))
+        text = PASSAGE_BREAK.join(passages)
+        extractive = True
+
+    digest = TranscriptDigest(
+        text=text,
+        original_tokens=original_tokens,
+        digest_tokens=estimate_tokens(text),
+        duplicates_removed=duplicates_removed,
+        extractive=extractive,
+    )
+    logger.info(
+        f"Transcript digest: {digest.original_tokens} -> {digest.digest_tokens} tokens"
+        f"{' (extractive)' if extractive else ''}"
+    )
+    return digest
+
+
+def uses_digest(step: str) -> bool:
+    """True unless the step is configured to read the full transcript"""
+    config = get_config()
+    return config.transcript_digest_enabled and step not in config.full_transcript_steps
+
+
+def transcript_for_step(step: str, transcript: str, digest: Optional[TranscriptDigest]) -> str:
+    """The transcript text a step should consume"""
+    if digest is None or not uses_digest(step):
+        return transcript
+    return digest.text
@@ -62,6 +62,28 @@ def create_api_keys_table(client):
         print(f"❌ Failed to create api_keys table: {e}")
         return False
 
+def create_increment_usage_function(client):
+    """Create the increment_usage function used to charge audio minutes atomically"""
+    sql = """
+    CREATE OR REPLACE FUNCTION increment_usage(p_user_id INTEGER, p_minutes DOUBLE PRECISION)
+    RETURNS DOUBLE PRECISION
+    LANGUAGE sql
+    AS $$
+        UPDATE users
+        SET usage_current = COALESCE(usage_current, 0) + p_minutes
+        WHERE id = p_user_id
+        RETURNING usage_current;
+    $$;
+    """
+    
+    try:
+        result = client.client.rpc('exec_sql', {'sql': sql}).execute()
+        print("✅ increment_usage function created successfully")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to create increment_usage function: {e}")
+        return False
+
 def test_table_creation(client):
     """Test that tables were created and are accessible"""
     
@@ -98,6 +120,7 @@ def main():
     print("\n📋 Creating Tables:")
     create_prompts_table(client)
     create_api_keys_table(client)
+    create_increment_usage_function(client)
     
     print("\n🧪 Testing Table Access:")
     test_table_creation(client)
@@ -0,0 +1,122 @@
+"""WhisperForge Fused Artifact Benchmark
+
+Compares generating social posts and image prompts with two sequential
+structured calls against the single fused call enabled by
+``FUSED_ARTIFACTS=true``:
+
+    python scripts/benchmark_fused_artifacts.py --transcripts data/transcripts \\
+        --runs 3 --output fused_benchmark.json
+
+For each transcript the wisdom, outline and article are generated once
+(untimed); both variants then run ``--runs`` times over those inputs, and
+the script reports mean wall-clock latency, prompt/completion tokens, cost
+and how often each variant produced valid output. The script makes real API
+calls and needs API keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.content_generation import (
+    generate_article, generate_image_prompt_set, generate_outline,
+    generate_social_and_images, generate_social_posts, generate_wisdom,
+)
+from core.cost_accounting import JobUsage, usage_scope
+from core.structured_output import StructuredOutputError
+
+
+def measure(variant: Callable[[], Any]) -> Dict[str, Any]:
+    """Run one variant, returning latency, token totals and validity"""
+    job_usage = JobUsage()
+    start = time.perf_counter()
+    with usage_scope(job_usage):
+        try:
+            variant()
+            valid = True
+        except StructuredOutputError:
+            valid = False
+    totals = job_usage.totals()
+    return {
+        "latency": round(time.perf_counter() - start, 3),
+        "calls": totals["calls"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "cost_usd": totals["cost_usd"],
+        "valid": valid,
+    }
+
+
+def benchmark(transcripts: List[Path], runs: int, provider: str) -> Dict[str, Any]:
+    """Run both variants over every transcript"""
+    samples: Dict[str, List[Dict[str, Any]]] = {"separate": [], "fused": []}
+
+    for path in transcripts:
+        transcript = path.read_text(encoding="utf-8")
+        wisdom = generate_wisdom(transcript, ai_provider=provider)
+        outline = generate_outline(transcript, wisdom, ai_provider=provider)
+        article = generate_article(transcript, wisdom, outline, ai_provider=provider)
+
+        variants = {
+            "separate": lambda: (
+                generate_social_posts(wisdom, outline, article, ai_provider=provider),
+                generate_image_prompt_set(wisdom, outline, ai_provider=provider),
+            ),
+            "fused": lambda: generate_social_and_images(wisdom, outline, article, ai_provider=provider),
+        }
+        for run in range(runs):
+            for name, variant in variants.items():
+                sample = measure(variant)
+                sample.update({"transcript": path.name, "run": run})
+                samples[name].append(sample)
+                print(f"{path.name:<30} {name:<9} run {run}: {sample['latency']:>6.1f}s "
+                      f"{sample['prompt_tokens'] + sample['completion_tokens']:>7} tokens "
+                      f"{'ok' if sample['valid'] else 'INVALID'}")
+
+    summary = {}
+    for name, variant_samples in samples.items():
+        count = max(1, len(variant_samples))
+        summary[name] = {
+            key: round(sum(s[key] for s in variant_samples) / count, 4)
+            for key in ("latency", "calls", "prompt_tokens", "completion_tokens", "cost_usd")
+        }
+        summary[name]["valid_rate"] = round(sum(s["valid"] for s in variant_samples) / count, 3)
+    return {"provider": provider, "runs": runs, "summary": summary, "samples": samples}
+
+
+# ---------------------------------------------------------------------------
+# Entry-point
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fused vs separate social/image generation.")
+    parser.add_argument("--transcripts", type=Path, required=True, help="Transcript .txt file or directory")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per transcript and variant")
+    parser.add_argument("--provider", default="openai", help="Primary provider for every call")
+    parser.add_argument("--output", type=Path, default=Path("fused_benchmark.json"))
+    args = parser.parse_args()
+
+    transcripts = sorted(args.transcripts.glob("*.txt")) if args.transcripts.is_dir() else [args.transcripts]
+    if not transcripts:
+        parser.error(f"No transcripts found in {args.transcripts}")
+
+    results = benchmark(transcripts, args.runs, args.provider)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    print(f"\n{'variant':<9} {'latency':>9} {'calls':>6} {'prompt':>8} {'output':>8} {'cost':>9} {'valid':>6}")
+    for name, s in results["summary"].items():
+        print(f"{name:<9} {s['latency']:>8.1f}s {s['calls']:>6.1f} {s['prompt_tokens']:>8.0f} "
+              f"{s['completion_tokens']:>8.0f} {s['cost_usd']:>9.4f} {s['valid_rate']:>6.0%}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""WhisperForge Logging Microbenchmark
+
+Measures what logging one structured event costs the calling thread with
+the previous synchronous approach (open and append to the JSONL file per
+event, or a plain ``FileHandler``) and with the queue-based pipeline from
+``core.logging_config``:
+
+    python scripts/benchmark_logging.py --events 20000 --threads 4 --output logging_benchmark.json
+
+Each variant logs ``--events`` events per thread into a temporary directory.
+The script reports the mean and p99 per-event latency on the calling
+threads and, for the async pipeline, how long the listener took to drain
+the queue to disk afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.logging_config import (
+    BatchingQueueListener, BatchingRotatingFileHandler, DroppingQueueHandler, JsonLinesFormatter,
+)
+
+
+def event(i: int) -> Dict[str, Any]:
+    return {"event": "ai_request", "provider": "openai", "model": "gpt-4o", "prompt_type": "wisdom",
+            "tokens": i, "timestamp": time.time()}
+
+
+def run_threads(log_one: Callable[[int], None], events: int, threads: int) -> List[int]:
+    """Call ``log_one`` ``events`` times on each thread; returns per-event nanoseconds"""
+    samples: List[List[int]] = [[] for _ in range(threads)]
+
+    def worker(index: int) -> None:
+        timings = samples[index]
+        for i in range(events):
+            start = time.perf_counter_ns()
+            log_one(i)
+            timings.append(time.perf_counter_ns() - start)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return [t for timings in samples for t in timings]
+
+
+def summarize(timings: List[int]) -> Dict[str, float]:
+    timings = sorted(timings)
+    return {
+        "events": len(timings),
+        "mean_us": round(sum(timings) / len(timings) / 1000, 2),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 2),
+        "p99_us": round(timings[int(len(timings) * 0.99)] / 1000, 2),
+    }
+
+
+def bench_append_per_event(directory: Path, events: int, threads: int) -> Dict[str, Any]:
+    """The previous ``_log_structured``: open, append and close per event"""
+    path = directory / "append.jsonl"
+
+    def log_one(i: int) -> None:
+        with open(path, "a") as f:
+            f.write(json.dumps(event(i)) + "\n")
+
+    return summarize(run_threads(log_one, events, threads))
+
+
+def bench_file_handler(directory: Path, events: int, threads: int) -> Dict[str, Any]:
+    """A synchronous ``logging.FileHandler`` on the calling thread"""
+    log = logging.getLogger("benchmark.sync")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = logging.FileHandler(directory / "sync.jsonl")
+    handler.setFormatter(JsonLinesFormatter())
+    log.addHandler(handler)
+    try:
+        return summarize(run_threads(lambda i: log.info("event", extra={"structured": event(i)}), events, threads))
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+
+
+def bench_async(directory: Path, events: int, threads: int) -> Dict[str, Any]:
+    """QueueHandler on the calling thread, batched rotating writes on the listener"""
+    log = logging.getLogger("benchmark.async")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = BatchingRotatingFileHandler(directory / "async.jsonl", max_bytes=50 * 1024 * 1024)
+    handler.setFormatter(JsonLinesFormatter())
+    # Large enough that nothing is dropped, so the drain time covers every event
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=events * threads + 1))
+    listener = BatchingQueueListener(queue_handler.queue, handler, source=queue_handler)
+    log.addHandler(queue_handler)
+    listener.start()
+    try:
+        timings = run_threads(lambda i: log.info("event", extra={"structured": event(i)}), events, threads)
+        drain_start = time.perf_counter()
+        listener.stop()
+        drain_seconds = time.perf_counter() - drain_start
+    finally:
+        log.removeHandler(queue_handler)
+        handler.close()
+    written = sum(1 for _ in open(directory / "async.jsonl"))
+    return {**summarize(timings), "drain_seconds": round(drain_seconds, 3),
+            "dropped": queue_handler.dropped, "written": written}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-event logging overhead.")
+    parser.add_argument("--events", type=int, default=20000, help="Events per thread")
+    parser.add_argument("--threads", type=int, default=1, help="Logging threads")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = {"events_per_thread": args.events, "threads": args.threads}
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for name, bench in (("append_per_event", bench_append_per_event),
+                            ("sync_file_handler", bench_file_handler),
+                            ("async_batched", bench_async)):
+            results[name] = bench(directory, args.events, args.threads)
+            print(f"{name:<18} {json.dumps(results[name])}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
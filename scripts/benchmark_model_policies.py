@@ -0,0 +1,151 @@
+"""WhisperForge Model Policy Benchmark
+
+Replays recorded transcripts through the content pipeline once per model
+policy (see ``core.llm_router.MODEL_POLICIES``) and reports, per step,
+wall-clock latency, token usage, estimated cost and a similarity score
+against the output of the baseline policy:
+
+    python scripts/benchmark_model_policies.py --transcripts data/transcripts \\
+        --policies quality,tiered,economy --output policy_benchmark.json
+
+Transcripts are plain ``.txt`` files. The baseline policy runs first and its
+outputs are the reference; similarity is the cosine similarity of word
+frequencies, a cheap proxy that flags policies whose output drifts far from
+the full-model result. The script makes real API calls and needs API keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.content_generation import (
+    generate_article, generate_image_prompts, generate_outline,
+    generate_social_content, generate_wisdom,
+)
+from core.cost_accounting import JobUsage, usage_scope
+from core.llm_router import MODEL_POLICIES, ProviderRouter, build_step_policies, set_llm_router
+
+
+def similarity(a: str, b: str) -> float:
+    """Cosine similarity of word frequencies (1.0 = same vocabulary and weights)"""
+    words_a = Counter(re.findall(r"\w+", a.lower()))
+    words_b = Counter(re.findall(r"\w+", b.lower()))
+    dot = sum(count * words_b[word] for word, count in words_a.items())
+    norm = math.sqrt(sum(c * c for c in words_a.values())) * math.sqrt(sum(c * c for c in words_b.values()))
+    return dot / norm if norm else 0.0
+
+
+def run_pipeline(transcript: str, provider: str) -> Dict[str, Dict[str, Any]]:
+    """Run the generation steps once, returning output and latency per step"""
+    outputs: Dict[str, str] = {}
+    steps: Dict[str, Callable[[], str]] = {
+        "wisdom_extraction": lambda: generate_wisdom(transcript, ai_provider=provider),
+        "outline_creation": lambda: generate_outline(transcript, outputs["wisdom_extraction"], ai_provider=provider),
+        "article_writing": lambda: generate_article(
+            transcript, outputs["wisdom_extraction"], outputs["outline_creation"], ai_provider=provider
+        ),
+        "social_media": lambda: generate_social_content(
+            outputs["wisdom_extraction"], outputs["outline_creation"], outputs["article_writing"],
+            ai_provider=provider
+        ),
+        "image_prompts": lambda: generate_image_prompts(
+            outputs["wisdom_extraction"], outputs["outline_creation"], ai_provider=provider
+        ),
+    }
+    results = {}
+    for step, generate in steps.items():
+        start = time.perf_counter()
+        outputs[step] = generate()
+        results[step] = {"output": outputs[step], "latency": round(time.perf_counter() - start, 3)}
+    return results
+
+
+def benchmark(transcripts: List[Path], policies: List[str], baseline: str, provider: str) -> Dict[str, Any]:
+    """Run every transcript through every policy and compare against the baseline"""
+    ordered = [baseline] + [p for p in policies if p != baseline]
+    runs: Dict[str, List[Dict[str, Any]]] = {policy: [] for policy in ordered}
+
+    for path in transcripts:
+        transcript = path.read_text(encoding="utf-8")
+        reference = None
+        for policy in ordered:
+            set_llm_router(ProviderRouter(policies=build_step_policies(policy)))
+            job_usage = JobUsage(job_id=f"{policy}:{path.name}")
+            with usage_scope(job_usage):
+                steps = run_pipeline(transcript, provider)
+            if reference is None:
+                reference = steps
+            usage = job_usage.by_step()
+            for step, result in steps.items():
+                result["similarity"] = round(similarity(result["output"], reference[step]["output"]), 4)
+                result.update({k: usage.get(step, {}).get(k, 0) for k in
+                               ("prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd", "models")})
+                del result["output"]
+            runs[policy].append({"transcript": path.name, "steps": steps, "totals": job_usage.totals()})
+            print(f"{path.name:<30} {policy:<10} {sum(s['latency'] for s in steps.values()):>8.1f}s "
+                  f"{job_usage.totals()['cost_usd']:>9.4f} USD")
+    set_llm_router(None)
+
+    summary = {}
+    for policy, policy_runs in runs.items():
+        step_names = policy_runs[0]["steps"].keys() if policy_runs else []
+        summary[policy] = {
+            "steps": {
+                step: {
+                    key: round(sum(r["steps"][step][key] for r in policy_runs) / len(policy_runs), 4)
+                    for key in ("latency", "prompt_tokens", "completion_tokens", "cost_usd", "similarity")
+                }
+                for step in step_names
+            },
+            "mean_latency": round(sum(sum(s["latency"] for s in r["steps"].values())
+                                      for r in policy_runs) / max(1, len(policy_runs)), 3),
+            "mean_cost_usd": round(sum(r["totals"]["cost_usd"] for r in policy_runs) / max(1, len(policy_runs)), 6),
+        }
+    return {"baseline": baseline, "provider": provider, "summary": summary, "runs": runs}
+
+
+# ---------------------------------------------------------------------------
+# Entry-point
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model policies against a full-model baseline.")
+    parser.add_argument("--transcripts", type=Path, required=True, help="Transcript .txt file or directory")
+    parser.add_argument("--policies", default=",".join(MODEL_POLICIES), help="Comma-separated policy names")
+    parser.add_argument("--baseline", default="quality", help="Policy whose outputs are the reference")
+    parser.add_argument("--provider", default="openai", help="Primary provider for every step")
+    parser.add_argument("--output", type=Path, default=Path("policy_benchmark.json"))
+    args = parser.parse_args()
+
+    transcripts = sorted(args.transcripts.glob("*.txt")) if args.transcripts.is_dir() else [args.transcripts]
+    if not transcripts:
+        parser.error(f"No transcripts found in {args.transcripts}")
+    policies = [p.strip() for p in args.policies.split(",") if p.strip()]
+    for policy in policies + [args.baseline]:
+        if policy not in MODEL_POLICIES:
+            parser.error(f"Unknown policy '{policy}'. Choose from: {', '.join(MODEL_POLICIES)}")
+
+    results = benchmark(transcripts, policies, args.baseline, args.provider)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    print(f"\n{'policy':<10} {'latency':>9} {'cost':>10} {'similarity':>11}")
+    for policy, summary in results["summary"].items():
+        steps = summary["steps"].values()
+        mean_similarity = sum(s["similarity"] for s in steps) / max(1, len(steps))
+        print(f"{policy:<10} {summary['mean_latency']:>8.1f}s {summary['mean_cost_usd']:>10.4f} {mean_similarity:>11.3f}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""WhisperForge End-to-End Pipeline Benchmark
+
+Runs the background pipeline offline against a local OpenAI stand-in
+(``fake_openai_server.py``) and an in-process Supabase stand-in, on
+synthetic audio generated with FFmpeg:
+
+    python scripts/benchmark_pipeline.py --inputs short,1h,3h --concurrency 1,4 --output pipeline_benchmark.json
+    python scripts/benchmark_pipeline.py --inputs short --compare pipeline_benchmark.json
+
+For every input length and concurrency N, N jobs (one per user) are
+submitted at once to a ``PipelineEngine`` with N workers. Each scenario
+reports the end-to-end job latency, throughput (jobs per minute and audio
+hours per wall-clock hour), peak RSS, peak temp-directory bytes, FFmpeg CPU
+and what the fake API served. Results are written as JSON so runs can be
+compared with ``--compare``.
+
+Short inputs fall back to a WAV written with the ``wave`` module when
+FFmpeg is not installed; 1h and 3h inputs need FFmpeg for generation and
+chunking and are skipped without it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_openai_server import FakeOpenAIServer, add_arguments, config_from_args
+
+INPUT_SECONDS = {"short": 120, "1h": 3600, "3h": 10800}
+SAMPLE_RATE = 16000
+
+
+class _Result:
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+
+
+class _Query:
+    """The ``table(...).insert/update(...).eq(...).execute()`` chain the pipeline uses"""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db, self.table = db, table
+        self._action, self._payload, self._filters = "select", None, {}
+
+    def insert(self, payload: Dict[str, Any]) -> "_Query":
+        self._action, self._payload = "insert", payload
+        return self
+
+    def update(self, payload: Dict[str, Any]) -> "_Query":
+        self._action, self._payload = "update", payload
+        return self
+
+    def select(self, *columns: str) -> "_Query":
+        return self
+
+    def eq(self, column: str, value: Any) -> "_Query":
+        self._filters[column] = value
+        return self
+
+    def execute(self) -> _Result:
+        with self.db.lock:
+            rows = self.db.tables.setdefault(self.table, [])
+            if self._action == "insert":
+                row = {"id": uuid.uuid4().hex, **self._payload}
+                rows.append(row)
+                return _Result([row])
+            matched = [row for row in rows if all(row.get(k) == v for k, v in self._filters.items())]
+            if self._action == "update":
+                for row in matched:
+                    row.update(self._payload)
+            return _Result(matched)
+
+
+class FakeSupabase:
+    """In-process stand-in for ``SupabaseClient``: the calls the background pipeline makes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.client = self
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def get_user(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        return {"id": user_id, "subscription_tier": "pro", "usage_quota": None, "usage_current": 0}
+
+    def add_user_usage(self, user_id: Any, usage_minutes: float) -> bool:
+        return True
+
+    def log_pipeline_execution(self, user_id: Any, pipeline_data: Dict[str, Any]) -> bool:
+        self.table("pipeline_logs").insert({"user_id": user_id, **pipeline_data}).execute()
+        return True
+
+    def row_counts(self) -> Dict[str, int]:
+        with self.lock:
+            return {name: len(rows) for name, rows in self.tables.items()}
+
+
+def synthesize_audio(name: str, seconds: int, directory: Path, bitrate: str) -> Optional[Path]:
+    """Speech-band test audio of ``seconds``, cached in ``directory``; None if it cannot be generated"""
+    if shutil.which("ffmpeg"):
+        path = directory / f"{name}_{seconds}s_{bitrate}.mp3"
+        if not path.exists():
+            # Pink noise under a slow tone: compresses like speech rather than silence
+            cmd = ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.2:d={seconds}",
+                   "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}", "-filter_complex", "amix=inputs=2",
+                   "-ar", str(SAMPLE_RATE), "-ac", "1", "-b:a", bitrate, "-y", str(path)]
+            subprocess.run(cmd, check=True)
+        return path
+    if seconds > INPUT_SECONDS["short"]:
+        return None
+    path = directory / f"{name}_{seconds}s.wav"
+    if not path.exists():
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(bytes(seconds * SAMPLE_RATE * 2))
+    return path
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_scenario(name: str, audio: Path, seconds: int, concurrency: int, api: FakeOpenAIServer,
+                 db: FakeSupabase, temp_dir: Path) -> Dict[str, Any]:
+    from core.pipeline_engine import PipelineEngine, PipelineJob
+    from core.resource_monitor import ResourceSampler
+
+    api.reset_stats()
+    rows_before = sum(db.row_counts().values())
+    engine = PipelineEngine(max_workers=concurrency, use_processes=False)
+    sampler = ResourceSampler(str(temp_dir), pipeline="benchmark")
+    started = time.perf_counter()
+    with sampler.stage(f"{name}x{concurrency}") as usage:
+        job_ids = [
+            engine.submit(PipelineJob(audio_path=str(audio), file_name=audio.name, user_id=f"bench-user-{i}",
+                                      ai_provider="openai", options={"save_to_database": True}))
+            for i in range(concurrency)
+        ]
+        statuses = [engine.wait(job_id) for job_id in job_ids]
+    wall = time.perf_counter() - started
+    engine.shutdown()
+
+    completed = [s for s in statuses if s["status"] == "completed"]
+    latencies = [s["finished_at"] - s["submitted_at"] for s in completed]
+    return {
+        "input": name,
+        "audio_seconds": seconds,
+        "audio_bytes": audio.stat().st_size,
+        "concurrency": concurrency,
+        "jobs": len(statuses),
+        "completed": len(completed),
+        "errors": sorted({s["error"] for s in statuses if s["error"]}),
+        "wall_seconds": round(wall, 2),
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 2) if latencies else None,
+            "p50": round(percentile(latencies, 0.5), 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+            "max": round(max(latencies), 2) if latencies else None,
+        },
+        "throughput_jobs_per_minute": round(len(completed) / wall * 60, 2),
+        "audio_hours_per_hour": round(len(completed) * seconds / wall, 2),
+        "rss_start_mb": usage.rss_start_mb,
+        "rss_peak_mb": usage.rss_peak_mb,
+        "temp_bytes_peak": usage.temp_bytes_peak,
+        "ffmpeg_cpu_seconds": usage.child_cpu_seconds,
+        "database_rows": sum(db.row_counts().values()) - rows_before,
+        "api": dict(api.stats),
+    }
+
+
+COMPARED = (("latency_seconds.p50", False), ("throughput_jobs_per_minute", True), ("rss_peak_mb", False),
+            ("temp_bytes_peak", False))
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the change of each key metric against a previous run"""
+
+    def metric(scenario: Dict[str, Any], path: str) -> Optional[float]:
+        value: Any = scenario
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+    previous = {(s["input"], s["concurrency"]): s for s in baseline.get("scenarios", [])}
+    for scenario in results["scenarios"]:
+        before = previous.get((scenario["input"], scenario["concurrency"]))
+        if before is None:
+            continue
+        changes = []
+        for path, higher_is_better in COMPARED:
+            old, new = metric(before, path), metric(scenario, path)
+            if old and new is not None:
+                change = (new - old) / old * 100
+                better = change > 0 if higher_is_better else change < 0
+                changes.append(f"{path} {change:+.1f}%{'' if abs(change) < 5 else ' ✅' if better else ' ⚠️'}")
+        print(f"{scenario['input']:>5} x{scenario['concurrency']:<3} " + "  ".join(changes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline end to end against local stand-ins.")
+    parser.add_argument("--inputs", default="short,1h,3h", help=f"Comma-separated, from {', '.join(INPUT_SECONDS)}")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated concurrent job counts")
+    parser.add_argument("--bitrate", default="64k", help="Synthetic audio bitrate")
+    parser.add_argument("--audio-cache", type=Path, help="Keep generated audio here between runs")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare against")
+    add_arguments(parser)
+    args = parser.parse_args()
+    inputs = [name.strip() for name in args.inputs.split(",") if name.strip()]
+    unknown = [name for name in inputs if name not in INPUT_SECONDS]
+    if unknown:
+        parser.error(f"unknown inputs: {', '.join(unknown)}")
+    concurrency = [int(n) for n in args.concurrency.split(",")]
+
+    api_config = config_from_args(args)
+    api_config.audio_bitrate = int(args.bitrate.rstrip("k")) * 1000
+    db = FakeSupabase()
+    with tempfile.TemporaryDirectory(prefix="whisperforge_bench_") as tmp, FakeOpenAIServer(api_config) as api:
+        work = Path(tmp)
+        audio_dir = args.audio_cache or work / "audio"
+        temp_dir = work / "tmp"
+        audio_dir.mkdir(parents=True, exist_ok=True)
+        temp_dir.mkdir()
+        # Configure the pipeline before core modules read the environment
+        os.environ.update({
+            "OPENAI_API_KEY": "offline-benchmark",
+            "OPENAI_BASE_URL": api.base_url,
+            "CHECKPOINT_PATH": str(work / "checkpoints.db"),
+            "TRACE_PATH": str(work / "traces.jsonl"),
+            "PROFILE_DIR": str(work / "profiles"),
+            "METRICS_PORT": "0",
+            "LOG_DIR": str(work / "logs"),
+        })
+        logging.disable(logging.INFO)  # per-request logs would dominate the output
+        for name in ("ANTHROPIC_API_KEY", "GROK_API_KEY"):
+            os.environ.pop(name, None)
+        tempfile.tempdir = str(temp_dir)  # chunk WAVs land here and count as temp disk
+
+        results: Dict[str, Any] = {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count(), "ffmpeg": bool(shutil.which("ffmpeg"))},
+            "fake_api": vars(api_config),
+            "scenarios": [],
+            "skipped": [],
+        }
+        with patch("core.supabase_integration.get_supabase_client", return_value=db):
+            for name in inputs:
+                seconds = INPUT_SECONDS[name]
+                audio = synthesize_audio(name, seconds, audio_dir, args.bitrate)
+                if audio is None:
+                    results["skipped"].append({"input": name, "reason": "ffmpeg not found"})
+                    print(f"{name:>5}  skipped: ffmpeg not found")
+                    continue
+                for n in concurrency:
+                    scenario = run_scenario(name, audio, seconds, n, api, db, temp_dir)
+                    results["scenarios"].append(scenario)
+                    print(f"{name:>5} x{n:<3} {scenario['completed']}/{scenario['jobs']} ok  "
+                          f"p50 {scenario['latency_seconds']['p50']}s  "
+                          f"{scenario['throughput_jobs_per_minute']} jobs/min  "
+                          f"rss {scenario['rss_peak_mb']} MB  temp {scenario['temp_bytes_peak'] / 1e6:.1f} MB")
+        tempfile.tempdir = None
+
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Local OpenAI API Stand-In
+
+Serves the two endpoints WhisperForge calls, ``/v1/chat/completions`` and
+``/v1/audio/transcriptions`` (verbose_json), with synthetic content and
+configurable timing, so the pipeline can run and be benchmarked offline:
+
+    python scripts/fake_openai_server.py --port 8089 --latency-ms 300 --tokens-per-second 80
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=offline streamlit run app.py
+
+Each completion takes ``latency + uniform(0, jitter)`` plus prompt tokens
+at ``--prefill-tokens-per-second`` and completion tokens at
+``--tokens-per-second``; each transcription takes ``latency`` plus audio
+duration / ``--whisper-speed``. ``--rate-limit-fraction`` of requests get
+a 429 with ``retry-after-ms``, which the OpenAI SDK retries. Structured
+output requests receive JSON generated from the request's schema.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+WORDS = ("signal latency pipeline audio insight story founder product growth memory chunk model budget "
+         "listener question practice habit system trust craft feedback").split()
+SPOKEN_WORDS_PER_SECOND = 2.5
+CHARS_PER_TOKEN = 4
+WORDS_PER_TOKEN = 0.75
+
+
+@dataclass
+class FakeOpenAIConfig:
+    latency_ms: float = 300.0
+    jitter_ms: float = 200.0
+    tokens_per_second: float = 80.0
+    prefill_tokens_per_second: float = 5000.0
+    completion_tokens: int = 400
+    whisper_speed: float = 30.0            # audio seconds transcribed per second
+    audio_bitrate: int = 64000             # bits/s, to size non-WAV uploads
+    rate_limit_fraction: float = 0.0
+    retry_after_ms: int = 200
+    seed: int = 7
+
+
+def words(count: int, rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(max(count, 1)))
+
+
+def sample_from_schema(schema: Dict[str, Any], rng: random.Random, index: int = 0) -> Any:
+    """A value matching the JSON Schema subset used by ``core.structured_output``"""
+    if "enum" in schema:
+        return schema["enum"][index % len(schema["enum"])]
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: sample_from_schema(sub, rng, index) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 0), 3)
+        return [sample_from_schema(schema.get("items", {}), rng, i) for i in range(count)]
+    if kind in ("integer", "number"):
+        return schema.get("minimum", 1)
+    if kind == "boolean":
+        return True
+    return words(12, rng).capitalize()
+
+
+def markdown_text(tokens: int, rng: random.Random) -> str:
+    """Sectioned markdown, so outlines parse into sections"""
+    total_words = int(tokens * WORDS_PER_TOKEN)
+    sections = max(2, min(6, total_words // 60))
+    per_section = max(total_words // sections, 5)
+    return "\n\n".join(f"## Section {i + 1}: {words(3, rng).title()}\n\n{words(per_section, rng).capitalize()}."
+                       for i in range(sections))
+
+
+def wav_seconds(body: bytes) -> Optional[float]:
+    """Duration of a WAV file inside a multipart body, from its byte rate"""
+    start = body.find(b"RIFF")
+    if start < 0 or body[start + 8:start + 12] != b"WAVE":
+        return None
+    byte_rate = struct.unpack("<I", body[start + 28:start + 32])[0]
+    return max(len(body) - start - 44, 0) / byte_rate if byte_rate else None
+
+
+class FakeOpenAIServer:
+    """ThreadingHTTPServer answering like the OpenAI API; use as a context manager"""
+
+    def __init__(self, config: Optional[FakeOpenAIConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeOpenAIConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {}
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {"chat_requests": 0, "transcription_requests": 0, "rate_limited": 0,
+                          "prompt_tokens": 0, "completion_tokens": 0, "audio_seconds": 0.0}
+
+    def _count(self, **amounts: float) -> None:
+        with self._lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        config = self.config
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in request.get("messages", []))
+        prompt_tokens = prompt_chars // CHARS_PER_TOKEN
+        completion_tokens = min(config.completion_tokens, request.get("max_tokens") or config.completion_tokens)
+        rng = random.Random(self._random())
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            content = json.dumps(sample_from_schema(response_format["json_schema"]["schema"], rng))
+        else:
+            content = markdown_text(completion_tokens, rng)
+        time.sleep((config.latency_ms + self._random() * config.jitter_ms) / 1000
+                   + prompt_tokens / config.prefill_tokens_per_second
+                   + completion_tokens / config.tokens_per_second)
+        self._count(chat_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            "id": f"chatcmpl-bench-{int(self._random() * 1e9)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": 0}},
+        }
+
+    def transcription(self, body: bytes) -> Dict[str, Any]:
+        config = self.config
+        seconds = wav_seconds(body)
+        if seconds is None:
+            seconds = len(body) * 8 / config.audio_bitrate
+        time.sleep(config.latency_ms / 1000 + seconds / config.whisper_speed)
+        self._count(transcription_requests=1, audio_seconds=seconds)
+        rng = random.Random(self._random())
+        text = words(int(seconds * SPOKEN_WORDS_PER_SECOND), rng).capitalize() + "."
+        return {"task": "transcribe", "language": "english", "duration": round(seconds, 2), "text": text,
+                "segments": []}
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if server._random() < server.config.rate_limit_fraction:
+                    server._count(rate_limited=1)
+                    self._send(429, {"error": {"message": "Rate limit reached (injected)", "type": "requests",
+                                               "code": "rate_limit_exceeded"}},
+                               {"retry-after-ms": str(server.config.retry_after_ms)})
+                elif self.path.endswith("/chat/completions"):
+                    self._send(200, server.chat_completion(json.loads(body or b"{}")))
+                elif self.path.endswith("/audio/transcriptions"):
+                    self._send(200, server.transcription(body))
+                else:
+                    self._send(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+            def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeOpenAIConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Base latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms, help="Uniform extra latency")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second,
+                        help="Completion token rate")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=defaults.prefill_tokens_per_second,
+                        help="Prompt token rate")
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens,
+                        help="Completion length (capped by max_tokens)")
+    parser.add_argument("--whisper-speed", type=float, default=defaults.whisper_speed,
+                        help="Audio seconds transcribed per second")
+    parser.add_argument("--rate-limit-fraction", type=float, default=defaults.rate_limit_fraction,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOpenAIConfig:
+    return FakeOpenAIConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_second=args.tokens_per_second,
+        prefill_tokens_per_second=args.prefill_tokens_per_second, completion_tokens=args.completion_tokens,
+        whisper_speed=args.whisper_speed, rate_limit_fraction=args.rate_limit_fraction, seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the OpenAI API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(config_from_args(args), args.host, args.port)
+    print(f"Fake OpenAI API at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
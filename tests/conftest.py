@@ -15,6 +15,12 @@ from streamlit.testing.v1 import AppTest
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Logs and traces written during the suite go to a temporary directory, not
+# the repo's logs/; set before core modules read the configuration
+RUNTIME_DIR = Path(tempfile.mkdtemp(prefix="whisperforge-tests-"))
+os.environ["LOG_DIR"] = str(RUNTIME_DIR / "logs")
+os.environ["TRACE_PATH"] = str(RUNTIME_DIR / "traces.jsonl")
+
 # Load environment variables from .env file if it exists
 try:
     from dotenv import load_dotenv
@@ -158,6 +164,20 @@ def mock_anthropic():
         
         yield mock_client
 
+@pytest.fixture(scope="session", autouse=True)
+def runtime_artifacts_to_temp_dir():
+    """Keep LOG_DIR and TRACE_PATH in the temporary directory for the whole session"""
+    import core.tracing as tracing
+    from core.config import get_config
+
+    config = get_config()
+    config.log_dir = os.environ["LOG_DIR"]
+    config.trace_path = os.environ["TRACE_PATH"]
+    yield RUNTIME_DIR
+    if tracing._tracer is not None:
+        tracing._tracer.exporter.close()
+    tracing._tracer = None
+
 @pytest.fixture(autouse=True)
 def setup_logging():
     """Set up logging for tests"""
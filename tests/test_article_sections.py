@@ -0,0 +1,62 @@
+"""
+Tests for section-parallel article generation
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.article_sections import generate_article_by_sections, parse_outline_sections
+
+OUTLINE = """# Why Latency Matters
+
+## Introduction
+- Hook
+## Measuring It
+- p95 versus mean
+### Tools
+- tracing
+## Conclusion
+- call to action
+"""
+
+
+@pytest.mark.unit
+def test_parses_sections_below_a_title_heading():
+    sections = parse_outline_sections(OUTLINE)
+
+    assert [s.title for s in sections] == ["Introduction", "Measuring It", "Conclusion"]
+    assert "### Tools" in sections[1].points
+
+
+@pytest.mark.unit
+def test_parses_numbered_outline():
+    sections = parse_outline_sections("1. Opening\n   - point\n2. Body\n3) Close")
+
+    assert [s.title for s in sections] == ["Opening", "Body", "Close"]
+
+
+@pytest.mark.unit
+def test_sections_are_generated_and_stitched_with_transitions():
+    def fake_section(transcript, wisdom, outline, title, points, position, total, **kwargs):
+        return f"## {title}\nbody {position}/{total}"
+
+    with patch("core.article_sections.generate_article_section", side_effect=fake_section), \
+            patch("core.article_sections.generate_section_transitions", return_value="1: Next, numbers.\n9: ignored"), \
+            patch("core.article_sections.generate_article") as single:
+        article = generate_article_by_sections("t", "w", OUTLINE)
+
+    single.assert_not_called()
+    assert article == ("## Introduction\nbody 1/3\n\nNext, numbers.\n\n## Measuring It\nbody 2/3"
+                       "\n\n## Conclusion\nbody 3/3")
+
+
+@pytest.mark.unit
+def test_falls_back_to_single_call_without_sections():
+    with patch("core.article_sections.generate_article", return_value="whole article") as single:
+        assert generate_article_by_sections("t", "w", "just one paragraph") == "whole article"
+    single.assert_called_once()
@@ -0,0 +1,93 @@
+"""
+Tests for cooperative cancellation
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.audio_chunks import transcribe_chunks
+from core.cancellation import (
+    CancellationToken, DeadlineExceeded, JobCancelled, abortable_client, cancellation_scope, current_token,
+)
+
+
+@pytest.mark.unit
+def test_child_token_follows_parent_and_own_deadline():
+    job = CancellationToken(deadline_seconds=60)
+    step = job.child(deadline_seconds=0.01)
+    assert step.remaining() <= 0.01
+    assert step.wait(1) is True
+    with pytest.raises(DeadlineExceeded):
+        step.raise_if_cancelled()
+    assert not job.is_cancelled
+
+    other = job.child()
+    job.cancel("stop")
+    with pytest.raises(JobCancelled, match="stop"):
+        other.raise_if_cancelled()
+
+
+@pytest.mark.unit
+def test_cancel_drops_queued_chunks():
+    started = []
+    workers_busy = threading.Event()
+
+    def slow_transcribe(path):
+        started.append(path)
+        if len(started) == 2:
+            workers_busy.set()
+        current_token().wait(10)
+        return "Transcription failed: aborted"
+
+    chunks = [{"index": i, "file_path": f"chunk_{i}.wav", "duration": 600} for i in range(6)]
+    token = CancellationToken()
+    threading.Thread(target=lambda: workers_busy.wait(5) and token.cancel()).start()
+
+    with patch("core.audio_chunks.transcribe_audio", side_effect=slow_transcribe):
+        with cancellation_scope(token), pytest.raises(JobCancelled):
+            transcribe_chunks(chunks, max_workers=2)
+
+    assert len(started) == 2
+
+
+class FakeSDKClient:
+    """Stands in for an OpenAI/Anthropic client: ``with_options`` returns the options"""
+
+    def with_options(self, **options):
+        return options
+
+
+@pytest.mark.unit
+def test_calls_of_one_job_share_a_pool_closed_on_release():
+    job = CancellationToken()
+    with cancellation_scope(job.child()):
+        with abortable_client(FakeSDKClient(), timeout=30) as first:
+            pass
+    with cancellation_scope(job.child()):
+        with abortable_client(FakeSDKClient()) as second:
+            pass
+
+    pool = first["http_client"]
+    assert second["http_client"] is pool
+    assert first["timeout"] == 30
+    assert not pool.is_closed
+    job.release()
+    assert pool.is_closed
+
+
+@pytest.mark.unit
+def test_cancel_closes_the_job_pool():
+    job = CancellationToken()
+    with cancellation_scope(job.child()):
+        with abortable_client(FakeSDKClient()) as options:
+            job.cancel("stop")
+            assert options["http_client"].is_closed
+        with pytest.raises(JobCancelled, match="stop"):
+            with abortable_client(FakeSDKClient()):
+                pass
@@ -0,0 +1,100 @@
+"""
+Tests for per-job token and cost accounting
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cost_accounting import (
+    JobUsage, UsageRecord, estimate_llm_cost, get_current_usage, record_transcription, record_usage,
+    usage_scope, usage_token_counts,
+)
+
+
+@pytest.fixture(autouse=True)
+def quiet_exports():
+    with patch("core.metrics_exporter.track_ai_usage"), patch("core.logging_config.log_ai_request"):
+        yield
+
+
+@pytest.mark.unit
+def test_records_aggregate_per_step_across_copied_contexts():
+    job_usage = JobUsage(job_id="job-1")
+
+    def call(step):
+        record_usage(UsageRecord(step=step, provider="openai", model="gpt-4o",
+                                 prompt_tokens=100, completion_tokens=10, cost_usd=0.001))
+
+    with usage_scope(job_usage):
+        call("wisdom_extraction")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, call, "article_writing") for _ in range(8)]
+            for future in futures:
+                future.result()
+        # A plain submit does not inherit the scope
+        pool = ThreadPoolExecutor(max_workers=1)
+        assert pool.submit(get_current_usage).result() is None
+        pool.shutdown()
+    call("outside_scope")
+
+    steps = job_usage.by_step()
+    assert set(steps) == {"wisdom_extraction", "article_writing"}
+    assert steps["article_writing"]["calls"] == 8
+    assert steps["article_writing"]["prompt_tokens"] == 800
+    assert steps["article_writing"]["models"] == ["openai/gpt-4o"]
+    totals = job_usage.totals()
+    assert (totals["calls"], totals["completion_tokens"]) == (9, 90)
+    assert totals["cost_usd"] == pytest.approx(0.009)
+    assert job_usage.summary()["job_id"] == "job-1"
+
+
+@pytest.mark.unit
+def test_llm_cost_with_cache_reads_and_writes():
+    # gpt-4o: $2.50 input, $1.25 cached input, $10.00 output per 1M tokens
+    assert estimate_llm_cost("gpt-4o", 1_000_000, 100_000) == pytest.approx(3.50)
+    assert estimate_llm_cost("gpt-4o", 1_000_000, 100_000, cached_tokens=400_000) == pytest.approx(3.00)
+    # claude-3-5-sonnet: $3.00 input, $0.30 cache read, $3.75 cache write
+    assert estimate_llm_cost("claude-3-5-sonnet-20241022", 1_000_000, 0,
+                             cached_tokens=200_000, cache_write_tokens=500_000) == pytest.approx(2.835)
+    assert estimate_llm_cost("unknown-model", 1000, 1000) == 0.0
+
+
+@pytest.mark.unit
+def test_usage_token_counts_include_anthropic_cache_tokens():
+    openai_usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=300)
+    assert usage_token_counts(openai_usage, cached_tokens=1024) == (1200, 300)
+    anthropic_usage = SimpleNamespace(input_tokens=50, output_tokens=200,
+                                      cache_read_input_tokens=0, cache_creation_input_tokens=4000)
+    assert usage_token_counts(anthropic_usage, cached_tokens=0) == (4050, 200)
+    assert usage_token_counts(None) == (0, 0)
+
+
+@pytest.mark.unit
+def test_transcription_records_audio_seconds():
+    job_usage = JobUsage()
+    with usage_scope(job_usage):
+        record = record_transcription(audio_seconds=90.0, latency=4.2)
+        record_transcription(audio_seconds=30.0, latency=1.0)
+
+    assert record.cost_usd == pytest.approx(0.009)  # 1.5 minutes at $0.006
+    step = job_usage.by_step()["transcription"]
+    assert (step["calls"], step["audio_seconds"], step["prompt_tokens"]) == (2, 120.0, 0)
+    assert step["cost_usd"] == pytest.approx(0.012)
+    assert job_usage.primary_model() == (None, None)  # Whisper calls are not LLM calls
+
+
+@pytest.mark.unit
+def test_primary_model_follows_the_calls_actually_made():
+    job_usage = JobUsage()
+    for provider, model in [("openai", "gpt-4o-mini"), ("anthropic", "claude-3-5-sonnet"),
+                            ("anthropic", "claude-3-5-sonnet")]:
+        job_usage.add(UsageRecord(step="outline_creation", provider=provider, model=model))
+    assert job_usage.primary_model() == ("anthropic", "claude-3-5-sonnet")
@@ -0,0 +1,150 @@
+"""
+Tests for the budgeted editorial critique-and-revise pass
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.editor import EditorBudget, EditorialPass, needs_revision, revision_waves
+
+DRAFTS = {
+    "wisdom_extraction": "draft wisdom",
+    "outline_creation": "draft outline",
+    "article_creation": "draft article",
+    "social_content": "draft social",
+}
+
+
+def critic(verdicts):
+    """editor_critique stand-in answering per content type"""
+    def critique(content, content_type, *args):
+        verdict = verdicts.get(content_type, "APPROVE")
+        if isinstance(verdict, Exception):
+            raise verdict
+        return verdict if verdict.startswith("Error") else f"VERDICT: {verdict}\nNotes on {content}"
+    return critique
+
+
+def recording_revisers(calls):
+    def reviser(key):
+        def revise(prompt, current):
+            calls.append((key, dict(current)))
+            return f"revised {key.split('_')[0]}"
+        return revise
+    return {key: reviser(key) for key in DRAFTS}
+
+
+@pytest.mark.unit
+def test_needs_revision_follows_the_verdict():
+    assert needs_revision("VERDICT: REVISE\nTighten the intro")
+    assert not needs_revision("verdict: approve\nLooks good")
+    assert needs_revision("The intro is weak")  # no verdict: revise
+    assert not needs_revision("")
+    assert not needs_revision("Error: provider unavailable")
+
+
+@pytest.mark.unit
+def test_only_artifacts_the_editor_rejects_are_revised():
+    calls = []
+    with patch("core.editor.editor_critique", critic({"article_writing": "REVISE"})):
+        results = EditorialPass().run(DRAFTS, recording_revisers(calls))
+
+    assert [key for key, _ in calls] == ["article_creation"]
+    assert results["article_creation"].revised and results["article_creation"].content == "revised article"
+    assert not results["wisdom_extraction"].revised
+    assert results["wisdom_extraction"].critique.startswith("VERDICT: APPROVE")
+    assert all(result.rounds == 1 for result in results.values())
+
+
+@pytest.mark.unit
+def test_revisions_see_revised_upstream_artifacts():
+    assert revision_waves(["social_content", "wisdom_extraction", "article_creation"]) == [
+        ["wisdom_extraction"], ["article_creation"], ["social_content"]]
+
+    calls = []
+    verdicts = {"wisdom_extraction": "REVISE", "article_writing": "REVISE", "social_media": "REVISE"}
+    with patch("core.editor.editor_critique", critic(verdicts)):
+        EditorialPass().run(DRAFTS, recording_revisers(calls))
+
+    order = [key for key, _ in calls]
+    assert order == ["wisdom_extraction", "article_creation", "social_content"]
+    article_inputs, social_inputs = calls[1][1], calls[2][1]
+    assert article_inputs["wisdom_extraction"] == "revised wisdom"
+    assert article_inputs["outline_creation"] == "draft outline"
+    assert social_inputs["article_creation"] == "revised article"
+
+
+@pytest.mark.unit
+def test_rounds_repeat_only_for_revised_artifacts():
+    calls = []
+    with patch("core.editor.editor_critique", critic({"outline_creation": "REVISE"})):
+        results = EditorialPass(EditorBudget(max_rounds=3)).run(DRAFTS, recording_revisers(calls))
+
+    assert [key for key, _ in calls] == ["outline_creation"] * 3
+    assert results["outline_creation"].rounds == 3
+    assert len(results["outline_creation"].critiques) == 3
+    assert len(results["wisdom_extraction"].critiques) == 1
+
+
+@pytest.mark.unit
+def test_token_budget_skips_critiques_and_revisions():
+    calls = []
+    with patch("core.editor.editor_critique", critic({"wisdom_extraction": "REVISE"})):
+        results = EditorialPass(EditorBudget(max_tokens=5)).run(DRAFTS, recording_revisers(calls))
+
+    assert calls == []
+    assert {result.skipped_reason for result in results.values()} == {"token budget exhausted"}
+    assert all(result.critique == "" for result in results.values())
+
+
+@pytest.mark.unit
+def test_time_budget_abandons_slow_critiques():
+    release = threading.Event()
+
+    def slow_critique(content, content_type, *args):
+        if content_type == "social_media":
+            release.wait(5)
+        return "VERDICT: REVISE"
+
+    calls = []
+    started = time.monotonic()
+    try:
+        with patch("core.editor.editor_critique", slow_critique):
+            editorial_pass = EditorialPass(EditorBudget(max_seconds=0.3))
+            results = editorial_pass.run(DRAFTS, recording_revisers(calls))
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert results["social_content"].critique == "" and not results["social_content"].revised
+    # Waiting for the slow critique used up the budget, so nothing is revised
+    assert results["wisdom_extraction"].critique == "VERDICT: REVISE"
+    assert calls == []
+    assert results["wisdom_extraction"].skipped_reason == "time budget exhausted"
+    assert editorial_pass.report()["max_seconds"] == 0.3
+
+    results = EditorialPass(EditorBudget(max_seconds=0)).run(DRAFTS, recording_revisers([]))
+    assert {result.skipped_reason for result in results.values()} == {"time budget exhausted"}
+
+
+@pytest.mark.unit
+def test_failed_critiques_and_revisions_keep_the_draft():
+    verdicts = {"wisdom_extraction": RuntimeError("provider down"), "outline_creation": "Error: timeout",
+                "article_writing": "REVISE"}
+    revisers = recording_revisers([])
+    revisers["article_creation"] = lambda prompt, current: "Error: generation failed"
+    with patch("core.editor.editor_critique", critic(verdicts)):
+        results = EditorialPass().run(DRAFTS, revisers)
+
+    assert results["wisdom_extraction"].critique == ""
+    assert results["outline_creation"].critique == "Error: timeout"
+    for key in ("wisdom_extraction", "outline_creation", "article_creation"):
+        assert not results[key].revised
+        assert results[key].content == DRAFTS[key]
@@ -0,0 +1,131 @@
+"""
+Tests for fair-share scheduling and quota admission
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import Mock, patch
+
+from postgrest.exceptions import APIError
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.fair_scheduler import FairScheduler, QuotaExceeded, Tenant, admit_job
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.mark.unit
+def test_small_job_overtakes_another_users_batch():
+    scheduler = FairScheduler("transcription", capacity=1)
+    batch, small = Tenant(user_id="batch"), Tenant(user_id="small")
+    order = []
+
+    def run(tenant, cost):
+        with scheduler.slot(cost=cost, tenant=tenant):
+            order.append(tenant.user_id)
+
+    with ExitStack() as held:
+        held.enter_context(scheduler.slot(cost=600, tenant=batch))
+        threads = [threading.Thread(target=run, args=(batch, 600)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        _wait_until(lambda: scheduler.snapshot()["waiting"].get("batch") == 3)
+        threads.append(threading.Thread(target=run, args=(small, 60)))
+        threads[-1].start()
+        _wait_until(lambda: scheduler.snapshot()["waiting"].get("small") == 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["small", "batch", "batch", "batch"]
+
+
+@pytest.mark.unit
+def test_per_user_concurrency_is_capped():
+    scheduler = FairScheduler("llm", capacity=4, per_user_limit=2)
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(tenant=Tenant(user_id="alice")):
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: scheduler.snapshot()["waiting"].get("alice") == 1)
+    snapshot = scheduler.snapshot()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert snapshot["running"] == {"alice": 2}
+    assert snapshot["in_use"] == 2
+    assert scheduler.snapshot()["in_use"] == 0
+
+
+@pytest.mark.unit
+def test_admission_checks_remaining_quota_and_tier():
+    user = {"usage_quota": 60, "usage_current": 55, "subscription_tier": "pro"}
+    with patch("core.fair_scheduler._load_user", return_value=user):
+        tenant = admit_job("u1", audio_minutes=4)
+        with pytest.raises(QuotaExceeded, match="10.0 audio minutes needed, 5.0 remaining"):
+            admit_job("u1", audio_minutes=10)
+
+    assert (tenant.tier, tenant.weight, tenant.remaining_minutes) == ("pro", 3.0, 5)
+    assert admit_job(None).user_id == "anonymous"
+
+
+def _usage_client(rpc_error=None):
+    from core.supabase_integration import SupabaseClient
+
+    db = SupabaseClient.__new__(SupabaseClient)
+    db.client = Mock()
+    db._increment_rpc_available = True
+    if rpc_error is not None:
+        db.client.rpc.return_value.execute.side_effect = rpc_error
+    return db
+
+
+@pytest.mark.unit
+def test_usage_is_charged_with_a_single_increment():
+    db = _usage_client()
+    db.client.rpc.return_value.execute.return_value.data = 12.5
+
+    assert db.add_user_usage(7, 2.5)
+    db.client.rpc.assert_called_once_with("increment_usage", {"p_user_id": 7, "p_minutes": 2.5})
+    db.client.table.assert_not_called()
+
+
+@pytest.mark.unit
+def test_usage_fallback_retries_when_another_job_updated_first():
+    db = _usage_client(rpc_error=APIError({"code": "PGRST202", "message": "Could not find the function"}))
+    users = iter([{"usage_current": 10.0}, {"usage_current": 12.0}])
+    update = db.client.table.return_value.update
+    update.return_value.eq.return_value.eq.return_value.execute.side_effect = [
+        Mock(data=[]), Mock(data=[{"id": 7}])]  # the first compare-and-set loses the race
+
+    with patch.object(db, "get_user", side_effect=lambda user_id: next(users)):
+        assert db.add_user_usage(7, 2.5)
+
+    assert [c.args[0] for c in update.call_args_list] == [{"usage_current": 12.5}, {"usage_current": 14.5}]
+    assert update.return_value.eq.return_value.eq.call_args_list[1].args == ("usage_current", 12.0)
+    assert not db._increment_rpc_available
+
+
+@pytest.mark.unit
+def test_ambiguous_rpc_failures_do_not_fall_back():
+    db = _usage_client(rpc_error=TimeoutError("read timed out"))
+
+    assert not db.add_user_usage(7, 2.5)
+    db.client.table.assert_not_called()  # the increment may have committed
+    assert db._increment_rpc_available
@@ -0,0 +1,100 @@
+"""
+Tests for rolling-window SLOs and alert hooks
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.health_check import HealthChecker, RollingWindow
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_rolling_window_quantiles_and_expiry():
+    clock = FakeClock()
+    window = RollingWindow(300, slots=30, clock=clock)
+    for i in range(100):
+        window.record(0.1 if i < 90 else 5.0, error=i >= 98)
+
+    summary = window.summary()
+    assert summary.count == 100
+    assert summary.errors == 2
+    assert summary.error_rate == pytest.approx(2.0)
+    assert 0.1 <= summary.p50 < 0.1 * 1.15
+    assert 5.0 <= summary.p95 < 5.0 * 1.15
+
+    clock.now += 150
+    window.record(1.0)
+    assert window.summary().count == 101
+
+    # The first batch ages out of the window; the later sample stays
+    clock.now += 160
+    summary = window.summary()
+    assert summary.count == 1
+    assert 1.0 <= summary.p50 < 1.15
+
+
+@pytest.mark.unit
+def test_slo_metrics_and_uptime():
+    clock = FakeClock()
+    checker = HealthChecker(clock=clock)
+    for _ in range(99):
+        checker.record_request(0.2, 200)
+    checker.record_request(0.2, 503)
+    checker.record_pipeline(60.0, success=True)
+    checker.record_step("transcription", 30.0)
+    checker.record_user("alice")
+    checker.record_user("bob")
+    clock.now += 12
+
+    metrics = checker.get_slo_metrics()
+    assert metrics.error_rate_5xx == pytest.approx(1.0)
+    assert 200 <= metrics.median_response_time < 230
+    assert metrics.requests_5m == 100
+    assert metrics.active_users_1h == 2
+    assert metrics.pipeline_success_rate == 100.0
+    assert 30.0 <= metrics.step_p95_seconds["transcription"] < 34.5
+
+    status = checker.get_health_status()
+    assert status.status == "healthy"
+    assert status.uptime_seconds == pytest.approx(12)
+    assert checker.slo_compliance() == 100.0
+
+
+@pytest.mark.unit
+def test_alert_hooks_fire_on_violation_then_after_cooldown():
+    clock = FakeClock()
+    checker = HealthChecker(clock=clock)
+    alerts = []
+    checker.add_alert_hook(alerts.append)
+
+    for _ in range(4):
+        checker.record_pipeline(30.0, success=True)
+    assert alerts == []
+    clock.now += 10  # outcomes are re-evaluated at most every 10 seconds
+    checker.record_pipeline(30.0, success=False)   # 80% success against a 95% target
+    assert [alert.slo for alert in alerts] == ["pipeline_success_percent"]
+    assert alerts[0].value == pytest.approx(80.0)
+    assert checker.get_health_status().status == "degraded"
+    assert checker.slo_compliance() == 0.0
+
+    # Still failing: no repeat inside the cooldown, one more after it
+    clock.now += 60
+    checker.record_step("article_creation", 900.0)  # past its 300s p95 target
+    assert [alert.slo for alert in alerts] == ["pipeline_success_percent", "article_creation_p95_seconds"]
+    for _ in range(20):
+        checker.record_pipeline(30.0, success=True)  # pipeline success recovers to 96%
+    clock.now += 901
+    checker.record_step("article_creation", 900.0)
+    assert [alert.slo for alert in alerts[2:]] == ["article_creation_p95_seconds"]
@@ -0,0 +1,69 @@
+"""
+Tests for incremental wisdom extraction during chunked transcription
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.incremental_wisdom import IncrementalWisdomExtractor
+
+
+@pytest.mark.unit
+def test_sections_follow_contiguous_prefix_and_are_merged():
+    extracted = []
+
+    def fake_wisdom(text, **kwargs):
+        extracted.append(text)
+        return f"wisdom({text})"
+
+    with patch("core.incremental_wisdom.generate_wisdom", side_effect=fake_wisdom), \
+            patch("core.incremental_wisdom.merge_wisdom", side_effect=lambda sections, **kw: " + ".join(sections)):
+        extractor = IncrementalWisdomExtractor(section_chunks=2)
+        extractor.start([0, 1, 2, 3, 4])
+
+        extractor.add_chunk(1, "b")
+        assert extractor.sections == []  # chunk 0 still transcribing
+        extractor.add_chunk(0, "a")
+        extractor.add_chunk(3, "d")
+        extractor.add_chunk(2, None)      # failed chunk does not block the prefix
+        assert len(extractor.sections) == 2
+        extractor.add_chunk(4, "e")
+
+        wisdom = extractor.finalize()
+
+    assert extracted == ["a b", "d", "e"]
+    assert wisdom == "wisdom(a b) + wisdom(d) + wisdom(e)"
+    assert extractor.report() == {"sections": 3, "sections_started_during_transcription": 2}
+
+
+@pytest.mark.unit
+def test_single_section_skips_merge():
+    with patch("core.incremental_wisdom.generate_wisdom", return_value="only"), \
+            patch("core.incremental_wisdom.merge_wisdom") as merge:
+        extractor = IncrementalWisdomExtractor(section_chunks=3)
+        extractor.start([0, 1])
+        extractor.add_chunk(0, "a")
+        extractor.add_chunk(1, "b")
+
+        assert extractor.finalize() == "only"
+        merge.assert_not_called()
+
+
+@pytest.mark.unit
+def test_failed_chunk_text_is_not_fed_to_wisdom():
+    from core.audio_chunks import transcribe_chunks
+
+    outputs = {"a.wav": "first words", "b.wav": "Error: OpenAI client not available.",
+               "c.wav": "third words", "d.wav": "fourth words"}
+    chunks = [{"index": i, "file_path": path, "duration": 600} for i, path in enumerate(outputs)]
+    fed = {}
+    with patch("core.audio_chunks.transcribe_audio", side_effect=outputs.get):
+        transcript = transcribe_chunks(chunks, max_workers=2, on_chunk=lambda index, text: fed.update({index: text}))
+
+    assert fed == {0: "first words", 1: None, 2: "third words", 3: "fourth words"}
+    assert transcript == "first words third words fourth words"
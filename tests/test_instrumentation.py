@@ -0,0 +1,61 @@
+"""
+Tests for the hot-path instrumentation registry
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.instrumentation import InstrumentationRegistry, function_calls, function_errors, function_max_seconds
+
+
+def parse_chunk(text):
+    """Parse one chunk"""
+    if not text:
+        raise ValueError("empty chunk")
+    return text.upper()
+
+
+@pytest.mark.unit
+def test_disabled_modules_get_the_original_function():
+    instrumentation = InstrumentationRegistry(modules=["core.llm_router"], flush_seconds=0)
+    assert instrumentation.instrument()(parse_chunk) is parse_chunk
+
+
+@pytest.mark.unit
+def test_counts_calls_and_errors_across_threads_and_flushes():
+    instrumentation = InstrumentationRegistry(modules=["tests"], flush_seconds=0)
+    wrapped = instrumentation.instrument("test.parse_chunk", module="tests.test_instrumentation")(parse_chunk)
+    assert wrapped.__name__ == "parse_chunk" and wrapped.__doc__ == "Parse one chunk"
+
+    def work():
+        for i in range(100):
+            try:
+                wrapped("" if i % 10 == 0 else "text")
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wrapped("text")  # a live thread alongside the exited ones
+
+    calls, errors, seconds, slowest = instrumentation.snapshot()["test.parse_chunk"]
+    assert (calls, errors) == (401, 40)
+    assert 0 < slowest <= seconds
+
+    instrumentation.flush()
+    instrumentation.flush()  # no new calls: nothing added twice
+    assert function_calls.value(function="test.parse_chunk") == 401
+    assert function_errors.value(function="test.parse_chunk") == 40
+    assert function_max_seconds.value(function="test.parse_chunk") == 0  # reset by the first flush
+    wrapped("again")
+    instrumentation.flush()
+    assert function_calls.value(function="test.parse_chunk") == 402
+    assert function_max_seconds.value(function="test.parse_chunk") > 0
@@ -0,0 +1,81 @@
+"""
+Tests for the durable SQLite job queue
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.job_queue import JobQueue, QueueWorker
+from core.pipeline_engine import PipelineJob
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), visibility_timeout=60, max_attempts=2)
+
+
+@pytest.mark.unit
+def test_per_user_fifo_with_global_priority(job_queue):
+    a1 = job_queue.submit(PipelineJob(user_id="alice"))
+    a2 = job_queue.submit(PipelineJob(user_id="alice"), priority=5)
+    b1 = job_queue.submit(PipelineJob(user_id="bob"), priority=1)
+
+    # alice's high-priority job waits behind her earlier one
+    leased = [job_queue.lease("w1").job_id for _ in range(3)]
+
+    assert leased == [b1, a1, a2]
+    assert job_queue.lease("w1") is None
+
+
+@pytest.mark.unit
+def test_expired_lease_is_retried_then_failed(job_queue):
+    job_id = job_queue.submit(PipelineJob(user_id="alice"))
+
+    with patch("core.job_queue.time.time", return_value=1e10):
+        assert job_queue.lease("dead-worker").job_id == job_id
+    with patch("core.job_queue.time.time", return_value=1e10 + 61):
+        assert job_queue.lease("w2") is None          # requeued with backoff
+    assert job_queue.status(job_id)["status"] == "queued"
+
+    with patch("core.job_queue.time.time", return_value=1e10 + 200):
+        assert job_queue.lease("w2").job_id == job_id
+    assert job_queue.fail(job_id, "w2", "transcription: boom") == "failed"
+    status = job_queue.status(job_id)
+    assert (status["status"], status["attempts"], status["error"]) == ("failed", 2, "transcription: boom")
+
+
+@pytest.mark.unit
+def test_worker_runs_job_and_stores_results(job_queue):
+    job_id = job_queue.submit(PipelineJob(transcript="hello", user_id="alice"))
+    outcome = {"results": {"article_creation": "article"}, "error": None, "failed_step": None}
+
+    with patch("core.job_queue.run_job", return_value=outcome) as run:
+        processed = QueueWorker(job_queue, worker_id="w1").run(max_jobs=1)
+
+    assert processed == 1
+    assert run.call_args.args[0]["job_id"] == job_id
+    assert job_queue.status(job_id)["status"] == "completed"
+    assert job_queue.results(job_id) == {"article_creation": "article"}
+    assert job_queue.heartbeat(job_id, "w1") is False  # lease released
+
+
+@pytest.mark.unit
+def test_cancel_drops_queued_job_and_flags_running_one(job_queue):
+    running = job_queue.submit(PipelineJob(user_id="alice"))
+    assert job_queue.lease("w1").job_id == running
+    waiting = job_queue.submit(PipelineJob(user_id="bob"))
+
+    assert job_queue.cancel(waiting)
+    assert job_queue.status(waiting)["status"] == "cancelled"
+    assert job_queue.lease("w2") is None
+
+    assert job_queue.cancel(running, reason="user navigated away")
+    assert job_queue.cancel_requested(running) == "user navigated away"
+    assert job_queue.heartbeat(running, "w1") is True   # keeps its lease while stopping
+    assert job_queue.fail(running, "w1", "outline_creation: user navigated away") == "cancelled"
+    assert job_queue.cancel(running) is False
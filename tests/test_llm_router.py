@@ -0,0 +1,130 @@
+"""
+Tests for the multi-provider LLM router
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.fair_scheduler import FairScheduler
+from core.llm_router import LLMRouterError, ProviderRouter, RateLimiter, StepPolicy
+
+
+def _chat_client(text="ok", error=None):
+    client = Mock()
+    if error:
+        client.chat.completions.create.side_effect = error
+    else:
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="stop")],
+            usage=None,
+        )
+        client.chat.completions.create.return_value = response
+    return client
+
+
+def _router(**clients):
+    router = ProviderRouter(policies={"test": StepPolicy(fallbacks=[("grok", None)])})
+    router._clients.update(clients)
+    return router
+
+
+@pytest.mark.unit
+def test_routes_to_primary_provider():
+    router = _router(openai=_chat_client("from openai"), grok=_chat_client("from grok"))
+
+    response = router.complete("test", "system", "user")
+
+    assert response.text == "from openai"
+    assert response.provider == "openai"
+    assert response.model == "gpt-4o"
+
+
+@pytest.mark.unit
+def test_fails_over_on_provider_error():
+    router = _router(openai=_chat_client(error=TimeoutError("timed out")), grok=_chat_client("from grok"))
+
+    response = router.complete("test", "system", "user")
+
+    assert response.provider == "grok"
+    assert response.attempts == ["openai/gpt-4o", "grok/grok-beta"]
+    assert router.stats["openai"].error_rate == 1.0
+
+
+@pytest.mark.unit
+def test_raises_when_all_providers_fail():
+    router = _router(openai=_chat_client(error=RuntimeError("boom")), grok=_chat_client(error=RuntimeError("down")))
+
+    with pytest.raises(LLMRouterError):
+        router.complete("test", "system", "user")
+
+
+@pytest.mark.unit
+def test_rate_limited_provider_is_skipped():
+    router = _router(openai=_chat_client("from openai"), grok=_chat_client("from grok"))
+    router.limiters["openai"] = RateLimiter(requests_per_minute=1)
+
+    assert router.complete("test", "system", "user").provider == "openai"
+    assert router.complete("test", "system", "user").provider == "grok"
+
+
+@pytest.mark.unit
+def test_scheduler_slot_is_not_held_while_waiting_for_the_rate_limit():
+    router = _router(openai=_chat_client("from openai"))
+    limiter = Mock(**{"try_acquire.side_effect": [False, True], "seconds_until_available.return_value": 0.01})
+    router.limiters["openai"] = limiter
+    scheduler = FairScheduler("llm", capacity=1)
+    slots_in_use = []
+
+    def sleep(seconds):
+        slots_in_use.append(scheduler.snapshot()["in_use"])
+
+    with patch("core.llm_router.get_scheduler", return_value=scheduler), \
+            patch("core.llm_router.time.sleep", side_effect=sleep):
+        assert router.complete("test", "system", "user").provider == "openai"
+
+    assert slots_in_use == [0]
+    assert scheduler.snapshot()["in_use"] == 0
+
+
+@pytest.mark.unit
+def test_prompt_layout_prefix_is_shared_across_steps():
+    from core.prompt_layout import PromptLayout
+
+    kb = {"Style": "plain", "Audience": "builders"}
+    wisdom = PromptLayout.for_step("Extract wisdom", knowledge_base=kb, transcript="hello world")
+    outline = PromptLayout.for_step("Create outline", "WISDOM:\nx", knowledge_base=dict(reversed(kb.items())),
+                                    transcript="hello world")
+
+    assert wisdom.prefix == outline.prefix
+    assert wisdom.openai_messages()[:2] == outline.openai_messages()[:2]
+    assert wisdom.task != outline.task
+
+
+@pytest.mark.unit
+def test_tiered_policy_uses_fast_model_for_intermediate_steps():
+    from core.llm_router import build_step_policies
+
+    router = ProviderRouter(policies=build_step_policies("tiered"))
+    router._clients["openai"] = _chat_client("ok")
+
+    assert router.complete("outline_creation", "system", "user", provider="openai").model == "gpt-4o-mini"
+    assert router.complete("article_writing", "system", "user", provider="openai").model == "gpt-4o"
+    # An explicitly selected model is kept on tiered steps too
+    assert router.complete("outline_creation", "system", "user", model="gpt-4o").model == "gpt-4o"
+
+
+@pytest.mark.unit
+def test_json_schema_uses_provider_structured_output():
+    router = _router(openai=_chat_client('{"posts": []}'))
+
+    router.complete("test", "system", "user", json_schema={"name": "posts", "schema": {"type": "object"}})
+
+    kwargs = router._clients["openai"].chat.completions.create.call_args.kwargs
+    assert kwargs["response_format"]["type"] == "json_schema"
+    assert kwargs["response_format"]["json_schema"]["name"] == "posts"
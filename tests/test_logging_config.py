@@ -0,0 +1,83 @@
+"""
+Tests for the queued, batching and rotating log handlers
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import json
+import logging
+import os
+import queue
+import time
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.logging_config import (
+    BatchingQueueListener, BatchingRotatingFileHandler, DroppingQueueHandler, JsonLinesFormatter,
+)
+
+
+@pytest.mark.unit
+def test_listener_writes_batches_and_rotates_by_size(tmp_path):
+    path = tmp_path / "structured.jsonl"
+    handler = BatchingRotatingFileHandler(path, max_bytes=2000, backup_count=2)
+    handler.setFormatter(JsonLinesFormatter())
+    batches = []
+    emit_batch = handler.emit_batch
+    handler.emit_batch = lambda records: (batches.append(len(records)), emit_batch(records))
+
+    log = logging.getLogger("test.logging_config.batches")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    queue_handler = DroppingQueueHandler(queue.Queue())
+    log.addHandler(queue_handler)
+    listener = BatchingQueueListener(queue_handler.queue, handler, batch_size=50, source=queue_handler)
+    for i in range(200):
+        log.info("event", extra={"structured": {"event": "test", "n": i}})
+    listener.start()
+    listener.stop()
+    log.removeHandler(queue_handler)
+    handler.close()
+
+    assert sum(batches) == 200
+    assert max(batches) == 50
+    rotated = sorted(tmp_path.glob("structured.jsonl.2*"))
+    assert len(rotated) == 2  # older rotations were pruned
+    lines = [line for p in rotated + [path] for line in p.read_text().splitlines()]
+    numbers = [json.loads(line)["n"] for line in lines]
+    assert numbers == sorted(numbers) and numbers[-1] == 199
+    assert all(p.stat().st_size <= 2000 for p in rotated + [path])
+
+
+@pytest.mark.unit
+def test_reopens_file_rotated_by_another_process(tmp_path):
+    path = tmp_path / "whisperforge.log"
+    handler = BatchingRotatingFileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.emit(logging.LogRecord("wf", logging.INFO, __file__, 0, "before", None, None))
+
+    os.rename(path, tmp_path / "whisperforge.log.20260101-000000")  # another worker rotated it
+    handler.emit(logging.LogRecord("wf", logging.INFO, __file__, 0, "after", None, None))
+    handler.close()
+
+    assert path.read_text() == "after\n"
+    assert (tmp_path / "whisperforge.log.20260101-000000").read_text() == "before\n"
+
+
+@pytest.mark.unit
+def test_rotates_files_older_than_the_rotation_period(tmp_path):
+    path = tmp_path / "errors.log"
+    handler = BatchingRotatingFileHandler(path, rotate_seconds=3600)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.emit(logging.LogRecord("wf", logging.ERROR, __file__, 0, "old", None, None))
+    two_hours_ago = time.time() - 7200
+    os.utime(path, (two_hours_ago, two_hours_ago))
+
+    handler.emit(logging.LogRecord("wf", logging.ERROR, __file__, 0, "new", None, None))
+    handler.emit(logging.LogRecord("wf", logging.ERROR, __file__, 0, "newer", None, None))
+    handler.close()
+
+    assert path.read_text() == "new\nnewer\n"
+    assert [p.read_text() for p in tmp_path.glob("errors.log.2*")] == ["old\n"]
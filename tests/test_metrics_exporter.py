@@ -0,0 +1,113 @@
+"""
+Tests for the Prometheus metrics registry and /metrics endpoint
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import json
+import re
+import socket
+import threading
+import urllib.request
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.metrics_exporter import (
+    MetricsRegistry, http_requests, start_metrics_server, step_duration, timed_request, timed_step, track_pipeline,
+    track_request,
+)
+
+
+@pytest.mark.unit
+def test_histogram_buckets_are_cumulative_under_concurrent_observers():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_duration_seconds", "Test durations", ("step",), buckets=(0.1, 1.0))
+
+    def observe():
+        for value in (0.05, 0.1, 0.5, 5.0):
+            for _ in range(250):
+                histogram.observe(value, step="wisdom")
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = histogram.snapshot(step="wisdom")
+    assert snapshot["buckets"] == {"0.1": 2000, "1": 3000, "+Inf": 4000}
+    assert snapshot["count"] == 4000
+    assert snapshot["sum"] == pytest.approx(1000 * (0.05 + 0.1 + 0.5 + 5.0))
+
+    text = "\n".join(histogram.render())
+    assert '# TYPE test_duration_seconds histogram' in text
+    assert 'test_duration_seconds_bucket{step="wisdom",le="+Inf"} 4000' in text
+    assert 'test_duration_seconds_count{step="wisdom"} 4000' in text
+
+
+@pytest.mark.unit
+def test_labels_are_validated_and_escaped():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("path",))
+    with pytest.raises(ValueError):
+        counter.inc(status="200")
+    with pytest.raises(ValueError):
+        counter.inc(-1, path="/")
+    with pytest.raises(ValueError):
+        registry.gauge("test_total", "Same name, other type")
+
+    counter.inc(path='/a"b')
+    assert registry.counter("test_total", "Test counter", ("path",)) is counter
+    assert 'test_total{path="/a\\"b"} 1' in registry.render()
+
+
+@pytest.mark.unit
+def test_metrics_endpoint_serves_dashboard_series():
+    track_request(0.2, 503, "GET", "/health")
+    track_pipeline("background", 90.0, success=True)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = start_metrics_server(port, "127.0.0.1")
+    assert server is not None
+    port = server.server_address[1]
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+
+    dashboard = json.loads((Path(__file__).parent.parent / "monitoring" / "grafana_dashboard.json").read_text())
+    queried = set(re.findall(r"whisperforge_[a-z0-9_]+", json.dumps(dashboard)))
+    exposed = set(re.findall(r"^(whisperforge_[a-z0-9_]+)", body, re.MULTILINE))
+    assert queried <= exposed
+    assert 'whisperforge_http_requests_total{method="GET",path="/health",status="503"}' in body
+
+
+@pytest.mark.unit
+def test_timed_step_records_failures_and_reraises():
+    with timed_step("timed_test"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed_step("timed_test"):
+            raise RuntimeError("boom")
+
+    assert step_duration.snapshot(step="timed_test", status="ok")["count"] == 1
+    assert step_duration.snapshot(step="timed_test", status="error")["count"] == 1
+
+
+@pytest.mark.unit
+def test_timed_request_counts_errors_but_not_control_flow():
+    class Rerun(BaseException):
+        """Stands in for Streamlit's RerunException"""
+
+    with timed_request("GET", "/timed"):
+        pass
+    with pytest.raises(Rerun):
+        with timed_request("GET", "/timed"):
+            raise Rerun()
+    with pytest.raises(ValueError):
+        with timed_request("GET", "/timed"):
+            raise ValueError("page failed")
+
+    assert http_requests.value(method="GET", path="/timed", status=200) == 2
+    assert http_requests.value(method="GET", path="/timed", status=500) == 1
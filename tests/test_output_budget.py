@@ -0,0 +1,86 @@
+"""
+Tests for per-step output budgets and truncated-output continuation
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import Mock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.content_generation import _complete
+from core.llm_router import LLMResponse
+from core.output_budget import END_MARKER, max_tokens_for, template_sections
+from core.prompt_layout import PromptLayout
+
+
+@pytest.mark.unit
+def test_budget_scales_with_input_within_profile_bounds():
+    short = max_tokens_for("article_writing", "word " * 100)
+    long = max_tokens_for("article_writing", "word " * 20000)
+
+    assert short == 800 + int(125 * 0.25)
+    assert long == 4000
+
+
+@pytest.mark.unit
+def test_template_sections_and_target_length_drive_budget():
+    template = "# Show Notes\n\n## Summary\n\n## Key Moments\n\n## Links\n"
+
+    assert template_sections(template) == 3
+    assert max_tokens_for("article_writing", "", template) == 3 * 350
+    assert max_tokens_for("article_writing", "", target_words=1000) == 1680
+    assert max_tokens_for("unknown_step", default=1234) == 1234
+
+
+@pytest.mark.unit
+def test_section_and_transition_budgets_scale_with_the_article():
+    transcript = "word " * 20000  # whole-article budget 800 + 6250, above one call's 4000
+    assert max_tokens_for("article_writing", transcript, parts=4) == int(7050 / 4 * 1.5)
+    assert max_tokens_for("article_writing", "word " * 100, parts=6) == 350  # per-section floor
+    assert max_tokens_for("article_writing", "", target_words=3000, parts=3) == int(5040 / 3 * 1.5)
+    assert max_tokens_for("article_transitions", "x" * 4 * 500) == 100 + 200
+    assert max_tokens_for("article_transitions", "x" * 4 * 20000) == 1500
+
+
+@pytest.mark.unit
+def test_article_sections_use_their_share_of_the_budget_and_continue():
+    from core.content_generation import generate_article_section
+
+    router = Mock()
+    router.complete.side_effect = [
+        LLMResponse(text="## Part two\nStart ", provider="openai", model="m", latency=0.1, finish_reason="length"),
+        LLMResponse(text="and end.\n" + END_MARKER, provider="openai", model="m", latency=0.1, finish_reason="stop"),
+    ]
+    transcript = "word " * 20000
+    with patch("core.content_generation.get_llm_router", return_value=router):
+        text = generate_article_section(transcript, "wisdom", "outline", "Part two", "- a point", 2, 4,
+                                        custom_prompt="Write the article.")
+
+    assert text == "## Part two\nStart and end."
+    first = router.complete.call_args_list[0].kwargs
+    assert first["max_tokens"] == max_tokens_for("article_writing", transcript, parts=4)
+    assert first["stop"] == [END_MARKER]
+
+
+@pytest.mark.unit
+def test_truncated_output_is_continued_and_marker_stripped():
+    router = Mock()
+    router.complete.side_effect = [
+        LLMResponse(text="First half ", provider="openai", model="m", latency=0.1, finish_reason="length"),
+        LLMResponse(text="second half.\n" + END_MARKER, provider="openai", model="m", latency=0.1,
+                    finish_reason="stop"),
+    ]
+    layout = PromptLayout(system="sys", task="Write it.")
+
+    with patch("core.content_generation.get_llm_router", return_value=router):
+        text = _complete("article_writing", layout, max_tokens=100)
+
+    assert text == "First half second half."
+    assert router.complete.call_count == 2
+    continued = router.complete.call_args_list[1].kwargs["layout"]
+    assert continued.partial == "First half "
+    assert continued.openai_messages()[-2] == {"role": "assistant", "content": "First half "}
+    assert router.complete.call_args_list[0].kwargs["stop"] == [END_MARKER]
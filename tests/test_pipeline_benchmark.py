@@ -0,0 +1,52 @@
+"""
+Tests for the offline pipeline benchmark and its OpenAI/Supabase stand-ins
+"""
+
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add project root and scripts to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from benchmark_pipeline import FakeSupabase, run_scenario, synthesize_audio
+from fake_openai_server import FakeOpenAIConfig, FakeOpenAIServer, sample_from_schema
+from core.checkpoints import CheckpointStore
+from core.llm_router import get_llm_router
+from core.structured_output import COMBINED_ARTIFACTS_SCHEMA, validate
+
+
+@pytest.mark.unit
+def test_schema_samples_are_valid_structured_output():
+    import random
+
+    validate(sample_from_schema(COMBINED_ARTIFACTS_SCHEMA, random.Random(1)), COMBINED_ARTIFACTS_SCHEMA)
+
+
+@pytest.mark.integration
+def test_short_scenario_runs_offline_end_to_end(tmp_path, monkeypatch):
+    config = FakeOpenAIConfig(latency_ms=5, jitter_ms=5, tokens_per_second=100000, whisper_speed=10000)
+    db = FakeSupabase()
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    audio = synthesize_audio("short", 20, tmp_path, "64k")
+
+    with FakeOpenAIServer(config) as api, \
+            patch("core.supabase_integration.get_supabase_client", return_value=db), \
+            patch("core.pipeline_engine.get_checkpoint_store",
+                  return_value=CheckpointStore(str(tmp_path / "checkpoints.db"))):
+        monkeypatch.setenv("OPENAI_API_KEY", "offline-test")
+        monkeypatch.setenv("OPENAI_BASE_URL", api.base_url)
+        try:
+            scenario = run_scenario("short", audio, 20, 2, api, db, temp_dir)
+        finally:
+            get_llm_router().reset_clients()  # drop clients bound to the stand-in
+
+    assert scenario["completed"] == 2, scenario["errors"]
+    assert scenario["api"]["transcription_requests"] == 2
+    assert scenario["api"]["chat_requests"] >= 2 * 5
+    assert scenario["database_rows"] == 4  # a content row and a pipeline log per job
+    assert scenario["latency_seconds"]["max"] <= scenario["wall_seconds"]
+    assert scenario["rss_peak_mb"] > 0
@@ -0,0 +1,242 @@
+"""
+Tests for the headless pipeline engine
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import Mock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cancellation import current_token
+from core.checkpoints import CheckpointStore
+from core.cost_accounting import UsageRecord
+from core.pipeline_engine import PIPELINE_STEPS, PipelineEngine, PipelineJob, PipelineRun, resume_job
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    with patch("core.pipeline_engine.get_checkpoint_store", return_value=store):
+        yield store
+
+
+def _patched_generation(stack: ExitStack, **overrides):
+    fakes = {
+        "generate_wisdom": lambda transcript, **kw: "wisdom",
+        "generate_outline": lambda transcript, wisdom, **kw: "outline",
+        "compose_article": lambda transcript, wisdom, outline, **kw: "article",
+        "generate_with_structure": lambda structured, fallback, *args, **kw: (f"{structured.__name__} text", None),
+    }
+    fakes.update(overrides)
+    for name, fake in fakes.items():
+        stack.enter_context(patch(f"core.pipeline_engine.{name}", side_effect=fake))
+
+
+@pytest.mark.unit
+def test_transcript_job_runs_every_step_in_background():
+    events = []
+    engine = PipelineEngine(max_workers=2, use_processes=False)
+
+    with ExitStack() as stack:
+        _patched_generation(stack)
+        job = PipelineJob(transcript="A talk about latency.", options={"save_to_database": False})
+        engine.subscribe(job.job_id, events.append)
+        job_id = engine.submit(job)
+        status = engine.wait(job_id, timeout=10)
+    engine.shutdown()
+
+    assert status["status"] == "completed"
+    assert status["progress"] == 100.0
+    results = engine.results(job_id)
+    assert results["article_creation"] == "article"
+    assert results["social_content"] == "generate_social_posts text"
+    assert results["database_storage"] == "Database save skipped"
+    started = [e["step"] for e in events if e["event"] == "step_started"]
+    assert started == PIPELINE_STEPS
+    assert events[-1]["event"] == "completed"
+
+
+@pytest.mark.unit
+def test_failed_step_is_reported_with_partial_results():
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+
+    def broken_outline(transcript, wisdom, **kw):
+        raise RuntimeError("provider down")
+
+    with ExitStack() as stack:
+        _patched_generation(stack, generate_outline=broken_outline)
+        job_id = engine.submit(PipelineJob(transcript="text", user_id="u1"))
+        status = engine.wait(job_id, timeout=10)
+    engine.shutdown()
+
+    assert status["status"] == "failed"
+    assert status["error"] == "outline_creation: provider down"
+    assert engine.results(job_id)["wisdom_extraction"] == "wisdom"
+    assert [s["job_id"] for s in engine.list_jobs(user_id="u1")] == [job_id]
+
+
+@pytest.mark.unit
+def test_resume_restarts_from_first_missing_checkpoint(checkpoint_store):
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+    calls = []
+
+    def wisdom(transcript, **kw):
+        calls.append("wisdom")
+        return "wisdom"
+
+    def flaky_outline(transcript, wisdom, **kw):
+        calls.append("outline")
+        if calls.count("outline") == 1:
+            raise RuntimeError("timeout")
+        return "outline"
+
+    with ExitStack() as stack:
+        _patched_generation(stack, generate_wisdom=wisdom, generate_outline=flaky_outline)
+        job_id = engine.submit(PipelineJob(transcript="text", options={"save_to_database": False}))
+        assert engine.wait(job_id, timeout=10)["status"] == "failed"
+        assert "outline_creation" not in checkpoint_store.steps(job_id)
+
+        resume_job(job_id, backend=engine)
+        status = engine.wait(job_id, timeout=10)
+    engine.shutdown()
+
+    assert status["status"] == "completed"
+    assert calls == ["wisdom", "outline", "outline"]
+    assert engine.results(job_id)["resumed_steps"] == ["upload_validation", "transcription",
+                                                       "wisdom_extraction", "research_enrichment"]
+
+
+@pytest.mark.unit
+def test_completed_job_checkpoints_expire_after_retention(checkpoint_store):
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+    with ExitStack() as stack:
+        _patched_generation(stack)
+        job_id = engine.submit(PipelineJob(transcript="text", options={"save_to_database": False}))
+        assert engine.wait(job_id, timeout=10)["status"] == "completed"
+    engine.shutdown()
+    assert "social_content" in checkpoint_store.steps(job_id)  # kept for reprocessing
+
+    checkpoint_store.save_job("unfinished", {"transcript": "text"})
+    checkpoint_store.save("unfinished", "transcription", "hash", {"transcription": "text"})
+    assert checkpoint_store.expire(retention_seconds=3600, stale_seconds=3600) == 0
+    assert checkpoint_store.expire(retention_seconds=0, stale_seconds=3600) == 1
+    assert checkpoint_store.steps(job_id) == {} and checkpoint_store.load_job(job_id) is None
+    assert checkpoint_store.steps("unfinished")
+    assert checkpoint_store.expire(retention_seconds=0, stale_seconds=0) == 1
+    assert checkpoint_store.steps("unfinished") == {}
+
+
+@pytest.mark.unit
+def test_expiring_an_abandoned_job_deletes_its_upload(checkpoint_store, tmp_path):
+    upload, own_file = tmp_path / "upload.mp3", tmp_path / "mine.mp3"
+    upload.write_bytes(b"audio")
+    own_file.write_bytes(b"audio")
+    checkpoint_store.save_job("failed", {"audio_path": str(upload), "cleanup_audio": True})
+    checkpoint_store.save_job("cli", {"audio_path": str(own_file), "cleanup_audio": False})
+    checkpoint_store.save_job("gone", {"audio_path": str(tmp_path / "missing.mp3"), "cleanup_audio": True})
+
+    assert checkpoint_store.expire(retention_seconds=0, stale_seconds=0) == 3
+    assert not upload.exists()
+    assert own_file.exists()  # audio the job did not own is left alone
+
+
+@pytest.mark.unit
+def test_changed_prompt_reruns_only_downstream_steps():
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+    calls = []
+
+    def wisdom(transcript, **kw):
+        calls.append("wisdom")
+        return "wisdom"
+
+    def outline(transcript, wisdom, custom_prompt=None, **kw):
+        calls.append("outline")
+        return f"outline from {custom_prompt}"
+
+    job = PipelineJob(job_id="content-1", transcript="text", prompts={"outline_creation": "v1"},
+                      options={"save_to_database": False})
+    with ExitStack() as stack:
+        _patched_generation(stack, generate_wisdom=wisdom, generate_outline=outline)
+        engine.submit(job)
+        assert engine.wait(job.job_id, timeout=10)["status"] == "completed"
+
+        job.prompts["outline_creation"] = "v2"
+        engine.submit(job)
+        engine.wait(job.job_id, timeout=10)
+    engine.shutdown()
+
+    assert calls == ["wisdom", "outline", "outline"]
+    decisions = {d["step"]: d for d in engine.results(job.job_id)["step_decisions"]}
+    assert decisions["wisdom_extraction"] == {"step": "wisdom_extraction", "action": "reused",
+                                              "reason": "inputs unchanged"}
+    assert decisions["outline_creation"]["reason"] == "prompt 'outline_creation' changed"
+    assert decisions["article_creation"]["reason"] == "upstream step 'outline_creation' changed"
+    assert [d["step"] for d in decisions.values() if d["action"] == "reused"] == [
+        "upload_validation", "transcription", "wisdom_extraction", "research_enrichment"]
+
+
+def _blocking_outline(started):
+    def outline(transcript, wisdom, **kw):
+        started.set()
+        current_token().wait(10)
+        return "Error generating outline: request aborted"
+    return outline
+
+
+@pytest.mark.unit
+def test_cancel_stops_running_step_immediately():
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+    started = threading.Event()
+
+    with ExitStack() as stack:
+        _patched_generation(stack, generate_outline=_blocking_outline(started))
+        job_id = engine.submit(PipelineJob(transcript="text", options={"save_to_database": False}))
+        assert started.wait(5)
+        began = time.monotonic()
+        assert engine.cancel(job_id)
+        status = engine.wait(job_id, timeout=5)
+    engine.shutdown()
+
+    assert time.monotonic() - began < 2
+    assert status["status"] == "cancelled"
+    assert "article_creation" not in engine.results(job_id)
+    assert engine.cancel(job_id) is False
+
+
+@pytest.mark.unit
+def test_step_deadline_fails_the_job():
+    engine = PipelineEngine(max_workers=1, use_processes=False)
+
+    with ExitStack() as stack:
+        _patched_generation(stack, generate_outline=_blocking_outline(threading.Event()))
+        job_id = engine.submit(PipelineJob(transcript="text", options={"step_deadline_seconds": 0.2}))
+        status = engine.wait(job_id, timeout=5)
+    engine.shutdown()
+
+    assert status["status"] == "failed"
+    assert status["error"] == "outline_creation: outline_creation exceeded its deadline"
+
+
+@pytest.mark.unit
+def test_pipeline_log_records_the_model_that_served_the_job():
+    run = PipelineRun(PipelineJob(transcript="text", user_id="user-1", ai_provider="OpenAI", ai_model="gpt-4o"))
+    for provider, model in [("anthropic", "claude-3-5-sonnet"), ("anthropic", "claude-3-5-sonnet"),
+                            ("openai", "gpt-4o")]:
+        run.usage.add(UsageRecord(step="article_writing", provider=provider, model=model))
+    run.results["resource_usage"] = {"stages": {"chunking": {"rss_peak_mb": 180.0}}}
+    db = Mock()
+    db.client.table.return_value.insert.return_value.execute.return_value.data = [{"id": "content-1"}]
+
+    with patch("core.supabase_integration.get_supabase_client", return_value=db):
+        assert run._step_database_storage() == "Content saved with ID: content-1"
+
+    entry = db.log_pipeline_execution.call_args[0][1]
+    assert (entry["ai_provider"], entry["model"]) == ("anthropic", "claude-3-5-sonnet")
+    assert entry["metadata"]["content_id"] == "content-1"
+    assert entry["metadata"]["resource_usage"] == {"stages": {"chunking": {"rss_peak_mb": 180.0}}}
@@ -0,0 +1,62 @@
+"""
+Tests for opt-in per-job profiling
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import threading
+import time
+import tracemalloc
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.profiling import JobProfiler, profiling_requested
+
+
+def busy_transcription(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+@pytest.mark.unit
+def test_sampler_writes_folded_stacks_and_step_allocations(tmp_path):
+    profiler = JobProfiler("job-1", directory=str(tmp_path), mode="sample", interval_ms=1)
+    profiler.start()
+    worker = threading.Thread(target=busy_transcription, args=(0.3,), name="chunk-worker")
+    worker.start()
+    worker.join()
+    profiler.step_boundary("transcription")
+    retained = [bytearray(1024) for _ in range(2000)]  # ~2 MB held across the step boundary
+    profiler.step_boundary("wisdom_extraction")
+    report = profiler.stop()
+
+    assert report["mode"] == "sample" and report["samples"] > 10
+    folded = Path(report["artifacts"]["flamegraph"]).read_text().splitlines()
+    busy = [line for line in folded if line.startswith("chunk-worker;") and "busy_transcription" in line]
+    assert busy and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+
+    assert [step["step"] for step in report["memory"]] == ["transcription", "wisdom_extraction"]
+    assert report["memory"][1]["traced_mb"] >= report["memory"][0]["traced_mb"] + 2
+    allocations = Path(report["artifacts"]["allocations"]).read_text()
+    assert "wisdom_extraction" in allocations and "test_profiling.py" in allocations
+    assert not tracemalloc.is_tracing()
+    del retained
+
+
+@pytest.mark.unit
+def test_cprofile_mode_and_opt_in(tmp_path):
+    assert profiling_requested({"profile": True})
+    assert not profiling_requested({})
+
+    profiler = JobProfiler("job-2", directory=str(tmp_path), mode="cprofile")
+    profiler.start()
+    busy_transcription(0.05)
+    report = profiler.stop()
+
+    assert report["mode"] == "cprofile"
+    assert Path(report["artifacts"]["cprofile"]).stat().st_size > 0
@@ -0,0 +1,44 @@
+"""
+Tests for per-stage resource telemetry
+"""
+
+import pytest
+from pathlib import Path
+import subprocess
+import sys
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.metrics_exporter import stage_resources
+from core.resource_monitor import ResourceSampler
+
+
+@pytest.mark.unit
+def test_stage_records_peaks_child_cpu_and_gauges(tmp_path):
+    sampler = ResourceSampler(str(tmp_path), pipeline="test", interval=0.01)
+
+    with sampler.stage("chunking"):
+        for i in range(3):
+            (tmp_path / f"chunk_{i:03d}.wav").write_bytes(b"\0" * 100_000)
+        handles = [open(tmp_path / f"chunk_{i:03d}.wav", "rb") for i in range(3)]
+        subprocess.run([sys.executable, "-c", "sum(range(3_000_000))"], check=True)  # stands in for FFmpeg
+        for handle in handles:
+            handle.close()
+    with sampler.stage("wisdom_merge"):
+        for path in tmp_path.iterdir():
+            path.unlink()
+
+    report = sampler.report()
+    chunking, merge = report["stages"]
+    assert chunking["stage"] == "chunking" and chunking["samples"] >= 2
+    assert chunking["temp_bytes_peak"] == 300_000
+    assert chunking["child_cpu_seconds"] > 0
+    assert chunking["rss_peak_mb"] >= chunking["rss_start_mb"] > 0
+    assert chunking["open_fds_peak"] >= 3
+    assert merge["child_cpu_seconds"] == 0
+    assert report["temp_bytes_peak"] == 300_000
+
+    labels = {"pipeline": "test", "stage": "chunking"}
+    assert stage_resources["temp_bytes_peak"].value(**labels) == 300_000
+    assert stage_resources["rss_peak_mb"].value(**labels) == pytest.approx(chunking["rss_peak_mb"] * 1024 * 1024)
@@ -0,0 +1,96 @@
+"""
+Tests for submitting uploads from the Streamlit controller to background jobs
+"""
+
+import pytest
+from pathlib import Path
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import streamlit as st
+
+from core.config import get_config
+from core.job_queue import JobQueue
+from core.streaming_pipeline import StreamingPipelineController
+
+
+class Upload:
+    """Minimal Streamlit UploadedFile stand-in"""
+
+    name = "talk.mp3"
+
+    def getvalue(self):
+        return b"audio bytes"
+
+
+@pytest.fixture(autouse=True)
+def session_state():
+    st.session_state.clear()
+    st.session_state.user_id = "user-1"
+    yield st.session_state
+    st.session_state.clear()
+
+
+@pytest.mark.unit
+def test_uploads_are_submitted_to_the_engine():
+    engine = Mock(**{"submit.return_value": "job-1"})
+    with patch.object(get_config(), "job_queue_enabled", False), \
+            patch("core.pipeline_engine.get_pipeline_engine", return_value=engine):
+        controller = StreamingPipelineController()
+        job_id = controller.start_background(Upload(), prompts={"wisdom_extraction": "Find the insight"})
+
+    job = engine.submit.call_args[0][0]
+    try:
+        assert job_id == st.session_state.pipeline_job_id == "job-1"
+        assert st.session_state.pipeline_active
+        assert (job.file_name, job.user_id, job.cleanup_audio) == ("talk.mp3", "user-1", True)
+        assert job.prompts == {"wisdom_extraction": "Find the insight"}
+        with open(job.audio_path, "rb") as f:
+            assert f.read() == b"audio bytes"
+    finally:
+        os.unlink(job.audio_path)
+
+
+@pytest.mark.unit
+def test_uploads_are_enqueued_when_the_job_queue_is_enabled(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    config = get_config()
+    with patch.object(config, "job_queue_enabled", True), \
+            patch.object(config, "job_queue_path", str(tmp_path / "jobs.db")), \
+            patch("core.job_queue.get_job_queue", return_value=queue):
+        job_id = StreamingPipelineController().start_background(Upload())
+
+    assert queue.status(job_id)["status"] == "queued"
+    job = queue.lease("worker-1")
+    assert job.job_id == job_id and job.cleanup_audio
+    # The audio is kept beside the queue, not in the temp directory
+    assert Path(job.audio_path).parent == tmp_path / "uploads"
+    assert Path(job.audio_path).read_bytes() == b"audio bytes"
+
+
+@pytest.mark.unit
+def test_inline_steps_and_outcome_feed_the_health_windows():
+    controller = StreamingPipelineController()
+    controller.start_pipeline(Upload())
+    failing_step = controller.PIPELINE_STEPS[2]
+
+    def execute(step_id, step_index):
+        if step_id == failing_step:
+            raise RuntimeError("provider down")
+        return "ok"
+
+    with patch.object(controller, "_execute_step", side_effect=execute), \
+            patch("core.metrics_exporter.track_step") as track_step, \
+            patch("core.streaming_pipeline.track_pipeline") as track_pipeline:
+        while controller.process_next_step():
+            pass
+
+    assert [(c.args[0], c.args[2]) for c in track_step.call_args_list] == [
+        (controller.PIPELINE_STEPS[0], True), (controller.PIPELINE_STEPS[1], True), (failing_step, False)]
+    track_pipeline.assert_called_once()
+    assert track_pipeline.call_args.args[0] == "streaming"
+    assert track_pipeline.call_args.kwargs["success"] is False
@@ -0,0 +1,60 @@
+"""
+Tests for structured social posts and image prompts
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sys
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.structured_output import ImagePrompts, SocialContent, StructuredOutputError
+
+POSTS = {
+    "posts": [
+        {"platform": "linkedin", "title": "Hook", "parts": ["Latency is a feature."], "hashtags": ["#perf"]},
+        {"platform": "twitter", "title": "Thread", "parts": ["1/ Caching", "2/ Batching"], "hashtags": []},
+    ]
+}
+
+
+@pytest.mark.unit
+def test_social_posts_parse_into_typed_result():
+    social = SocialContent.from_json("```json\n" + json.dumps(POSTS) + "\n```")
+
+    assert [p.platform for p in social.posts] == ["linkedin", "twitter"]
+    assert social.by_platform()["twitter"][0].text == "1/ Caching\n\n2/ Batching"
+    assert "### LinkedIn: Hook" in social.to_markdown()
+    assert SocialContent.from_dict(social.to_dict()) == social
+    assert social.notion_blocks()[0]["type"] == "heading_3"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("payload", [
+    "not json",
+    json.dumps({"posts": [{"platform": "myspace", "title": "x", "parts": ["y"], "hashtags": []}]}),
+    json.dumps({"posts": [{"platform": "linkedin", "title": "x", "parts": "y", "hashtags": []}]}),
+    json.dumps({"posts": []}),
+])
+def test_invalid_social_output_is_rejected(payload):
+    with pytest.raises(StructuredOutputError):
+        SocialContent.from_json(payload)
+
+
+@pytest.mark.unit
+def test_image_prompts_reject_missing_fields():
+    with pytest.raises(StructuredOutputError):
+        ImagePrompts.from_json(json.dumps({"prompts": [{"title": "a", "prompt": "b", "style": "c"}]}))
+
+
+@pytest.mark.unit
+def test_combined_output_splits_into_both_artifacts():
+    from core.structured_output import split_combined_artifacts
+
+    prompts = {"prompts": [{"title": "Dawn", "prompt": "sunrise over servers", "style": "photo", "aspect_ratio": "16:9"}]}
+    social, images = split_combined_artifacts(json.dumps({**POSTS, **prompts}))
+
+    assert len(social.posts) == 2
+    assert images.prompts[0].aspect_ratio == "16:9"
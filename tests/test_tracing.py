@@ -0,0 +1,103 @@
+"""
+Tests for span tracing and trace export
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.tracing import Tracer, load_spans, render_waterfall, to_otlp, trace_files
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "traces.jsonl"), enabled=True, otel=False)
+    yield tracer
+    tracer.exporter.close()
+
+
+def _traced_job(tracer, job_id):
+    with tracer.span("job", kind="job", job_id=job_id):
+        with tracer.span("transcription", kind="step"):
+            with tracer.span("llm.openai", kind="http", model="gpt-4o"):
+                pass
+
+
+@pytest.mark.unit
+def test_spans_nest_and_load_per_job(tracer):
+    _traced_job(tracer, "job-1")
+    _traced_job(tracer, "job-2")
+    tracer.flush()
+
+    spans = {s.name: s for s in load_spans(tracer.exporter.path, job_id="job-1")}
+    assert set(spans) == {"job", "transcription", "llm.openai"}
+    assert spans["job"].parent_id is None
+    assert spans["transcription"].parent_id == spans["job"].span_id
+    assert spans["llm.openai"].parent_id == spans["transcription"].span_id
+    assert spans["llm.openai"].attributes == {"model": "gpt-4o"}
+    assert {s.job_id for s in spans.values()} == {"job-1"}
+    assert spans["job"].duration_ns >= spans["transcription"].duration_ns > 0
+
+
+@pytest.mark.unit
+def test_chunk_span_on_worker_thread_has_step_parent(tracer):
+    with tracer.span("job", kind="job", job_id="job-1"):
+        with tracer.span("transcription", kind="step") as step:
+            def work():
+                with tracer.span("chunk", kind="chunk"):
+                    pass
+
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(context.run, work).result()
+    tracer.flush()
+
+    spans = {s.name: s for s in load_spans(tracer.exporter.path)}
+    assert spans["chunk"].parent_id == step.span_id
+    assert spans["chunk"].trace_id == step.trace_id
+    assert spans["chunk"].thread != spans["transcription"].thread
+
+
+@pytest.mark.unit
+def test_failed_span_is_marked_and_exported(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("job", kind="job", job_id="job-1"):
+            with tracer.span("wisdom_extraction", kind="step"):
+                raise ValueError("boom")
+    tracer.flush()
+
+    spans = load_spans(tracer.exporter.path, job_id="job-1")
+    assert {s.status for s in spans} == {"error"}
+    assert spans[0].error == "ValueError: boom"
+
+    lines = render_waterfall(spans)
+    assert len(lines) == 3
+    assert lines[2].lstrip().startswith("wisdom_extraction ✗")
+
+    otlp = to_otlp(spans)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    job = next(s for s in otlp if s["name"] == "job")
+    assert "parentSpanId" not in job
+    assert job["status"]["code"] == 2
+    assert int(job["endTimeUnixNano"]) >= int(job["startTimeUnixNano"])
+    assert {"key": "job_id", "value": {"stringValue": "job-1"}} in job["attributes"]
+
+
+@pytest.mark.unit
+def test_trace_file_rotates_and_jobs_load_across_rotated_files(tracer, tmp_path):
+    tracer.exporter.handler.max_bytes = 2000
+    tracer.exporter.handler.backup_count = 100
+    for i in range(12):
+        _traced_job(tracer, f"job-{i}")
+        tracer.flush()  # one batch per job, so rotation is checked between jobs
+
+    files = trace_files(tracer.exporter.path)
+    assert len(files) > 2
+    assert all(path.stat().st_size <= 2000 for path in files)
+    assert {s.name for s in load_spans(tracer.exporter.path, job_id="job-1")} == {
+        "job", "transcription", "llm.openai"}  # and none of job-10's or job-11's
+    assert len(load_spans(tracer.exporter.path)) == 36
@@ -0,0 +1,47 @@
+"""
+Tests for the shared transcript digest
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.transcript_digest import PASSAGE_BREAK, build_transcript_digest, remove_fillers
+
+
+@pytest.mark.unit
+def test_removes_fillers_and_stutters():
+    assert remove_fillers("Um, so the the plan is, you know, simple.") == "so the plan is, simple."
+    assert remove_fillers("We shipped.  Like, every week. You know, it worked.") == "We shipped. every week. it worked."
+
+
+@pytest.mark.unit
+def test_keeps_meaningful_uses_of_filler_phrases():
+    for text in ("I mean, the contract was clear.", "Did it help? Kind of, but not really.",
+                 "It felt like, a betrayal.", "It was sort of, you could say, a draft."):
+        assert remove_fillers(text) == text
+
+
+@pytest.mark.unit
+def test_drops_repeated_sentences():
+    digest = build_transcript_digest("Ship it today. Ship it today! We measure latency.", max_tokens=1000)
+
+    assert digest.text == "Ship it today. We measure latency."
+    assert digest.duplicates_removed == 1
+    assert not digest.extractive
+
+
+@pytest.mark.unit
+def test_long_transcripts_keep_extractive_passages_within_budget():
+    sentences = [f"Sentence {i} talks about caching latency and tokens." for i in range(200)]
+    sentences[100] = "Unrelated chatter about the weather."
+    digest = build_transcript_digest(" ".join(sentences), max_tokens=200)
+
+    assert digest.extractive
+    assert digest.digest_tokens <= 200
+    assert digest.text.startswith("Sentence 0 ") and digest.text.endswith("Sentence 199 talks about caching latency and tokens.")
+    assert PASSAGE_BREAK in digest.text
+    assert digest.report(steps_using=3)["tokens_saved"] == 3 * digest.tokens_saved
@@ -313,6 +313,133 @@ def transcribe(input_file: str, output: Optional[str]):
         sys.exit(1)
 
 
+@cli.group()
+def queue():
+    """Durable job queue operations"""
+    pass
+
+
+@queue.command()
+@click.option("--processes", "-p", type=int, default=None, help="Worker processes (default: one per core)")
+@click.option("--db", type=click.Path(), default=None, help="Queue database (default: JOB_QUEUE_PATH)")
+def worker(processes: Optional[int], db: Optional[str]):
+    """Run queue workers until interrupted"""
+    from core.job_queue import run_workers
+
+    if not validate_api_keys():
+        sys.exit(1)
+
+    click.echo(f"👷 Starting {processes or os.cpu_count()} queue workers (Ctrl+C to stop after current jobs)")
+    run_workers(processes=processes, path=db)
+
+
+@queue.command()
+@click.option(
+    "--input",
+    "-i",
+    "input_file",
+    required=True,
+    type=click.Path(exists=True),
+    help="Input audio file path",
+)
+@click.option("--user", "user_id", default=None, help="User id the job belongs to")
+@click.option("--priority", type=int, default=0, help="Higher runs first across users")
+@click.option("--profile", is_flag=True, help="Profile the job (CPU samples and per-step allocations)")
+@click.option("--db", type=click.Path(), default=None, help="Queue database (default: JOB_QUEUE_PATH)")
+def submit(input_file: str, user_id: Optional[str], priority: int, profile: bool, db: Optional[str]):
+    """Queue an audio file for processing by the workers"""
+    from core.job_queue import JobQueue
+    from core.pipeline_engine import PipelineJob
+
+    if not validate_audio_file(input_file):
+        sys.exit(1)
+
+    job = PipelineJob(
+        audio_path=str(Path(input_file).resolve()),
+        file_name=Path(input_file).name,
+        user_id=user_id,
+        options={"save_to_database": bool(user_id), **({"profile": True} if profile else {})},
+    )
+    job_id = JobQueue(db).submit(job, priority=priority)
+    click.echo(f"✅ Queued job {job_id}")
+
+
+@queue.command(name="status")
+@click.argument("job_id", required=False)
+@click.option("--db", type=click.Path(), default=None, help="Queue database (default: JOB_QUEUE_PATH)")
+def queue_status(job_id: Optional[str], db: Optional[str]):
+    """Show one job, or queue counts and recent jobs"""
+    from core.job_queue import JobQueue
+
+    job_queue = JobQueue(db)
+    if job_id:
+        status = job_queue.status(job_id)
+        if status is None:
+            click.echo(f"❌ Unknown job {job_id}", err=True)
+            sys.exit(1)
+        for key, value in status.items():
+            click.echo(f"{key}: {value}")
+        profile = job_queue.results(job_id).get("profile")
+        if profile:
+            click.echo(f"profile: {profile['mode']}, {profile['samples']} samples")
+            for name, path in profile["artifacts"].items():
+                click.echo(f"  {name}: {path}")
+        return
+
+    counts = job_queue.counts()
+    names = ("queued", "running", "cancelling", "completed", "failed", "cancelled")
+    click.echo("  ".join(f"{name}: {counts.get(name, 0)}" for name in names))
+    for status in job_queue.list_jobs(limit=20):
+        click.echo(
+            f"{status['job_id'][:12]}  {status['status']:<9}  user={status['user_id'] or '-':<12}  "
+            f"priority={status['priority']}  attempts={status['attempts']}  {status['progress']:.0f}%"
+            f"{'  ' + status['error'] if status['error'] else ''}"
+        )
+
+
+@queue.command(name="cancel")
+@click.argument("job_id")
+@click.option("--db", type=click.Path(), default=None, help="Queue database (default: JOB_QUEUE_PATH)")
+def queue_cancel(job_id: str, db: Optional[str]):
+    """Cancel a queued or running job"""
+    from core.job_queue import JobQueue
+
+    if not JobQueue(db).cancel(job_id):
+        click.echo(f"❌ Job {job_id} is unknown or already finished", err=True)
+        sys.exit(1)
+    click.echo(f"⏹️ Cancel requested for job {job_id}")
+
+
+@cli.command()
+@click.argument("job_id")
+@click.option("--file", "trace_file", type=click.Path(), default=None, help="Trace file (default: TRACE_PATH)")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["waterfall", "jsonl", "otlp"]),
+    default="waterfall",
+    help="Waterfall view, raw spans, or OTLP/JSON for an OpenTelemetry collector",
+)
+def trace(job_id: str, trace_file: Optional[str], output_format: str):
+    """Show the timing spans recorded for a job"""
+    import json
+
+    from core.tracing import load_spans, render_waterfall, to_otlp
+
+    spans = load_spans(trace_file, job_id=job_id)
+    if not spans:
+        click.echo(f"❌ No spans recorded for job {job_id}", err=True)
+        sys.exit(1)
+    if output_format == "jsonl":
+        for recorded in spans:
+            click.echo(json.dumps(recorded.to_dict(), default=str))
+    elif output_format == "otlp":
+        click.echo(json.dumps(to_otlp(spans), indent=2, default=str))
+    else:
+        for line in render_waterfall(spans):
+            click.echo(line)
+
+
 @cli.command()
 def status():
     """Check system status and configuration"""